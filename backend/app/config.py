@@ -1,12 +1,91 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./contract_risk.db"
+    # Apply pending schema migrations at startup instead of with
+    # "python -m app.migrations upgrade" at deploy. Unset: only for SQLite,
+    # the development database; elsewhere startup fails while any are pending
+    AUTO_MIGRATE: Optional[bool] = None
+
+    # SQLite tuning, applied with PRAGMAs on every new connection. WAL lets
+    # readers proceed while a quantification run is writing.
+    DB_SQLITE_JOURNAL_MODE: str = "WAL"
+    DB_SQLITE_SYNCHRONOUS: str = "NORMAL"
+    DB_SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # bytes
+    DB_SQLITE_CACHE_SIZE: int = -64 * 1024  # negative = KiB, i.e. 64 MiB
+    DB_SQLITE_BUSY_TIMEOUT: float = 5.0  # seconds to wait on a locked database
+
+    # Connection pool for server databases (PostgreSQL etc.)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Driver URL for the async engine; derived from DATABASE_URL when empty
+    # (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg)
+    ASYNC_DATABASE_URL: str = ""
+
+    # Worker threads dedicated to CPU-bound Monte Carlo runs, so simulations
+    # never occupy the event loop or the request threadpool
+    SIMULATION_WORKERS: int = 2
+    # Runs allowed to wait for a worker before new requests get 429
+    SIMULATION_MAX_QUEUE: int = 4
+    # Retry-After (seconds) advertised before any run duration is known
+    SIMULATION_RETRY_AFTER: int = 10
+    # Per-request caps: trials, and trials x loss scenarios (each sample is
+    # held as a float64 per scenario, twice: unmitigated and mitigated)
+    SIMULATION_MAX_TRIALS: int = 1_000_000
+    SIMULATION_MAX_SAMPLES: int = 20_000_000
+
     ANTHROPIC_API_KEY: str = ""
+    # Claude calls a single bulk AI request may have in flight at once
+    AI_MAX_CONCURRENCY: int = 4
+    # Retries for rate-limited or transiently failing Claude calls, with
+    # exponential backoff from AI_RETRY_BASE_DELAY seconds (capped)
+    AI_MAX_RETRIES: int = 3
+    AI_RETRY_BASE_DELAY: float = 1.0
+    AI_RETRY_MAX_DELAY: float = 30.0
+    # Loss scenarios estimated per Claude call by the batch endpoint
+    AI_ESTIMATE_BATCH_SIZE: int = 15
+    # Approximate token ceiling for the engagement data in one prompt; longer
+    # party and failure-mode lists keep their largest entries and summarize
+    # the rest
+    AI_PROMPT_TOKEN_BUDGET: int = 6000
+    # Shortest prompt prefix the model caches (1024 tokens for Claude
+    # Sonnet); shorter prefixes are sent without a cache breakpoint
+    AI_PROMPT_CACHE_MIN_TOKENS: int = 1024
+    # Failure modes per prompt when mitigation suggestions are map-reduced;
+    # "auto" mode switches to map-reduce above this many
+    AI_MITIGATION_CHUNK_SIZE: int = 25
+
+    # LLM response cache: in-memory LRU, plus an SQLite file that survives
+    # restarts when LLM_CACHE_PATH is set (e.g. ./llm_cache.db). Entries
+    # expire after LLM_CACHE_TTL seconds.
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = ""
+    LLM_CACHE_TTL: int = 7 * 24 * 3600
+    LLM_CACHE_MEMORY_ENTRIES: int = 256
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
 
+    # Shared secret for admin-only features (X-Admin-Token header), such as
+    # profiling a run; empty disables them
+    ADMIN_TOKEN: str = ""
+    # Stack sampling interval of the "sampling" run profiler
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5.0
+
+    # Development/staging: per-request SQL inspection that logs slow
+    # statements and statement shapes repeated within one request (N+1)
+    QUERY_INSPECTOR_ENABLED: bool = False
+    QUERY_SLOW_THRESHOLD_MS: float = 100.0
+    QUERY_REPEAT_THRESHOLD: int = 10
+
+    # Responses smaller than this many bytes are sent uncompressed
+    GZIP_MINIMUM_SIZE: int = 1024
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
@@ -1,15 +1,93 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
 
+# Async drivers substituted for the sync defaults when deriving the async URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-)
+
+def sqlite_pragmas() -> dict[str, object]:
+    """PRAGMAs applied to each new SQLite connection, from settings."""
+    return {
+        "journal_mode": settings.DB_SQLITE_JOURNAL_MODE,
+        "synchronous": settings.DB_SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.DB_SQLITE_MMAP_SIZE,
+        "cache_size": settings.DB_SQLITE_CACHE_SIZE,
+        "busy_timeout": int(settings.DB_SQLITE_BUSY_TIMEOUT * 1000),
+    }
+
+
+def async_database_url(url: str) -> str:
+    """Return ``url`` with its driver swapped for the async equivalent."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False) if driver else url
+
+
+def _install_sqlite_pragmas(engine: Engine, pragmas: dict[str, object]) -> None:
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _engine_kwargs(url: str, kwargs: dict) -> dict:
+    if url.startswith("sqlite"):
+        kwargs.setdefault("connect_args", {"check_same_thread": False, "timeout": settings.DB_SQLITE_BUSY_TIMEOUT})
+    else:
+        kwargs.setdefault("pool_size", settings.DB_POOL_SIZE)
+        kwargs.setdefault("max_overflow", settings.DB_MAX_OVERFLOW)
+        kwargs.setdefault("pool_timeout", settings.DB_POOL_TIMEOUT)
+        kwargs.setdefault("pool_recycle", settings.DB_POOL_RECYCLE)
+        kwargs.setdefault("pool_pre_ping", settings.DB_POOL_PRE_PING)
+    return kwargs
+
+
+def create_db_engine(url: str, pragmas: dict[str, object] | None = None, **kwargs) -> Engine:
+    """Create an engine configured from settings.
+
+    SQLite connections get ``pragmas`` (default: ``sqlite_pragmas()``); other
+    databases get the configured connection pool. ``kwargs`` are passed
+    through to ``create_engine``.
+    """
+    engine = create_engine(url, **_engine_kwargs(url, kwargs))
+    if url.startswith("sqlite"):
+        _install_sqlite_pragmas(engine, sqlite_pragmas() if pragmas is None else pragmas)
+    return engine
+
+
+def create_async_db_engine(url: str, pragmas: dict[str, object] | None = None, **kwargs) -> AsyncEngine:
+    """Async counterpart of ``create_db_engine``; ``url`` must name an async driver."""
+    if url.startswith("sqlite") and ":memory:" not in url:
+        # aiosqlite defaults to NullPool, which would start a connection
+        # thread and re-run the PRAGMAs on every request
+        kwargs.setdefault("poolclass", AsyncAdaptedQueuePool)
+    engine = create_async_engine(url, **_engine_kwargs(url, kwargs))
+    if url.startswith("sqlite"):
+        _install_sqlite_pragmas(engine.sync_engine, sqlite_pragmas() if pragmas is None else pragmas)
+    return engine
+
+
+engine = create_db_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine(settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL))
+
+# expire_on_commit=False: returned objects are serialized after the commit,
+# outside any awaitable context where an expired attribute could be reloaded
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 class Base(DeclarativeBase):
     pass
@@ -21,3 +99,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
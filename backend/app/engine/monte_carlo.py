@@ -1,5 +1,6 @@
 """Core Monte Carlo simulation engine for loss modelling."""
 
+import time
 from dataclasses import dataclass, field
 from typing import List, Optional
 import numpy as np
@@ -66,6 +67,7 @@ class FailureModeResult:
     name: str
     total_losses: np.ndarray  # aggregated per-trial losses for this FM
     scenario_results: List[ScenarioResult] = field(default_factory=list)
+    seconds: float = 0.0  # wall-clock time spent simulating this FM
 
 
 @dataclass
@@ -76,9 +78,26 @@ class SimulationResult:
     n_simulations: int = 0
 
 
+class SimulationHook:
+    """Callbacks around a simulation, e.g. for profiling. Override what you need."""
+
+    def start(self, failure_modes: List[FailureModeInput], config: SimulationConfig) -> None:
+        pass
+
+    def failure_mode_started(self, fm: FailureModeInput) -> None:
+        pass
+
+    def failure_mode_finished(self, fm: FailureModeInput, result: FailureModeResult) -> None:
+        pass
+
+    def finish(self, result: Optional[SimulationResult]) -> None:
+        """Called last, with None if the simulation raised."""
+
+
 def run_simulation(
     failure_modes: List[FailureModeInput],
     config: SimulationConfig,
+    hook: Optional[SimulationHook] = None,
 ) -> SimulationResult:
     """Run Monte Carlo simulation across all failure modes.
 
@@ -88,12 +107,31 @@ def run_simulation(
       3. Sum losses across events within each scenario
       4. Optionally apply mitigation reduction factors
     """
+    if hook is None:
+        return _run_simulation(failure_modes, config, None)
+    hook.start(failure_modes, config)
+    result = None
+    try:
+        result = _run_simulation(failure_modes, config, hook)
+        return result
+    finally:
+        hook.finish(result)
+
+
+def _run_simulation(
+    failure_modes: List[FailureModeInput],
+    config: SimulationConfig,
+    hook: Optional[SimulationHook],
+) -> SimulationResult:
     rng = default_rng(config.seed)
     n = config.n_simulations
     total_losses = np.zeros(n)
     fm_results = []
 
     for fm in failure_modes:
+        if hook is not None:
+            hook.failure_mode_started(fm)
+        start = time.perf_counter()
         freq_low = fm.frequency_low
         freq_mid = fm.frequency_mid
         freq_high = fm.frequency_high
@@ -155,7 +193,10 @@ def run_simulation(
             name=fm.name,
             total_losses=fm_total,
             scenario_results=scenario_results,
+            seconds=time.perf_counter() - start,
         ))
+        if hook is not None:
+            hook.failure_mode_finished(fm, fm_results[-1])
 
     return SimulationResult(
         total_losses=total_losses,
@@ -0,0 +1,486 @@
+"""Mitigation portfolio optimization over common random numbers.
+
+Every candidate subset of mitigations is evaluated against one shared set of
+unmitigated draws instead of a new ``run_simulation``. The engine's mitigation
+model makes that exact:
+
+* a severity residual ``s`` scales every severity distribution parameter, and
+  so every sampled severity, by ``s``;
+* a frequency residual ``r`` scales the Poisson rate by ``r``, which is the
+  same as keeping each event independently with probability ``r``
+  (Poisson thinning). Each event is drawn once with a uniform ``u`` and is
+  kept under residual ``r`` when ``u < r``.
+
+A subset's losses are therefore ``s * sum(event losses with u < r)`` per
+failure mode and trial, with ``r`` and ``s`` from ``combine_mitigations``.
+With events sorted by ``u`` that is a prefix sum, and only the failure modes
+the subset touches need it. Each mitigation's reductions are clamped to
+[0, 1]: above 100% keeps no events (or no severity), negative is treated as
+none.
+
+The search evaluates every single mitigation, then greedily adds the one with
+the best marginal reduction per unit cost to trace a cost/reduction path, and
+finally runs a depth-first branch-and-bound for the best subset within the
+budget. Its bound assumes diminishing returns (a mitigation is worth no more
+on top of others than alone), which holds for expected loss under the
+multiplicative model; for TVaR it is a heuristic. The frontier returned is the
+set of Pareto-efficient portfolios among all those evaluated.
+
+``CommonDraws.contributions`` attributes reductions to each mitigation on the
+same draws: alone (add-one) and on top of all the others (leave-one-out).
+``simulate_on_common_draws`` produces a quantification's unmitigated and
+mitigated runs from one such set of draws and returns it too, so the
+attribution is of the runs' own events.
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Collection, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+from numpy.random import default_rng
+
+from app.engine.distributions import sample_frequency, sample_severity
+from app.engine.mitigation_model import combine_mitigations
+from app.engine.monte_carlo import (
+    FailureModeInput,
+    FailureModeResult,
+    MitigationEffect,
+    ScenarioResult,
+    SimulationConfig,
+    SimulationHook,
+    SimulationResult,
+)
+
+OBJECTIVES = ("expected_loss", "tvar_95")
+
+
+@dataclass
+class MitigationOption:
+    """A mitigation that can be bought, with its cost."""
+    mitigation_id: int
+    name: str
+    cost: float = 0.0
+
+
+@dataclass
+class _FailureModeDraws:
+    """Unmitigated events of one mitigable failure mode, sorted by ``u``."""
+    mitigations: List[MitigationEffect]
+    u: np.ndarray
+    trial: np.ndarray
+    loss: np.ndarray  # event loss summed over the failure mode's scenarios
+    base: np.ndarray  # per-trial unmitigated losses
+
+    def kept(self, freq_residual: float) -> int:
+        """Number of leading events kept under frequency residual ``freq_residual``."""
+        return int(np.searchsorted(self.u, freq_residual, side="left"))
+
+
+class CommonDraws:
+    """Unmitigated draws shared by every portfolio evaluation."""
+
+    def __init__(self, n_simulations: int, fixed: np.ndarray, failure_modes: List[_FailureModeDraws]):
+        self.n_simulations = n_simulations
+        self._fixed = fixed
+        self._failure_modes = failure_modes
+        self._touched: Dict[int, List[int]] = {}
+        for i, fm in enumerate(failure_modes):
+            for m in fm.mitigations:
+                self._touched.setdefault(m.mitigation_id, []).append(i)
+        self.baseline = fixed + sum((fm.base for fm in failure_modes), np.zeros(n_simulations))
+
+    @classmethod
+    def sample(
+        cls,
+        failure_modes: List[FailureModeInput],
+        n_simulations: int,
+        seed: Optional[int] = None,
+    ) -> "CommonDraws":
+        """Draw unmitigated losses, keeping events of failure modes that have mitigations."""
+        rng = default_rng(seed)
+        n = n_simulations
+        fixed = np.zeros(n)
+        mitigable = []
+        for fm in failure_modes:
+            trial, scenario_loss = _sample_events(rng, fm, n)
+            loss = scenario_loss.sum(axis=0)
+            base = np.bincount(trial, weights=loss, minlength=n)
+            if not fm.mitigations or not fm.loss_scenarios:
+                fixed += base
+                continue
+            u = rng.random(len(loss))
+            order = np.argsort(u)
+            mitigable.append(_FailureModeDraws(fm.mitigations, u[order], trial[order], loss[order], base))
+        return cls(n, fixed, mitigable)
+
+    def mitigation_ids(self) -> List[int]:
+        """Mitigations that affect at least one failure mode."""
+        return list(self._touched)
+
+    def losses(self, selected: Collection[int]) -> np.ndarray:
+        """Per-trial total losses with the ``selected`` mitigation ids applied."""
+        total = self.baseline.copy()
+        touched = {i for mitigation_id in selected for i in self._touched.get(mitigation_id, ())}
+        for i in touched:
+            fm = self._failure_modes[i]
+            total -= fm.base
+            total += self._failure_mode_losses(fm, [m for m in fm.mitigations if m.mitigation_id in selected])
+        return total
+
+    def contributions(self, max_block_bytes: int = 64 * 1024 * 1024) -> List["MitigationContribution"]:
+        """Add-one and leave-one-out reductions of every mitigation, in one pass.
+
+        Each mitigation's effect is confined to the failure modes it touches,
+        so one pass over the (failure mode, mitigation) links gives, per
+        mitigation, its per-trial losses on its own and with all the others.
+        Mitigations are processed in blocks whose ``(mitigations, trials)``
+        loss matrices stay under ``max_block_bytes``; metrics are taken
+        row-wise over each block.
+        """
+        ids = self.mitigation_ids()
+        n = self.n_simulations
+        all_losses = self.losses(ids)
+        base_el, base_var, base_tvar = _row_metrics(self.baseline[None, :])
+        all_el, all_var, all_tvar = _row_metrics(all_losses[None, :])
+        block = max(1, max_block_bytes // (8 * n))
+        contributions = []
+        for start in range(0, len(ids), block):
+            block_ids = ids[start:start + block]
+            row = {m: i for i, m in enumerate(block_ids)}
+            alone = np.repeat(self.baseline[None, :], len(block_ids), axis=0)  # only m applied
+            dropped = np.repeat(all_losses[None, :], len(block_ids), axis=0)  # all but m applied
+            for i in sorted({i for m in block_ids for i in self._touched[m]}):
+                fm = self._failure_modes[i]
+                with_all = self._failure_mode_losses(fm, fm.mitigations)
+                for m in {e.mitigation_id for e in fm.mitigations} & row.keys():
+                    alone[row[m]] += self._failure_mode_losses(
+                        fm, [e for e in fm.mitigations if e.mitigation_id == m]
+                    ) - fm.base
+                    dropped[row[m]] += self._failure_mode_losses(
+                        fm, [e for e in fm.mitigations if e.mitigation_id != m]
+                    ) - with_all
+            el, var, tvar = _row_metrics(alone)
+            loo_el, loo_var, loo_tvar = _row_metrics(dropped)
+            for i, m in enumerate(block_ids):
+                contributions.append(MitigationContribution(
+                    mitigation_id=m,
+                    el_reduction=float(base_el[0] - el[i]),
+                    var_95_reduction=float(base_var[0] - var[i]),
+                    tvar_95_reduction=float(base_tvar[0] - tvar[i]),
+                    loo_el_reduction=float(loo_el[i] - all_el[0]),
+                    loo_var_95_reduction=float(loo_var[i] - all_var[0]),
+                    loo_tvar_95_reduction=float(loo_tvar[i] - all_tvar[0]),
+                ))
+        return contributions
+
+    def _failure_mode_losses(self, fm: _FailureModeDraws, effects: List[MitigationEffect]) -> np.ndarray:
+        freq_residual, sev_residual = _residuals(effects)
+        kept = fm.kept(freq_residual)
+        losses = np.bincount(fm.trial[:kept], weights=fm.loss[:kept], minlength=self.n_simulations)
+        return losses * sev_residual
+
+
+def simulate_on_common_draws(
+    failure_modes: List[FailureModeInput],
+    n_simulations: int,
+    seed: Optional[int] = None,
+    hook: Optional[SimulationHook] = None,
+) -> Tuple[SimulationResult, SimulationResult, CommonDraws]:
+    """Unmitigated and mitigated runs from one set of draws, and those draws.
+
+    Each run is distributed as ``run_simulation``'s without and with
+    mitigations, but both share their events: the mitigated run keeps the
+    events that survive the frequency residual and scales them by the
+    severity residual. The draws are those of ``CommonDraws.sample`` with the
+    same seed, so its contributions are of these runs' events, and all
+    mitigations applied to them give the mitigated run's losses.
+
+    ``hook`` sees the single pass over the failure modes, with the
+    unmitigated results.
+    """
+    config = SimulationConfig(n_simulations=n_simulations, seed=seed)
+    if hook is not None:
+        hook.start(failure_modes, config)
+    result = None
+    try:
+        result = _simulate_on_common_draws(failure_modes, n_simulations, seed, hook)
+        return result
+    finally:
+        if hook is not None:
+            hook.finish(result[0] if result is not None else None)
+
+
+def _simulate_on_common_draws(
+    failure_modes: List[FailureModeInput],
+    n_simulations: int,
+    seed: Optional[int],
+    hook: Optional[SimulationHook],
+) -> Tuple[SimulationResult, SimulationResult, CommonDraws]:
+    rng = default_rng(seed)
+    n = n_simulations
+    fixed = np.zeros(n)
+    mitigable = []
+    unmitigated_fms: List[FailureModeResult] = []
+    mitigated_fms: List[FailureModeResult] = []
+    for fm in failure_modes:
+        if hook is not None:
+            hook.failure_mode_started(fm)
+        start = time.perf_counter()
+        trial, scenario_loss = _sample_events(rng, fm, n)
+        unmitigated = [np.bincount(trial, weights=row, minlength=n) for row in scenario_loss]
+        base = sum(unmitigated, np.zeros(n))
+        if fm.mitigations and fm.loss_scenarios:
+            u = rng.random(len(trial))
+            order = np.argsort(u)
+            draws = _FailureModeDraws(fm.mitigations, u[order], trial[order], scenario_loss.sum(axis=0)[order], base)
+            mitigable.append(draws)
+            freq_residual, sev_residual = _residuals(fm.mitigations)
+            kept = order[:draws.kept(freq_residual)]
+            mitigated = [
+                np.bincount(trial[kept], weights=row[kept], minlength=n) * sev_residual for row in scenario_loss
+            ]
+        else:
+            fixed += base
+            mitigated = unmitigated
+        seconds = time.perf_counter() - start
+        unmitigated_fms.append(_failure_mode_result(fm, unmitigated, n, seconds))
+        mitigated_fms.append(_failure_mode_result(fm, mitigated, n, seconds))
+        if hook is not None:
+            hook.failure_mode_finished(fm, unmitigated_fms[-1])
+
+    runs = tuple(
+        SimulationResult(
+            total_losses=sum((fr.total_losses for fr in fm_results), np.zeros(n)),
+            failure_mode_results=fm_results,
+            n_simulations=n,
+        )
+        for fm_results in (unmitigated_fms, mitigated_fms)
+    )
+    return runs[0], runs[1], CommonDraws(n, fixed, mitigable)
+
+
+def _sample_events(rng: np.random.Generator, fm: FailureModeInput, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Trial of each unmitigated event, and its loss per scenario as ``(scenarios, events)``."""
+    counts = sample_frequency(rng, fm.frequency_low, fm.frequency_mid, fm.frequency_high, n)
+    n_events = int(counts.sum())
+    scenario_loss = np.zeros((len(fm.loss_scenarios), n_events))
+    for row, ls in zip(scenario_loss, fm.loss_scenarios):
+        row[:] = sample_severity(
+            rng, ls.distribution_type, ls.severity_low, ls.severity_mid, ls.severity_high, n_events,
+        )
+    return np.repeat(np.arange(n), counts), scenario_loss
+
+
+def _residuals(effects: List[MitigationEffect]) -> Tuple[float, float]:
+    """Frequency (as a keep probability) and severity residuals of ``effects`` combined.
+
+    Each reduction is clamped to [0, 1] first, so none can add losses.
+    """
+    combined = combine_mitigations([
+        MitigationEffect(m.mitigation_id, m.name, _clamp(m.frequency_reduction), _clamp(m.severity_reduction))
+        for m in effects
+    ])
+    return 1.0 - combined.frequency_reduction, 1.0 - combined.severity_reduction
+
+
+def _clamp(reduction: float) -> float:
+    return min(max(reduction, 0.0), 1.0)
+
+
+def _failure_mode_result(
+    fm: FailureModeInput, scenario_losses: List[np.ndarray], n: int, seconds: float,
+) -> FailureModeResult:
+    return FailureModeResult(
+        failure_mode_id=fm.failure_mode_id,
+        name=fm.name,
+        total_losses=sum(scenario_losses, np.zeros(n)),
+        scenario_results=[
+            ScenarioResult(
+                scenario_id=ls.scenario_id, party_id=ls.party_id, loss_category=ls.loss_category, losses=losses,
+            )
+            for ls, losses in zip(fm.loss_scenarios, scenario_losses)
+        ],
+        seconds=seconds,
+    )
+
+
+def tail_value_at_risk(losses: np.ndarray, q: float = 95) -> float:
+    """Mean loss at or above the ``q``th percentile, as in ``compute_metrics``."""
+    if len(losses) == 0:
+        return 0.0
+    var = np.percentile(losses, q)
+    return float(np.mean(losses[losses >= var]))
+
+
+def _row_metrics(losses: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Expected loss, VaR 95 and TVaR 95 of each row of ``losses``."""
+    var = np.percentile(losses, 95, axis=1)
+    tail = losses >= var[:, None]
+    tvar = np.where(tail, losses, 0.0).sum(axis=1) / tail.sum(axis=1)
+    return losses.mean(axis=1), var, tvar
+
+
+@dataclass
+class MitigationContribution:
+    """Loss reductions attributed to one mitigation.
+
+    ``*_reduction`` compares the mitigation alone with no mitigations
+    (add-one); ``loo_*_reduction`` compares all mitigations with all but this
+    one (leave-one-out), i.e. what it adds on top of the others.
+    """
+    mitigation_id: int
+    el_reduction: float
+    var_95_reduction: float
+    tvar_95_reduction: float
+    loo_el_reduction: float
+    loo_var_95_reduction: float
+    loo_tvar_95_reduction: float
+
+
+@dataclass
+class Portfolio:
+    """One evaluated subset of mitigations."""
+    mitigation_ids: Tuple[int, ...]
+    cost: float
+    expected_loss: float
+    tvar_95: float
+    expected_loss_reduction: float = 0.0
+    tvar_95_reduction: float = 0.0
+
+    def reduction(self, objective: str) -> float:
+        return getattr(self, f"{objective}_reduction")
+
+
+@dataclass
+class PortfolioResult:
+    """Baseline, best portfolio within the budget and the efficient frontier."""
+    objective: str
+    budget: Optional[float]
+    baseline: Portfolio
+    best: Portfolio
+    frontier: List[Portfolio] = field(default_factory=list)  # ascending cost
+    evaluations: int = 0
+    exhaustive: bool = True  # False if the search stopped at max_evaluations
+
+
+class _Evaluator:
+    def __init__(self, draws: CommonDraws, options: Dict[int, MitigationOption], objective: str):
+        self.draws = draws
+        self.options = options
+        self.objective = objective
+        self.evaluated: Dict[FrozenSet[int], Portfolio] = {}
+        baseline = draws.baseline
+        self.baseline = Portfolio((), 0.0, float(np.mean(baseline)), tail_value_at_risk(baseline))
+
+    def __call__(self, selected: FrozenSet[int]) -> Portfolio:
+        portfolio = self.evaluated.get(selected)
+        if portfolio is None:
+            losses = self.draws.losses(selected)
+            el, tvar = float(np.mean(losses)), tail_value_at_risk(losses)
+            portfolio = Portfolio(
+                mitigation_ids=tuple(sorted(selected)),
+                cost=sum(self.options[m].cost for m in selected),
+                expected_loss=el,
+                tvar_95=tvar,
+                expected_loss_reduction=self.baseline.expected_loss - el,
+                tvar_95_reduction=self.baseline.tvar_95 - tvar,
+            )
+            self.evaluated[selected] = portfolio
+        return portfolio
+
+    def value(self, selected: FrozenSet[int]) -> float:
+        return self(selected).reduction(self.objective)
+
+
+def _efficiency(gain: float, cost: float) -> float:
+    if cost <= 0:
+        return math.inf if gain > 0 else 0.0
+    return gain / cost
+
+
+def optimize_portfolio(
+    draws: CommonDraws,
+    options: List[MitigationOption],
+    budget: Optional[float] = None,
+    objective: str = "expected_loss",
+    max_evaluations: int = 20_000,
+) -> PortfolioResult:
+    """Find the subset of ``options`` with the largest reduction costing at most ``budget``."""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; choose from {', '.join(OBJECTIVES)}")
+    effective = set(draws.mitigation_ids())
+    candidates = {o.mitigation_id: o for o in options if o.mitigation_id in effective}
+    evaluate = _Evaluator(draws, candidates, objective)
+    limit = math.inf if budget is None else budget
+
+    # Standalone gains: the bound for branch-and-bound and the greedy start
+    single = {m: evaluate.value(frozenset([m])) for m in candidates}
+
+    # Greedy path: add the best marginal reduction per unit cost until all are in
+    chosen: FrozenSet[int] = frozenset()
+    best = evaluate.baseline
+    while len(chosen) < len(candidates):
+        current = evaluate.value(chosen)
+        step = max(
+            (m for m in candidates if m not in chosen),
+            key=lambda m: (_efficiency(evaluate.value(chosen | {m}) - current, candidates[m].cost), -candidates[m].cost),
+        )
+        chosen = chosen | {step}
+        if evaluate(chosen).cost <= limit and evaluate.value(chosen) > best.reduction(objective):
+            best = evaluate(chosen)
+    for m in candidates:
+        if candidates[m].cost <= limit and single[m] > best.reduction(objective):
+            best = evaluate(frozenset([m]))
+
+    # Branch-and-bound over items in order of standalone efficiency
+    order = sorted(candidates, key=lambda m: _efficiency(single[m], candidates[m].cost), reverse=True)
+    exhaustive = True
+
+    def bound(selected: FrozenSet[int], start: int, remaining: float) -> float:
+        value = evaluate.value(selected)
+        for m in order[start:]:
+            gain, cost = max(single[m], 0.0), candidates[m].cost
+            if cost <= remaining:
+                value += gain
+                remaining -= cost
+            else:
+                return value + gain * remaining / cost
+        return value
+
+    def search(selected: FrozenSet[int], start: int, cost: float) -> None:
+        nonlocal best, exhaustive
+        if len(evaluate.evaluated) >= max_evaluations:
+            exhaustive = False
+            return
+        portfolio = evaluate(selected)
+        if portfolio.reduction(objective) > best.reduction(objective):
+            best = portfolio
+        if start >= len(order) or bound(selected, start, limit - cost) <= best.reduction(objective):
+            return
+        m = order[start]
+        if cost + candidates[m].cost <= limit:
+            search(selected | {m}, start + 1, cost + candidates[m].cost)
+        search(selected, start + 1, cost)
+
+    if sum(o.cost for o in candidates.values()) <= limit:
+        # Everything is affordable, and mitigations only reduce losses
+        best = evaluate(frozenset(candidates))
+    else:
+        search(frozenset(), 0, 0.0)
+
+    frontier: List[Portfolio] = []
+    for portfolio in sorted(evaluate.evaluated.values(), key=lambda p: (p.cost, -p.reduction(objective))):
+        if not frontier or portfolio.reduction(objective) > frontier[-1].reduction(objective):
+            frontier.append(portfolio)
+
+    return PortfolioResult(
+        objective=objective,
+        budget=budget,
+        baseline=evaluate.baseline,
+        best=best,
+        frontier=frontier,
+        evaluations=len(evaluate.evaluated),
+        exhaustive=exhaustive,
+    )
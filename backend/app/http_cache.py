@@ -0,0 +1,45 @@
+"""Conditional GET support: version tokens (ETags) and 304 Not Modified responses.
+
+Read endpoints compute a cheap version token from row ids and timestamps
+*before* loading and serializing the full payload, so a client that already
+holds the current version costs one narrow query and no serialization.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Browsers may only reuse a stored response after revalidating it with us.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the parts that identify a resource version.
+
+    Weak because the same version may be sent gzip-compressed or not.
+    """
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return any(tag == opaque for tag in candidates)
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already has ``etag``.
+
+    Otherwise attach the validator headers to ``response`` and return None
+    so the endpoint carries on building the full body.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,9 +1,16 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.config import settings
-from app.database import engine, Base
-from app.models import *  # noqa: F401,F403 — ensure all models are registered
+from app.database import engine, async_engine
+from app import migrations
+from app.models import *  # noqa: F401,F403 — ensure all models are mapped
+from app.observability import ObservabilityMiddleware, instrument_engine
+from app.responses import FastJSONResponse
 from app.routers import (
     engagements,
     parties,
@@ -14,9 +21,44 @@ from app.routers import (
     quantification,
     dashboard,
     ai_generation,
+    metrics,
 )
+from app.services.simulation_executor import shutdown_simulation_executor
+
+
+logger = logging.getLogger(__name__)
+
 
-app = FastAPI(title="Contract Risk Quantification Platform", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is migrated at deploy (python -m app.migrations upgrade);
+    # AUTO_MIGRATE applies pending migrations here instead, by default for
+    # SQLite only. A server never starts on a schema that is behind.
+    auto_migrate = settings.AUTO_MIGRATE
+    if auto_migrate is None:
+        auto_migrate = engine.dialect.name == "sqlite"
+    if auto_migrate:
+        applied = migrations.upgrade(engine)
+        if applied:
+            logger.info("Applied schema migrations %s", applied)
+    else:
+        todo = migrations.pending(engine)
+        if todo:
+            raise RuntimeError(
+                f"Database schema is {len(todo)} migration(s) behind; "
+                "run `python -m app.migrations upgrade` before starting the server"
+            )
+    yield
+    shutdown_simulation_executor()
+    await async_engine.dispose()
+
+
+app = FastAPI(
+    title="Contract Risk Quantification Platform",
+    version="0.1.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,8 +67,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+# Outermost, so timings include compression and CORS handling
+app.add_middleware(ObservabilityMiddleware)
 
-Base.metadata.create_all(bind=engine)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 
 app.include_router(engagements.router)
 app.include_router(parties.router)
@@ -37,6 +83,8 @@ app.include_router(mitigations.router)
 app.include_router(quantification.router)
 app.include_router(dashboard.router)
 app.include_router(ai_generation.router)
+app.include_router(ai_generation.stats_router)
+app.include_router(metrics.router)
 
 
 @app.get("/api/health")
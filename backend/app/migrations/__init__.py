@@ -0,0 +1,81 @@
+"""Versioned schema migrations, applied explicitly at deploy time.
+
+Each migration is a module here with ``VERSION``, ``DESCRIPTION`` and
+``upgrade(conn)``, listed in ``MIGRATIONS``. Applied versions are recorded
+in ``schema_migrations``; ``upgrade`` runs the pending ones in order, each in
+its own transaction together with its version row.
+
+Run ``python -m app.migrations upgrade`` once per deploy. ``AUTO_MIGRATE``
+applies pending migrations at startup instead; it defaults to on for SQLite,
+the development database, and otherwise startup fails while any are
+pending. ``0001_baseline`` creates any missing tables, so databases created
+before migrations existed are adopted by upgrading them.
+"""
+
+import importlib
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS = [
+    "app.migrations.m0001_baseline",
+    "app.migrations.m0002_run_profiling",
+    "app.migrations.m0003_mitigation_contributions",
+]
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def migrations() -> list[ModuleType]:
+    modules = [importlib.import_module(name) for name in MIGRATIONS]
+    versions = [m.VERSION for m in modules]
+    if versions != sorted(set(versions)):
+        raise RuntimeError(f"Migration versions must be unique and increasing: {versions}")
+    return modules
+
+
+def head() -> int:
+    return migrations()[-1].VERSION
+
+
+def current_version(conn: Connection) -> int:
+    """Highest applied version; 0 for a database that has never been migrated."""
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    versions = conn.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def pending(engine: Engine) -> list[ModuleType]:
+    with engine.connect() as conn:
+        version = current_version(conn)
+    return [m for m in migrations() if m.VERSION > version]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> list[int]:
+    """Apply pending migrations up to ``target`` (default: all); return the versions applied."""
+    applied = []
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+    for migration in pending(engine):
+        if target is not None and migration.VERSION > target:
+            break
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.VERSION,
+                description=migration.DESCRIPTION,
+                applied_at=datetime.now(timezone.utc),
+            ))
+        applied.append(migration.VERSION)
+    return applied
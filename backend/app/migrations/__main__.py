@@ -0,0 +1,36 @@
+"""Command line: ``python -m app.migrations [upgrade|current|pending]``."""
+
+import argparse
+import sys
+
+from app.config import settings
+from app.database import create_db_engine
+from app.migrations import current_version, head, pending, upgrade
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Apply schema migrations.")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "current", "pending"])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--target", type=int, help="upgrade: stop at this version")
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.database_url)
+    try:
+        if args.command == "upgrade":
+            applied = upgrade(engine, args.target)
+            print(f"Applied {', '.join(map(str, applied))}" if applied else "Already up to date")
+        elif args.command == "current":
+            with engine.connect() as conn:
+                print(f"{current_version(conn)} (head {head()})")
+        else:
+            todo = pending(engine)
+            for migration in todo:
+                print(f"{migration.VERSION:04d} {migration.DESCRIPTION}")
+            sys.exit(1 if todo else 0)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
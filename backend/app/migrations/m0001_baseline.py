@@ -0,0 +1,193 @@
+"""Create the application tables that do not exist yet.
+
+Databases created by the former ``create_all`` at import already have most
+tables; this adds whatever is missing and leaves existing tables as they are.
+
+The tables are a frozen copy of the schema as of this migration, not the
+models: model changes after it are new migrations, and the baseline must
+create the same tables no matter which release runs it.
+"""
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+)
+from sqlalchemy.engine import Connection
+
+VERSION = 1
+DESCRIPTION = "baseline schema"
+
+metadata = MetaData()
+
+Table(
+    "engagements",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("description", String),
+    Column("contract_value", Float),
+    Column("currency", String),
+    Column("industry", String),
+    Column("status", Enum("DRAFT", "IN_PROGRESS", "COMPLETE", "ARCHIVED", name="engagementstatus")),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "dashboard_snapshots",
+    metadata,
+    Column("engagement_id", Integer, ForeignKey("engagements.id"), primary_key=True),
+    Column("etag", String, nullable=False),
+    Column("payload", JSON, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "goods_services",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("engagement_id", Integer, ForeignKey("engagements.id"), nullable=False),
+    Column("name", String, nullable=False),
+    Column("category", String),
+    Column("description", String),
+    Column("use_context", String),
+    Column("supply_type", Enum("GOODS", "SERVICES", "MIXED", name="supplytype")),
+    Column(
+        "replaceability",
+        Enum("EASILY_REPLACEABLE", "REPLACEABLE", "DIFFICULT", "IRREPLACEABLE", name="replaceability"),
+    ),
+)
+
+Table(
+    "mitigations",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("engagement_id", Integer, ForeignKey("engagements.id"), nullable=False),
+    Column("name", String, nullable=False),
+    Column("description", String),
+    Column("mitigation_type", String),
+    Column("cost", Float),
+)
+
+Table(
+    "parties",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("engagement_id", Integer, ForeignKey("engagements.id"), nullable=False),
+    Column("name", String, nullable=False),
+    Column("role", Enum("BUYER", "SUPPLIER", "THIRD_PARTY", "END_USER", name="partyrole"), nullable=False),
+    Column("revenue", Float),
+    Column("criticality", String),
+    Column("description", String),
+)
+
+Table(
+    "quantification_runs",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("engagement_id", Integer, ForeignKey("engagements.id"), nullable=False),
+    Column("num_simulations", Integer),
+    Column("is_mitigated", Boolean),
+    Column("total_expected_loss", Float),
+    Column("total_var_95", Float),
+    Column("total_tvar_95", Float),
+    Column("total_var_99", Float),
+    Column("risk_asymmetry_ratio", Float),
+    Column("histogram_bins", JSON),
+    Column("histogram_counts", JSON),
+    Column("timings", JSON),
+    Column("peak_memory_bytes", Integer),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "failure_modes",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("engagement_id", Integer, ForeignKey("engagements.id"), nullable=False),
+    Column("goods_service_id", Integer, ForeignKey("goods_services.id")),
+    Column("name", String, nullable=False),
+    Column("description", String),
+    Column("category", String),
+    Column("frequency_low", Float),
+    Column("frequency_mid", Float),
+    Column("frequency_high", Float),
+    Column("detection", String),
+    Column("source", Enum("MANUAL", "AI", name="failuremodesource")),
+    Column("confidence", Float),
+    Column("is_included", Boolean),
+)
+
+Table(
+    "quantification_results",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("run_id", Integer, ForeignKey("quantification_runs.id"), nullable=False),
+    Column("failure_mode_id", Integer),
+    Column("loss_scenario_id", Integer),
+    Column("party_id", Integer),
+    Column("label", String),
+    Column("expected_loss", Float),
+    Column("var_95", Float),
+    Column("tvar_95", Float),
+    Column("var_99", Float),
+    Column("p5", Float),
+    Column("p25", Float),
+    Column("p50", Float),
+    Column("p75", Float),
+    Column("p95", Float),
+    Column("p99", Float),
+    Column("histogram_bins", JSON),
+    Column("histogram_counts", JSON),
+)
+
+Table(
+    "quantification_run_artifacts",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("run_id", Integer, ForeignKey("quantification_runs.id"), nullable=False, index=True),
+    Column("name", String, nullable=False),
+    Column("media_type", String, nullable=False),
+    Column("content", LargeBinary, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "failure_mode_mitigations",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("failure_mode_id", Integer, ForeignKey("failure_modes.id"), nullable=False),
+    Column("mitigation_id", Integer, ForeignKey("mitigations.id"), nullable=False),
+    Column("frequency_reduction", Float),
+    Column("severity_reduction", Float),
+)
+
+Table(
+    "loss_scenarios",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("failure_mode_id", Integer, ForeignKey("failure_modes.id"), nullable=False),
+    Column("affected_party_id", Integer, ForeignKey("parties.id"), nullable=False),
+    Column("name", String),
+    Column("loss_category", String),
+    Column("description", String),
+    Column("severity", Enum("LOW", "MEDIUM", "HIGH", "CATASTROPHIC", name="severitylevel")),
+    Column("severity_low", Float),
+    Column("severity_mid", Float),
+    Column("severity_high", Float),
+    Column("distribution_type", Enum("LOGNORMAL", "TRIANGULAR", "UNIFORM", name="distributiontype")),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,23 @@
+"""Add per-stage timings and peak memory to quantification runs.
+
+The columns came with run profiling, before versioned migrations existed;
+only databases created before then lack them, since the baseline includes
+them. Existing runs get NULL in both, as for unprofiled runs.
+"""
+
+from sqlalchemy import JSON, Integer, inspect
+from sqlalchemy.engine import Connection
+
+VERSION = 2
+DESCRIPTION = "quantification_runs.timings and peak_memory_bytes"
+
+COLUMNS = {"timings": JSON(), "peak_memory_bytes": Integer()}
+
+
+def upgrade(conn: Connection) -> None:
+    existing = {c["name"] for c in inspect(conn).get_columns("quantification_runs")}
+    for name, type_ in COLUMNS.items():
+        if name not in existing:
+            conn.exec_driver_sql(
+                f"ALTER TABLE quantification_runs ADD COLUMN {name} {type_.compile(dialect=conn.dialect)}"
+            )
@@ -0,0 +1,15 @@
+"""Add per-mitigation contributions to quantification runs."""
+
+from sqlalchemy import JSON, inspect
+from sqlalchemy.engine import Connection
+
+VERSION = 3
+DESCRIPTION = "quantification_runs.mitigation_contributions"
+
+
+def upgrade(conn: Connection) -> None:
+    existing = {c["name"] for c in inspect(conn).get_columns("quantification_runs")}
+    if "mitigation_contributions" not in existing:
+        conn.exec_driver_sql(
+            f"ALTER TABLE quantification_runs ADD COLUMN mitigation_contributions {JSON().compile(dialect=conn.dialect)}"
+        )
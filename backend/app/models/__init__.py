@@ -4,7 +4,8 @@ from app.models.goods_service import GoodsService, SupplyType, Replaceability
 from app.models.failure_mode import FailureMode, FrequencyLevel, FailureModeSource
 from app.models.loss_scenario import LossScenario, SeverityLevel, DistributionType
 from app.models.mitigation import Mitigation, FailureModeMitigation
-from app.models.quantification import QuantificationRun, QuantificationResult
+from app.models.quantification import QuantificationRun, QuantificationResult, QuantificationRunArtifact
+from app.models.dashboard_snapshot import DashboardSnapshot
 
 __all__ = [
     "Engagement", "EngagementStatus",
@@ -13,5 +14,6 @@ __all__ = [
     "FailureMode", "FrequencyLevel", "FailureModeSource",
     "LossScenario", "SeverityLevel", "DistributionType",
     "Mitigation", "FailureModeMitigation",
-    "QuantificationRun", "QuantificationResult",
+    "QuantificationRun", "QuantificationResult", "QuantificationRunArtifact",
+    "DashboardSnapshot",
 ]
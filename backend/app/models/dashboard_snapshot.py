@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+
+from app.database import Base
+
+
+class DashboardSnapshot(Base):
+    """Materialized dashboard payload for an engagement.
+
+    Written when a quantification run finishes and deleted whenever data the
+    dashboard depends on (parties, mitigations, engagement details) changes.
+    """
+    __tablename__ = "dashboard_snapshots"
+
+    engagement_id = Column(Integer, ForeignKey("engagements.id"), primary_key=True)
+    etag = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    engagement = relationship("Engagement", back_populates="dashboard_snapshot")
@@ -30,3 +30,4 @@ class Engagement(Base):
     goods_services = relationship("GoodsService", back_populates="engagement", cascade="all, delete-orphan")
     failure_modes = relationship("FailureMode", back_populates="engagement", cascade="all, delete-orphan")
     quantification_runs = relationship("QuantificationRun", back_populates="engagement", cascade="all, delete-orphan")
+    dashboard_snapshot = relationship("DashboardSnapshot", back_populates="engagement", uselist=False, cascade="all, delete-orphan")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, JSON, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 
@@ -19,10 +19,17 @@ class QuantificationRun(Base):
     risk_asymmetry_ratio = Column(Float, default=0.0)
     histogram_bins = Column(JSON, default=list)
     histogram_counts = Column(JSON, default=list)
+    # Per-stage seconds and slowest failure modes; see services/run_profile.py
+    timings = Column(JSON, nullable=True)
+    peak_memory_bytes = Column(Integer, nullable=True)
+    # Mitigated runs: add-one and leave-one-out reductions per mitigation;
+    # see engine/portfolio.py
+    mitigation_contributions = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     engagement = relationship("Engagement", back_populates="quantification_runs")
     results = relationship("QuantificationResult", back_populates="run", cascade="all, delete-orphan")
+    artifacts = relationship("QuantificationRunArtifact", back_populates="run", cascade="all, delete-orphan")
 
 
 class QuantificationResult(Base):
@@ -48,3 +55,17 @@ class QuantificationResult(Base):
     histogram_counts = Column(JSON, default=list)
 
     run = relationship("QuantificationRun", back_populates="results")
+
+
+class QuantificationRunArtifact(Base):
+    """Diagnostic output captured while simulating a run, e.g. a profile."""
+    __tablename__ = "quantification_run_artifacts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("quantification_runs.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    media_type = Column(String, nullable=False)
+    content = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    run = relationship("QuantificationRun", back_populates="artifacts")
@@ -0,0 +1,16 @@
+"""Metrics, request timing and database instrumentation."""
+
+from app.observability.db import instrument_engine
+from app.observability.instruments import record_simulation, registry
+from app.observability.metrics import CONTENT_TYPE
+from app.observability.middleware import ObservabilityMiddleware, add_timing, current_timings
+
+__all__ = [
+    "CONTENT_TYPE",
+    "ObservabilityMiddleware",
+    "add_timing",
+    "current_timings",
+    "instrument_engine",
+    "record_simulation",
+    "registry",
+]
@@ -0,0 +1,49 @@
+"""SQLAlchemy hooks counting and timing every statement.
+
+Statements are labelled by their leading keyword (``SELECT``, ``INSERT``, …)
+and also added to the current request's ``Server-Timing`` ``db`` entry and,
+when one is open, to a query inspection (see ``queries``).
+"""
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.observability import queries
+from app.observability.instruments import db_queries, db_query_duration
+from app.observability.middleware import current_timings
+
+_START = "observability_query_start"
+
+
+def statement_operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_START)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    operation = statement_operation(statement)
+    db_queries.inc(operation=operation)
+    db_query_duration.observe(elapsed, operation=operation)
+    timings = current_timings()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_seconds += elapsed
+    if queries.active():
+        queries.record(statement, elapsed)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record metrics for ``engine``; pass ``async_engine.sync_engine`` for async engines."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,76 @@
+"""The application's metrics, registered for ``GET /metrics``."""
+
+from app.observability.metrics import DB_BUCKETS, Counter, Gauge, Histogram, Registry
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "crp_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"),
+))
+http_request_duration = registry.register(Histogram(
+    "crp_http_request_duration_seconds", "Time to the end of the response body.", ("method", "route"),
+))
+http_in_flight = registry.register(Gauge("crp_http_requests_in_flight", "HTTP requests being handled."))
+
+db_queries = registry.register(Counter("crp_db_queries_total", "SQL statements executed.", ("operation",)))
+db_query_duration = registry.register(Histogram(
+    "crp_db_query_duration_seconds", "SQL statement execution time.", ("operation",), buckets=DB_BUCKETS,
+))
+
+simulation_trials = registry.register(Counter(
+    "crp_simulation_trials_total", "Monte Carlo trials simulated (one pass yields both runs of a quantification)."
+))
+simulation_seconds = registry.register(Counter(
+    "crp_simulation_seconds_total", "Wall-clock seconds spent simulating."
+))
+simulation_trials_per_second = registry.register(Gauge(
+    "crp_simulation_trials_per_second", "Throughput of the most recent simulation."
+))
+
+
+def _queue_depth():
+    from app.services.simulation_executor import queue_depth
+    return {(): queue_depth()}
+
+
+registry.register(Gauge(
+    "crp_simulation_queue_depth", "Simulations running or waiting for a worker.", collect=_queue_depth,
+))
+
+dashboard_cache = registry.register(Counter(
+    "crp_dashboard_cache_lookups_total",
+    "Dashboard reads by source: in-memory copy, stored snapshot, or rebuilt from runs.",
+    ("result",),
+))
+
+
+# The LLM cache collectors only read a cache that exists: a scrape must not
+# create it (and, with LLM_CACHE_PATH set, open its file)
+def _llm_cache_lookups():
+    from app.services.llm_cache import existing_llm_cache
+    cache = existing_llm_cache()
+    if cache is None:
+        return {}
+    stats = cache.stats()
+    return {(name,): stats[key] for name, key in (("memory_hit", "memory_hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))}
+
+
+def _llm_cache_hit_ratio():
+    from app.services.llm_cache import existing_llm_cache
+    cache = existing_llm_cache()
+    return {(): cache.stats()["hit_rate"]} if cache is not None else {}
+
+
+registry.register(Counter(
+    "crp_llm_cache_lookups_total", "LLM response cache lookups by result.", ("result",), collect=_llm_cache_lookups,
+))
+registry.register(Gauge(
+    "crp_llm_cache_hit_ratio", "Share of LLM cache lookups served from the cache.", collect=_llm_cache_hit_ratio,
+))
+
+
+def record_simulation(trials: int, seconds: float) -> None:
+    simulation_trials.inc(trials)
+    simulation_seconds.inc(seconds)
+    if seconds > 0:
+        simulation_trials_per_second.set(trials / seconds)
@@ -0,0 +1,100 @@
+"""Request timing: latency metrics per route template and Server-Timing headers.
+
+``ObservabilityMiddleware`` is plain ASGI, so streamed responses pass through
+unbuffered. Each request gets a ``RequestTimings`` in a context variable; the
+database hooks and handlers add to it (``add_timing``), and its entries are
+sent in the ``Server-Timing`` header, which browser devtools show per request.
+Threadpool workers share the request's object, since the context is copied
+by reference.
+"""
+
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.observability import queries
+from app.observability.instruments import http_in_flight, http_request_duration, http_requests
+
+# Requests that match no route share one label, so scanners cannot create
+# unbounded series
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class RequestTimings:
+    start: float = field(default_factory=time.perf_counter)
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    entries: list[tuple[str, float, Optional[str]]] = field(default_factory=list)
+
+    def header(self) -> str:
+        metrics = [("app", time.perf_counter() - self.start, None)]
+        if self.db_queries:
+            metrics.append(("db", self.db_seconds, f"{self.db_queries} queries"))
+        metrics.extend(self.entries)
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.1f}" + (f';desc="{desc}"' if desc else "")
+            for name, seconds, desc in metrics
+        )
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+def add_timing(name: str, seconds: float, description: Optional[str] = None) -> None:
+    """Add a ``Server-Timing`` entry to the current request, if any."""
+    timings = _current.get()
+    if timings is not None:
+        timings.entries.append((name, seconds, description))
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class ObservabilityMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", timings.header())
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            with ExitStack() as stack:
+                if settings.QUERY_INSPECTOR_ENABLED:
+                    # Labelled lazily: the route is only known once matched
+                    inspection = stack.enter_context(queries.inspect_request(scope["path"]))
+                    stack.callback(lambda: setattr(inspection, "label", f"{scope['method']} {route_template(scope)}"))
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            http_in_flight.dec()
+            _current.reset(token)
+            route, method = route_template(scope), scope["method"]
+            http_requests.inc(method=method, route=route, status=str(status))
+            http_request_duration.observe(time.perf_counter() - timings.start, method=method, route=route)
@@ -0,0 +1,164 @@
+"""Opt-in SQL inspection: statements per request, slow queries and N+1 shapes.
+
+With ``QUERY_INSPECTOR_ENABLED`` the middleware opens a ``QueryInspection``
+for every request. Each statement is reduced to its shape (bound parameters
+are already placeholders; ``IN`` lists are collapsed), and when the request
+ends a warning is logged for every shape run ``QUERY_REPEAT_THRESHOLD`` or
+more times — the signature of a lazy relationship loaded in a loop — along
+with the application line that first issued it. Statements slower than
+``QUERY_SLOW_THRESHOLD_MS`` are logged as they finish, with their call site.
+
+Tests use ``query_budget``, which inspects every statement issued while the
+block runs, on any thread::
+
+    with query_budget(6):
+        client.get(f"/api/engagements/{eid}/failure-modes/")
+
+Finding call sites walks the stack, so it is done once per shape and for slow
+statements only; still, this is meant for development and staging.
+"""
+
+import logging
+import os
+import re
+import threading
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_OBSERVABILITY_DIR = os.path.dirname(os.path.abspath(__file__))
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)|\((?:\s*%\(\w+\)s\s*,)+\s*%\(\w+\)s\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """More statements ran than a ``query_budget`` allows."""
+
+
+def statement_shape(statement: str) -> str:
+    """``statement`` with whitespace normalized and ``IN (?, ?, …)`` collapsed."""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def call_site() -> Optional[str]:
+    """``path:line in function`` of the innermost application frame, if any."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(_APP_DIR) and not filename.startswith(_OBSERVABILITY_DIR):
+            return f"{os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{frame.lineno} in {frame.name}"
+    return None
+
+
+@dataclass
+class QueryInspection:
+    label: str = ""
+    count: int = 0
+    seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    sites: dict[str, Optional[str]] = field(default_factory=dict)
+    slow: list[tuple[str, float, Optional[str]]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, statement: str, seconds: float, site: Optional[str] = None) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[shape] += 1
+            if shape not in self.sites:
+                self.sites[shape] = site or call_site()
+            if seconds * 1000 >= settings.QUERY_SLOW_THRESHOLD_MS:
+                self.slow.append((shape, seconds, site or call_site()))
+
+    def repeated(self, threshold: Optional[int] = None) -> list[tuple[str, int, Optional[str]]]:
+        """Shapes run at least ``threshold`` times: ``(shape, count, first call site)``."""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        return [(shape, n, self.sites.get(shape)) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} statements in {self.seconds * 1000:.1f} ms{f' for {self.label}' if self.label else ''}"]
+        for shape, n in self.shapes.most_common():
+            lines.append(f"  {n:>4} x {shape[:200]}  [{self.sites.get(shape) or '?'}]")
+        return "\n".join(lines)
+
+
+_request_inspection: ContextVar[Optional[QueryInspection]] = ContextVar("query_inspection", default=None)
+_global_inspections: list[QueryInspection] = []
+_global_lock = threading.Lock()
+
+
+def active() -> bool:
+    return bool(_global_inspections) or _request_inspection.get() is not None
+
+
+def record(statement: str, seconds: float) -> None:
+    """Feed a finished statement to the inspections that should see it."""
+    inspections = list(_global_inspections)
+    current = _request_inspection.get()
+    if current is not None:
+        inspections.append(current)
+    if not inspections:
+        return
+    site = None
+    if seconds * 1000 >= settings.QUERY_SLOW_THRESHOLD_MS:
+        site = call_site()
+        logger.warning("Slow query (%.1f ms) at %s: %s", seconds * 1000, site or "?", statement_shape(statement)[:500])
+    for inspection in inspections:
+        inspection.record(statement, seconds, site)
+
+
+@contextmanager
+def inspect_request(label: str) -> Iterator[QueryInspection]:
+    """Inspect the statements of the current request and log N+1 shapes at the end."""
+    inspection = QueryInspection(label=label)
+    token = _request_inspection.set(inspection)
+    try:
+        yield inspection
+    finally:
+        _request_inspection.reset(token)
+        for shape, n, site in inspection.repeated():
+            logger.warning(
+                "%s ran the same statement %d times (N+1?), first at %s: %s",
+                inspection.label, n, site or "?", shape[:500],
+            )
+
+
+@contextmanager
+def inspect_queries(label: str = "") -> Iterator[QueryInspection]:
+    """Inspect every statement issued in this process while the block runs."""
+    inspection = QueryInspection(label=label)
+    with _global_lock:
+        _global_inspections.append(inspection)
+    try:
+        yield inspection
+    finally:
+        with _global_lock:
+            _global_inspections.remove(inspection)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None, label: str = "") -> Iterator[QueryInspection]:
+    """Fail with ``QueryBudgetExceeded`` if the block runs more than ``max_queries`` statements.
+
+    ``max_repeats`` additionally caps how often any single statement shape
+    may run, which catches N+1 loops that stay under the total budget on
+    small fixtures.
+    """
+    with inspect_queries(label) as inspection:
+        yield inspection
+    if inspection.count > max_queries:
+        raise QueryBudgetExceeded(f"Query budget of {max_queries} exceeded\n{inspection.report()}")
+    if max_repeats is not None:
+        worst = inspection.shapes.most_common(1)
+        if worst and worst[0][1] > max_repeats:
+            raise QueryBudgetExceeded(
+                f"A statement ran {worst[0][1]} times (limit {max_repeats})\n{inspection.report()}"
+            )
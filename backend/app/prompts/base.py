@@ -0,0 +1,81 @@
+"""Prompt structure shared by the builders, and token budgeting.
+
+Every prompt is a stable prefix (role, instructions, taxonomies, output
+format) followed by a suffix holding the engagement data. The prefix is
+byte-identical across calls of one kind, so once it reaches the model's
+cacheable minimum (``AI_PROMPT_CACHE_MIN_TOKENS``) it is marked for provider
+prompt caching and repeat calls read it from the cache. The current prefixes
+are all shorter than that, so they are sent as ordinary input and carry no
+cache breakpoint.
+
+The suffix is kept within ``AI_PROMPT_TOKEN_BUDGET`` tokens: long free-text
+fields are clipped, and lists that would overflow keep their most important
+entries and summarize the rest in one line.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from app.config import settings
+
+# Rough characters per token for English prose; used only for budgeting
+CHARS_PER_TOKEN = 4
+# Longest description embedded verbatim in a prompt
+MAX_DESCRIPTION_CHARS = 600
+
+
+@dataclass(frozen=True)
+class Prompt:
+    prefix: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        """The prompt as one string; what the model reads."""
+        return f"{self.prefix}\n\n{self.suffix}"
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether the prefix is long enough for the model to cache."""
+        return estimate_tokens(self.prefix) >= settings.AI_PROMPT_CACHE_MIN_TOKENS
+
+    def content(self) -> list[dict[str, Any]]:
+        """Message content blocks, with a cache breakpoint after a cacheable prefix."""
+        prefix: dict[str, Any] = {"type": "text", "text": self.prefix}
+        if self.cacheable:
+            prefix["cache_control"] = {"type": "ephemeral"}
+        return [prefix, {"type": "text", "text": self.suffix}]
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def token_budget(budget: int | None = None) -> int:
+    return settings.AI_PROMPT_TOKEN_BUDGET if budget is None else budget
+
+
+def clip(text: str | None, max_chars: int = MAX_DESCRIPTION_CHARS) -> str:
+    """Shorten ``text`` to ``max_chars``, cutting at a word boundary."""
+    text = (text or "").strip()
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0].rstrip(",.;:") + " …"
+
+
+def fit_lines(lines: Sequence[str], priority: Sequence[float], budget: int) -> list[int]:
+    """Indices of the lines to keep so that together they fit ``budget`` tokens.
+
+    Lines are admitted highest ``priority`` first; the kept indices are
+    returned in their original order so the prompt reads as it would have
+    unbudgeted. At least one line is always kept.
+    """
+    order = sorted(range(len(lines)), key=lambda i: -priority[i])
+    kept, used = [], 0
+    for i in order:
+        cost = estimate_tokens(lines[i]) + 1
+        if kept and used + cost > budget:
+            continue
+        kept.append(i)
+        used += cost
+    return sorted(kept)
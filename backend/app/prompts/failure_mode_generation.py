@@ -1,43 +1,17 @@
 """Prompt template for generating failure modes from engagement context."""
 
+from typing import Optional
+
+from app.prompts.base import Prompt, clip, estimate_tokens, fit_lines, token_budget
 from app.seed.failure_taxonomy import FAILURE_CATEGORIES
 from app.seed.loss_taxonomy import LOSS_CATEGORIES
 
+_CATEGORIES_STR = "\n".join(f"- {c}" for c in FAILURE_CATEGORIES)
+_LOSS_CATS_STR = "\n".join(f"- {c}" for c in LOSS_CATEGORIES)
 
-def build_failure_mode_prompt(
-    goods_service_name: str,
-    goods_service_description: str,
-    use_context: str,
-    supply_type: str,
-    replaceability: str,
-    industry: str,
-    contract_value: float,
-    currency: str,
-    parties: list[dict],
-) -> str:
-    categories_str = "\n".join(f"- {c}" for c in FAILURE_CATEGORIES)
-    loss_cats_str = "\n".join(f"- {c}" for c in LOSS_CATEGORIES)
-    parties_str = "\n".join(
-        f"- {p['name']} (role: {p['role']}, revenue: {p.get('revenue', 'N/A')})"
-        for p in parties
-    )
-
-    return f"""You are an expert risk analyst specializing in commercial supply relationships.
-
-Analyze the following supply relationship and generate 5-10 specific, realistic failure modes.
-
-## Supply Relationship Context
-
-**What is being supplied:** {goods_service_name}
-**Description:** {goods_service_description}
-**How it's used:** {use_context}
-**Supply type:** {supply_type}
-**Replaceability:** {replaceability}
-**Industry:** {industry}
-**Contract value:** {currency} {contract_value:,.0f}
+PREFIX = f"""You are an expert risk analyst specializing in commercial supply relationships.
 
-**Parties involved:**
-{parties_str}
+Analyze the supply relationship described at the end of this message and generate 5-10 specific, realistic failure modes.
 
 ## Instructions
 
@@ -51,10 +25,10 @@ For each failure mode, provide:
 Be specific to this actual supply relationship. Do not provide generic risk register items.
 
 ## Available failure categories:
-{categories_str}
+{_CATEGORIES_STR}
 
 ## Available loss categories:
-{loss_cats_str}
+{_LOSS_CATS_STR}
 
 ## Required JSON output format:
 
@@ -83,6 +57,45 @@ Be specific to this actual supply relationship. Do not provide generic risk regi
     }}
   ]
 }}
-```
+```"""
+
+
+def build_failure_mode_prompt(
+    goods_service_name: str,
+    goods_service_description: str,
+    use_context: str,
+    supply_type: str,
+    replaceability: str,
+    industry: str,
+    contract_value: float,
+    currency: str,
+    parties: list[dict],
+    budget: Optional[int] = None,
+) -> Prompt:
+    context = f"""## Supply Relationship Context
+
+**What is being supplied:** {goods_service_name}
+**Description:** {clip(goods_service_description)}
+**How it's used:** {clip(use_context)}
+**Supply type:** {supply_type}
+**Replaceability:** {replaceability}
+**Industry:** {industry}
+**Contract value:** {currency} {contract_value:,.0f}"""
+
+    party_lines = [
+        f"- {p['name']} (role: {p['role']}, revenue: {p.get('revenue', 'N/A')})"
+        for p in parties
+    ]
+    remaining = token_budget(budget) - estimate_tokens(context)
+    kept = fit_lines(party_lines, [p.get("revenue") or 0 for p in parties], remaining) if parties else []
+    parties_str = "\n".join(party_lines[i] for i in kept)
+    if len(kept) < len(parties):
+        parties_str += f"\n- … and {len(parties) - len(kept)} smaller parties"
+
+    suffix = f"""{context}
+
+**Parties involved:**
+{parties_str}
 
 Return ONLY valid JSON, no markdown code fences or additional text."""
+    return Prompt(PREFIX, suffix)
@@ -1,5 +1,64 @@
 """Prompt template for refining loss parameter estimates."""
 
+from app.prompts.base import Prompt, clip
+
+_CONSIDERATIONS = """Consider:
+1. Industry benchmarks and typical loss magnitudes
+2. The contract value as context for proportionality
+3. Whether the distribution shape (relationship between low/mid/high) is realistic
+4. Any missing cost components in this loss category"""
+
+PREFIX = f"""You are an expert loss quantification analyst.
+
+Refine the loss severity estimates for the scenario described at the end of this message.
+Current estimates are low (p10), mid (p50) and high (p90).
+
+## Instructions
+
+Review and refine these estimates. {_CONSIDERATIONS}
+
+Return ONLY valid JSON:
+
+```json
+{{
+  "severity_low": 5000,
+  "severity_mid": 25000,
+  "severity_high": 150000,
+  "distribution_type": "lognormal",
+  "confidence": 0.6,
+  "reasoning": "Brief explanation of the estimate basis"
+}}
+```"""
+
+BATCH_PREFIX = f"""You are an expert loss quantification analyst.
+
+Refine the loss severity estimates for each of the scenarios listed at the end of this message.
+Current estimates are low (p10), mid (p50) and high (p90).
+
+## Instructions
+
+Review and refine each scenario's estimates. {_CONSIDERATIONS}
+
+Return one estimate per scenario_id listed, as ONLY valid JSON:
+
+```json
+{{
+  "estimates": [
+    {{
+      "scenario_id": 1,
+      "severity_low": 5000,
+      "severity_mid": 25000,
+      "severity_high": 150000,
+      "distribution_type": "lognormal",
+      "confidence": 0.6,
+      "reasoning": "Brief explanation of the estimate basis"
+    }}
+  ]
+}}
+```"""
+
+_RETURN_JSON = "Return ONLY valid JSON, no markdown code fences or additional text."
+
 
 def build_loss_estimation_prompt(
     failure_mode_name: str,
@@ -13,14 +72,10 @@ def build_loss_estimation_prompt(
     current_low: float,
     current_mid: float,
     current_high: float,
-) -> str:
-    return f"""You are an expert loss quantification analyst.
-
-Refine the loss severity estimates for the following scenario.
-
-## Context
+) -> Prompt:
+    suffix = f"""## Context
 **Failure mode:** {failure_mode_name}
-**Description:** {failure_mode_description}
+**Description:** {clip(failure_mode_description)}
 **Loss category:** {loss_category}
 **Affected party:** {affected_party_name} ({affected_party_role})
 **Industry:** {industry}
@@ -31,25 +86,43 @@ Refine the loss severity estimates for the following scenario.
 - Mid (p50): {currency} {current_mid:,.0f}
 - High (p90): {currency} {current_high:,.0f}
 
-## Instructions
+{_RETURN_JSON}"""
+    return Prompt(PREFIX, suffix)
 
-Review and refine these estimates. Consider:
-1. Industry benchmarks and typical loss magnitudes
-2. The contract value as context for proportionality
-3. Whether the distribution shape (relationship between low/mid/high) is realistic
-4. Any missing cost components in this loss category
 
-Return ONLY valid JSON:
+def build_batch_loss_estimation_prompt(
+    industry: str,
+    contract_value: float,
+    currency: str,
+    failure_modes: list[dict],
+) -> Prompt:
+    """Refine many scenarios in one call; the engagement context is stated once.
 
-```json
-{{
-  "severity_low": 5000,
-  "severity_mid": 25000,
-  "severity_high": 150000,
-  "distribution_type": "lognormal",
-  "confidence": 0.6,
-  "reasoning": "Brief explanation of the estimate basis"
-}}
-```
+    ``failure_modes`` holds ``name``, ``description`` and ``scenarios``, each
+    scenario with ``scenario_id``, ``loss_category``, ``affected_party_name``,
+    ``affected_party_role`` and ``current_low``/``current_mid``/``current_high``.
+    The number of scenarios is bounded by the caller's batch size.
+    """
+    sections = []
+    for fm in failure_modes:
+        lines = [f"### Failure mode: {fm['name']}", clip(fm["description"]), ""]
+        for s in fm["scenarios"]:
+            lines.append(
+                f"- scenario_id {s['scenario_id']}: {s['loss_category']} loss to "
+                f"{s['affected_party_name']} ({s['affected_party_role']}); current estimates "
+                f"low {currency} {s['current_low']:,.0f} / mid {currency} {s['current_mid']:,.0f} / "
+                f"high {currency} {s['current_high']:,.0f}"
+            )
+        sections.append("\n".join(lines))
+    scenarios_str = "\n\n".join(sections)
+
+    suffix = f"""## Context
+**Industry:** {industry}
+**Contract value:** {currency} {contract_value:,.0f}
+
+## Scenarios
+
+{scenarios_str}
 
-Return ONLY valid JSON, no markdown code fences or additional text."""
+{_RETURN_JSON}"""
+    return Prompt(BATCH_PREFIX, suffix)
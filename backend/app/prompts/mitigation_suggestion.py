@@ -1,34 +1,19 @@
 """Prompt template for suggesting mitigations."""
 
-from app.seed.mitigation_taxonomy import MITIGATION_TYPES
-
+from collections import Counter
+from typing import Optional
 
-def build_mitigation_prompt(
-    failure_modes: list[dict],
-    industry: str,
-    contract_value: float,
-    currency: str,
-) -> str:
-    mit_types_str = "\n".join(f"- {m}" for m in MITIGATION_TYPES)
-    fm_str = "\n".join(
-        f"- **{fm['name']}** (category: {fm['category']}, "
-        f"freq_mid: {fm['frequency_mid']}/yr, "
-        f"EL est: {currency} {fm.get('expected_loss_est', 'N/A')}): "
-        f"{fm['description']}"
-        for fm in failure_modes
-    )
+from app.prompts.base import Prompt, clip, estimate_tokens, fit_lines, token_budget
+from app.seed.mitigation_taxonomy import MITIGATION_TYPES
 
-    return f"""You are an expert in operational risk mitigation for commercial supply relationships.
+_MIT_TYPES_STR = "\n".join(f"- {m}" for m in MITIGATION_TYPES)
 
-## Context
-**Industry:** {industry}
-**Contract value:** {currency} {contract_value:,.0f}
+PREFIX = f"""You are an expert in operational risk mitigation for commercial supply relationships.
 
-## Failure modes to mitigate:
-{fm_str}
+The engagement context and the failure modes to mitigate are given at the end of this message.
 
 ## Available mitigation types:
-{mit_types_str}
+{_MIT_TYPES_STR}
 
 ## Instructions
 
@@ -38,6 +23,8 @@ Suggest 3-7 practical operational mitigations. For each:
 3. Estimate frequency reduction factor (0 to 1) for each applicable failure mode
 4. Estimate severity reduction factor (0 to 1) for each applicable failure mode
 
+Use failure mode names exactly as listed.
+
 Return ONLY valid JSON:
 
 ```json
@@ -59,6 +46,42 @@ Return ONLY valid JSON:
     }}
   ]
 }}
-```
+```"""
+
+
+def build_mitigation_prompt(
+    failure_modes: list[dict],
+    industry: str,
+    contract_value: float,
+    currency: str,
+    budget: Optional[int] = None,
+) -> Prompt:
+    context = f"""## Context
+**Industry:** {industry}
+**Contract value:** {currency} {contract_value:,.0f}"""
+
+    fm_lines = [
+        f"- **{fm['name']}** (category: {fm['category']}, "
+        f"freq_mid: {fm['frequency_mid']}/yr, "
+        f"EL est: {currency} {fm.get('expected_loss_est', 'N/A')}): "
+        f"{clip(fm['description'])}"
+        for fm in failure_modes
+    ]
+    # Failure modes that matter most are kept when the list is over budget:
+    # by estimated expected loss where known, otherwise by frequency
+    priority = [fm.get("expected_loss_est") or fm.get("frequency_mid") or 0 for fm in failure_modes]
+    kept = fit_lines(fm_lines, priority, token_budget(budget) - estimate_tokens(context))
+    fm_str = "\n".join(fm_lines[i] for i in kept)
+    if len(kept) < len(failure_modes):
+        kept_set = set(kept)
+        omitted = Counter(fm["category"] for i, fm in enumerate(failure_modes) if i not in kept_set)
+        summary = ", ".join(f"{category} ({n})" for category, n in sorted(omitted.items()))
+        fm_str += f"\n- … plus {sum(omitted.values())} less significant failure modes not listed: {summary}"
+
+    suffix = f"""{context}
+
+## Failure modes to mitigate:
+{fm_str}
 
 Return ONLY valid JSON, no markdown code fences or additional text."""
+    return Prompt(PREFIX, suffix)
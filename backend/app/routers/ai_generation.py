@@ -1,83 +1,160 @@
+from typing import Any, AsyncIterator, Optional
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_async_db
+from app.responses import EventStreamResponse, sse_event
 from app.models.engagement import Engagement
 from app.models.goods_service import GoodsService
 from app.models.failure_mode import FailureMode
 from app.models.loss_scenario import LossScenario
+from app.models.quantification import QuantificationResult, QuantificationRun
+from app.routers.dashboard import invalidates_dashboard
 from app.schemas.ai_generation import (
     GenerateFailureModesRequest,
+    BulkGenerateFailureModesRequest,
     EstimateLossesRequest,
+    BatchEstimateLossesRequest,
     SuggestMitigationsRequest,
     AIGenerationResponse,
+    BulkGenerationItem,
+    BulkGenerationResponse,
+    BatchEstimateLossesResponse,
 )
-from app.services.claude_service import ClaudeService
+from app.services.ai_metrics import ai_metrics
+from app.services.claude_service import ClaudeService, gather_limited
+from app.services.loss_estimation_service import apply_loss_estimates, estimate_losses_batch, scenario_input
+from app.services.mitigation_suggestion_service import suggest_mitigations_map_reduce
+from app.services.llm_cache import get_llm_cache
+
+router = APIRouter(prefix="/api/engagements/{engagement_id}/ai", tags=["ai_generation"], dependencies=[Depends(invalidates_dashboard)])
+stats_router = APIRouter(prefix="/api/ai", tags=["ai_generation"])
 
-router = APIRouter(prefix="/api/engagements/{engagement_id}/ai", tags=["ai_generation"])
+# Every generation endpoint accepts ``bypass_cache=true`` to skip cached
+# responses; the fresh response replaces the cached one.
 
 
-def _get_engagement(engagement_id: int, db: Session) -> Engagement:
-    engagement = db.query(Engagement).filter(Engagement.id == engagement_id).first()
+async def _get_engagement(engagement_id: int, db: AsyncSession, *relationships) -> Engagement:
+    engagement = await db.scalar(
+        select(Engagement)
+        .options(*(selectinload(rel) for rel in relationships))
+        .where(Engagement.id == engagement_id)
+    )
     if not engagement:
         raise HTTPException(status_code=404, detail="Engagement not found")
     return engagement
 
 
+def _failure_mode_prompt_args(engagement: Engagement, gs: GoodsService) -> dict:
+    parties = [
+        {"name": p.name, "role": p.role.value if hasattr(p.role, 'value') else p.role, "revenue": p.revenue}
+        for p in engagement.parties
+    ]
+    return dict(
+        goods_service_name=gs.name,
+        goods_service_description=gs.description,
+        use_context=gs.use_context,
+        supply_type=gs.supply_type.value if hasattr(gs.supply_type, 'value') else gs.supply_type,
+        replaceability=gs.replaceability.value if hasattr(gs.replaceability, 'value') else gs.replaceability,
+        industry=engagement.industry,
+        contract_value=engagement.contract_value or 0,
+        currency=engagement.currency,
+        parties=parties,
+    )
+
+
 @router.post("/generate-failure-modes", response_model=AIGenerationResponse)
-def generate_failure_modes(
+async def generate_failure_modes(
     engagement_id: int,
     data: GenerateFailureModesRequest,
-    db: Session = Depends(get_db),
+    bypass_cache: bool = False,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    engagement = _get_engagement(engagement_id, db)
-    gs = db.query(GoodsService).filter(GoodsService.id == data.goods_service_id).first()
+    engagement = await _get_engagement(engagement_id, db, Engagement.parties)
+    gs = await db.get(GoodsService, data.goods_service_id)
     if not gs:
         raise HTTPException(status_code=404, detail="Goods/Service not found")
+    prompt_args = _failure_mode_prompt_args(engagement, gs)
 
-    parties = [
-        {"name": p.name, "role": p.role.value if hasattr(p.role, 'value') else p.role, "revenue": p.revenue}
-        for p in engagement.parties
-    ]
-
-    service = ClaudeService()
+    # Don't hold a pooled connection for the duration of the Claude call
+    await db.close()
+    service = ClaudeService(
+        bypass_cache=bypass_cache, endpoint="generate-failure-modes", engagement_id=engagement_id
+    )
     try:
-        result = service.generate_failure_modes(
-            goods_service_name=gs.name,
-            goods_service_description=gs.description,
-            use_context=gs.use_context,
-            supply_type=gs.supply_type.value if hasattr(gs.supply_type, 'value') else gs.supply_type,
-            replaceability=gs.replaceability.value if hasattr(gs.replaceability, 'value') else gs.replaceability,
-            industry=engagement.industry,
-            contract_value=engagement.contract_value or 0,
-            currency=engagement.currency,
-            parties=parties,
-        )
+        result = await service.generate_failure_modes(**prompt_args)
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"Claude API error: {str(e)}")
 
     return AIGenerationResponse(data=result)
 
 
+@router.post("/generate-failure-modes/bulk", response_model=BulkGenerationResponse)
+async def bulk_generate_failure_modes(
+    engagement_id: int,
+    data: BulkGenerateFailureModesRequest = BulkGenerateFailureModesRequest(),
+    bypass_cache: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Generate failure modes for many goods/services with concurrent Claude calls.
+
+    At most ``AI_MAX_CONCURRENCY`` calls are in flight; a failed call is
+    reported in its item's ``error`` without failing the others.
+    """
+    engagement = await _get_engagement(engagement_id, db, Engagement.parties, Engagement.goods_services)
+    goods_services = sorted(engagement.goods_services, key=lambda gs: gs.id)
+    if data.goods_service_ids is not None:
+        by_id = {gs.id: gs for gs in goods_services}
+        missing = [i for i in data.goods_service_ids if i not in by_id]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Goods/Service not found: {missing}")
+        goods_services = [by_id[i] for i in data.goods_service_ids]
+    requests = [(gs.id, _failure_mode_prompt_args(engagement, gs)) for gs in goods_services]
+
+    await db.close()
+    service = ClaudeService(
+        bypass_cache=bypass_cache, endpoint="generate-failure-modes/bulk", engagement_id=engagement_id
+    )
+    outcomes = await gather_limited(
+        (service.generate_failure_modes(**prompt_args) for _, prompt_args in requests),
+        settings.AI_MAX_CONCURRENCY,
+    )
+    results = [
+        BulkGenerationItem(goods_service_id=gs_id, error=f"Claude API error: {outcome}")
+        if isinstance(outcome, BaseException)
+        else BulkGenerationItem(goods_service_id=gs_id, data=outcome)
+        for (gs_id, _), outcome in zip(requests, outcomes)
+    ]
+    return BulkGenerationResponse(results=results)
+
+
 @router.post("/estimate-losses", response_model=AIGenerationResponse)
-def estimate_losses(
+async def estimate_losses(
     engagement_id: int,
     data: EstimateLossesRequest,
-    db: Session = Depends(get_db),
+    bypass_cache: bool = False,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    engagement = _get_engagement(engagement_id, db)
-    fm = db.query(FailureMode).filter(FailureMode.id == data.failure_mode_id).first()
+    engagement = await _get_engagement(engagement_id, db)
+    fm = await db.get(FailureMode, data.failure_mode_id)
     if not fm:
         raise HTTPException(status_code=404, detail="Failure mode not found")
-    ls = db.query(LossScenario).filter(LossScenario.id == data.loss_scenario_id).first()
+    ls = await db.get(LossScenario, data.loss_scenario_id, options=[selectinload(LossScenario.affected_party)])
     if not ls:
         raise HTTPException(status_code=404, detail="Loss scenario not found")
 
     party = ls.affected_party
 
-    service = ClaudeService()
+    await db.close()
+    service = ClaudeService(
+        bypass_cache=bypass_cache, endpoint="estimate-losses", engagement_id=engagement_id
+    )
     try:
-        result = service.estimate_loss_parameters(
+        result = await service.estimate_loss_parameters(
             failure_mode_name=fm.name,
             failure_mode_description=fm.description,
             loss_category=ls.loss_category,
@@ -96,19 +173,84 @@ def estimate_losses(
     return AIGenerationResponse(data=result)
 
 
-@router.post("/suggest-mitigations", response_model=AIGenerationResponse)
-def suggest_mitigations(
+@router.post("/estimate-losses/batch", response_model=BatchEstimateLossesResponse)
+async def batch_estimate_losses(
     engagement_id: int,
-    data: SuggestMitigationsRequest,
-    db: Session = Depends(get_db),
+    data: BatchEstimateLossesRequest = BatchEstimateLossesRequest(),
+    bypass_cache: bool = False,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    engagement = _get_engagement(engagement_id, db)
+    """Estimate many loss scenarios, ``AI_ESTIMATE_BATCH_SIZE`` per Claude call.
+
+    Calls run concurrently (at most ``AI_MAX_CONCURRENCY``). With ``apply``,
+    valid estimates are written back in one bulk update; scenarios whose
+    call failed or whose estimate was rejected are listed in ``errors``.
+    """
+    engagement = await _get_engagement(engagement_id, db)
+    stmt = (
+        select(LossScenario)
+        .join(FailureMode)
+        .options(selectinload(LossScenario.failure_mode), selectinload(LossScenario.affected_party))
+        .where(FailureMode.engagement_id == engagement_id)
+    )
+    if data.loss_scenario_ids is not None:
+        stmt = stmt.where(LossScenario.id.in_(data.loss_scenario_ids))
+    scenarios = [scenario_input(ls) for ls in (await db.scalars(stmt)).all()]
+    if data.loss_scenario_ids is not None:
+        found = {s["scenario_id"] for s in scenarios}
+        missing = [i for i in data.loss_scenario_ids if i not in found]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Loss scenario not found: {missing}")
+    context = dict(
+        industry=engagement.industry,
+        contract_value=engagement.contract_value or 0,
+        currency=engagement.currency,
+    )
+
+    await db.close()
+    estimates, errors = await estimate_losses_batch(
+        ClaudeService(bypass_cache=bypass_cache, endpoint="estimate-losses/batch", engagement_id=engagement_id),
+        context,
+        scenarios,
+        batch_size=max(settings.AI_ESTIMATE_BATCH_SIZE, 1),
+        concurrency=settings.AI_MAX_CONCURRENCY,
+    )
+
+    updated = 0
+    if data.apply and estimates:
+        updated = await db.run_sync(apply_loss_estimates, estimates)
+        await db.commit()
+    return BatchEstimateLossesResponse(estimates=estimates, updated=updated, errors=errors)
+
+
+async def _expected_losses(engagement_id: int, db: AsyncSession) -> dict[int, float]:
+    """Expected loss per failure mode in the latest unmitigated run, if any."""
+    run_id = await db.scalar(
+        select(QuantificationRun.id)
+        .where(QuantificationRun.engagement_id == engagement_id, QuantificationRun.is_mitigated.is_(False))
+        .order_by(QuantificationRun.created_at.desc(), QuantificationRun.id.desc())
+        .limit(1)
+    )
+    if run_id is None:
+        return {}
+    rows = await db.execute(
+        select(QuantificationResult.failure_mode_id, QuantificationResult.expected_loss)
+        .where(QuantificationResult.run_id == run_id, QuantificationResult.failure_mode_id.isnot(None))
+    )
+    return dict(rows.all())
+
+
+async def _mitigation_prompt_args(engagement: Engagement, db: AsyncSession) -> dict:
+    # The latest run's expected losses rank failure modes when the prompt
+    # has to be truncated
+    expected_losses = await _expected_losses(engagement.id, db)
     failure_modes = [
         {
             "name": fm.name,
             "description": fm.description,
             "category": fm.category,
             "frequency_mid": fm.frequency_mid,
+            **({"expected_loss_est": round(expected_losses[fm.id])} if fm.id in expected_losses else {}),
         }
         for fm in engagement.failure_modes
         if fm.is_included
@@ -117,15 +259,108 @@ def suggest_mitigations(
     if not failure_modes:
         raise HTTPException(status_code=400, detail="No failure modes to mitigate")
 
-    service = ClaudeService()
+    return dict(
+        failure_modes=failure_modes,
+        industry=engagement.industry,
+        contract_value=engagement.contract_value or 0,
+        currency=engagement.currency,
+    )
+
+
+@router.post("/suggest-mitigations", response_model=AIGenerationResponse)
+async def suggest_mitigations(
+    engagement_id: int,
+    data: SuggestMitigationsRequest,
+    bypass_cache: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    engagement = await _get_engagement(engagement_id, db, Engagement.failure_modes)
+    prompt_args = await _mitigation_prompt_args(engagement, db)
+    chunk_size = max(settings.AI_MITIGATION_CHUNK_SIZE, 1)
+    map_reduce = data.mode == "map_reduce" or (
+        data.mode == "auto" and len(prompt_args["failure_modes"]) > chunk_size
+    )
+
+    await db.close()
+    service = ClaudeService(
+        bypass_cache=bypass_cache, endpoint="suggest-mitigations", engagement_id=engagement_id
+    )
     try:
-        result = service.suggest_mitigations(
-            failure_modes=failure_modes,
-            industry=engagement.industry,
-            contract_value=engagement.contract_value or 0,
-            currency=engagement.currency,
-        )
+        if map_reduce:
+            result = await suggest_mitigations_map_reduce(
+                service, prompt_args, chunk_size, settings.AI_MAX_CONCURRENCY
+            )
+        else:
+            result = await service.suggest_mitigations(**prompt_args)
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"Claude API error: {str(e)}")
 
     return AIGenerationResponse(data=result)
+
+
+# Streaming variants: server-sent events, one ``item`` event per failure mode
+# or mitigation as soon as the model has finished writing it, then a ``done``
+# event with ``count``, ``truncated`` and ``stop_reason`` (or an ``error``
+# event if the call fails part-way).
+
+
+async def _sse(events: AsyncIterator[tuple[str, dict[str, Any]]]) -> AsyncIterator[bytes]:
+    try:
+        async for event, payload in events:
+            yield sse_event(event, payload)
+    except Exception as e:
+        yield sse_event("error", {"detail": f"Claude API error: {str(e)}"})
+
+
+@router.post("/generate-failure-modes/stream")
+async def stream_failure_modes(
+    engagement_id: int,
+    data: GenerateFailureModesRequest,
+    bypass_cache: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    engagement = await _get_engagement(engagement_id, db, Engagement.parties)
+    gs = await db.get(GoodsService, data.goods_service_id)
+    if not gs:
+        raise HTTPException(status_code=404, detail="Goods/Service not found")
+    prompt_args = _failure_mode_prompt_args(engagement, gs)
+
+    await db.close()
+    service = ClaudeService(
+        bypass_cache=bypass_cache, endpoint="generate-failure-modes/stream", engagement_id=engagement_id
+    )
+    return EventStreamResponse(_sse(service.stream_failure_modes(**prompt_args)))
+
+
+@router.post("/suggest-mitigations/stream")
+async def stream_mitigations(
+    engagement_id: int,
+    data: SuggestMitigationsRequest,
+    bypass_cache: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    engagement = await _get_engagement(engagement_id, db, Engagement.failure_modes)
+    prompt_args = await _mitigation_prompt_args(engagement, db)
+
+    await db.close()
+    service = ClaudeService(
+        bypass_cache=bypass_cache, endpoint="suggest-mitigations/stream", engagement_id=engagement_id
+    )
+    return EventStreamResponse(_sse(service.stream_mitigations(**prompt_args)))
+
+
+@stats_router.get("/metrics")
+def ai_call_metrics(engagement_id: Optional[int] = None):
+    """Latency, token, retry and cost totals for Claude calls since startup.
+
+    Broken down by endpoint and by engagement; ``engagement_id`` restricts
+    the report to one engagement.
+    """
+    return ai_metrics.summary(engagement_id)
+
+
+@stats_router.get("/cache")
+def llm_cache_stats():
+    """Hit/miss counters and size of the LLM response cache."""
+    cache = get_llm_cache()
+    return {"enabled": cache is not None, **(cache.stats() if cache else {})}
@@ -1,16 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
+from app.http_cache import make_etag, check_etag
+from app.responses import FastJSONResponse
 from app.schemas.dashboard import DashboardResponse
-from app.services.dashboard_service import get_dashboard
+from app.services.dashboard_service import get_dashboard_etag, get_dashboard_snapshot, invalidate_on_commit
 
 router = APIRouter(prefix="/api/engagements/{engagement_id}/dashboard", tags=["dashboard"])
 
+_SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+async def invalidates_dashboard(request: Request, db: AsyncSession = Depends(get_async_db)) -> None:
+    """Router dependency: writes under an engagement invalidate its dashboard when they commit.
+
+    Added to every router whose writes can change what the dashboard shows,
+    so individual routes cannot forget it. Not for the quantification router,
+    which stores a fresh snapshot itself.
+    """
+    engagement_id = request.path_params.get("engagement_id")
+    if request.method not in _SAFE_METHODS and engagement_id is not None:
+        invalidate_on_commit(db.sync_session, int(engagement_id))
+
 
 @router.get("/", response_model=DashboardResponse)
-def dashboard(engagement_id: int, db: Session = Depends(get_db)):
+async def dashboard(engagement_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    snapshot_etag = await db.run_sync(get_dashboard_etag, engagement_id)
+    if snapshot_etag is not None:
+        not_modified = check_etag(request, response, make_etag("dashboard", snapshot_etag))
+        if not_modified:
+            return not_modified
+
     try:
-        return get_dashboard(db, engagement_id)
+        snapshot_etag, payload = await db.run_sync(get_dashboard_snapshot, engagement_id, snapshot_etag)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    not_modified = check_etag(request, response, make_etag("dashboard", snapshot_etag))
+    if not_modified:
+        return not_modified
+    # The snapshot payload is a validated DashboardResponse dump
+    return FastJSONResponse(payload, headers=dict(response.headers))
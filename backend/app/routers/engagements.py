@@ -1,57 +1,124 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db
+from app.http_cache import make_etag, check_etag
+from app.responses import FastJSONResponse
 from app.models.engagement import Engagement
+from app.routers.dashboard import invalidates_dashboard
 from app.schemas.engagement import (
     EngagementCreate,
     EngagementUpdate,
     EngagementResponse,
     EngagementListResponse,
 )
+from app.schemas.engagement_transfer import EngagementExport, EngagementCloneRequest
+from app.services.engagement_transfer_service import (
+    TransferError,
+    export_engagement,
+    import_engagement,
+    clone_engagement,
+)
+
+router = APIRouter(prefix="/api/engagements", tags=["engagements"], dependencies=[Depends(invalidates_dashboard)])
+
 
-router = APIRouter(prefix="/api/engagements", tags=["engagements"])
+async def _get_engagement(engagement_id: int, db: AsyncSession) -> Engagement:
+    engagement = await db.get(Engagement, engagement_id)
+    if not engagement:
+        raise HTTPException(status_code=404, detail="Engagement not found")
+    return engagement
 
 
 @router.get("/", response_model=List[EngagementListResponse])
-def list_engagements(db: Session = Depends(get_db)):
-    return db.query(Engagement).order_by(Engagement.created_at.desc()).all()
+async def list_engagements(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    version = (await db.execute(
+        select(func.count(Engagement.id), func.max(Engagement.id), func.max(Engagement.updated_at))
+    )).one()
+    not_modified = check_etag(request, response, make_etag("engagements", *version))
+    if not_modified:
+        return not_modified
+
+    return (await db.scalars(select(Engagement).order_by(Engagement.created_at.desc()))).all()
 
 
 @router.post("/", response_model=EngagementResponse, status_code=201)
-def create_engagement(data: EngagementCreate, db: Session = Depends(get_db)):
+async def create_engagement(data: EngagementCreate, db: AsyncSession = Depends(get_async_db)):
     engagement = Engagement(**data.model_dump())
     db.add(engagement)
-    db.commit()
-    db.refresh(engagement)
+    await db.commit()
+    await db.refresh(engagement)
+    return engagement
+
+
+@router.post("/import", response_model=EngagementResponse, status_code=201)
+async def import_engagement_endpoint(data: EngagementExport, db: AsyncSession = Depends(get_async_db)):
+    try:
+        engagement = await db.run_sync(import_engagement, data.model_dump())
+    except TransferError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    await db.refresh(engagement)
     return engagement
 
 
 @router.get("/{engagement_id}", response_model=EngagementResponse)
-def get_engagement(engagement_id: int, db: Session = Depends(get_db)):
-    engagement = db.query(Engagement).filter(Engagement.id == engagement_id).first()
-    if not engagement:
+async def get_engagement(
+    engagement_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)
+):
+    version = (await db.execute(
+        select(Engagement.id, Engagement.updated_at).where(Engagement.id == engagement_id)
+    )).first()
+    if not version:
         raise HTTPException(status_code=404, detail="Engagement not found")
-    return engagement
+    not_modified = check_etag(request, response, make_etag("engagement", *version))
+    if not_modified:
+        return not_modified
+
+    return await _get_engagement(engagement_id, db)
 
 
 @router.put("/{engagement_id}", response_model=EngagementResponse)
-def update_engagement(engagement_id: int, data: EngagementUpdate, db: Session = Depends(get_db)):
-    engagement = db.query(Engagement).filter(Engagement.id == engagement_id).first()
-    if not engagement:
-        raise HTTPException(status_code=404, detail="Engagement not found")
+async def update_engagement(engagement_id: int, data: EngagementUpdate, db: AsyncSession = Depends(get_async_db)):
+    engagement = await _get_engagement(engagement_id, db)
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(engagement, key, value)
-    db.commit()
-    db.refresh(engagement)
+    await db.commit()
+    await db.refresh(engagement)
     return engagement
 
 
 @router.delete("/{engagement_id}", status_code=204)
-def delete_engagement(engagement_id: int, db: Session = Depends(get_db)):
-    engagement = db.query(Engagement).filter(Engagement.id == engagement_id).first()
-    if not engagement:
-        raise HTTPException(status_code=404, detail="Engagement not found")
-    db.delete(engagement)
-    db.commit()
+async def delete_engagement(engagement_id: int, db: AsyncSession = Depends(get_async_db)):
+    engagement = await _get_engagement(engagement_id, db)
+    await db.delete(engagement)
+    await db.commit()
+
+
+@router.get("/{engagement_id}/export", response_model=EngagementExport)
+async def export_engagement_endpoint(engagement_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        document = await db.run_sync(export_engagement, engagement_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    # Built from column-level selects of stored rows; no re-validation needed
+    return FastJSONResponse(document)
+
+
+@router.post("/{engagement_id}/clone", response_model=EngagementResponse, status_code=201)
+async def clone_engagement_endpoint(
+    engagement_id: int,
+    data: EngagementCloneRequest = EngagementCloneRequest(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        engagement = await db.run_sync(clone_engagement, engagement_id, data.name)
+    except TransferError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    await db.commit()
+    await db.refresh(engagement)
+    return engagement
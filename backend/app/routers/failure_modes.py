@@ -1,63 +1,90 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db
+from app.models.engagement import Engagement
 from app.models.failure_mode import FailureMode
-from app.schemas.failure_mode import FailureModeCreate, FailureModeUpdate, FailureModeResponse
+from app.routers.dashboard import invalidates_dashboard
+from app.schemas.failure_mode import (
+    FailureModeCreate,
+    FailureModeUpdate,
+    FailureModeResponse,
+    FailureModeBulkItem,
+    FailureModeBulkResponse,
+)
+from app.services.bulk_service import BulkValidationError, create_failure_modes
 
-router = APIRouter(prefix="/api/engagements/{engagement_id}/failure-modes", tags=["failure_modes"])
+router = APIRouter(prefix="/api/engagements/{engagement_id}/failure-modes", tags=["failure_modes"], dependencies=[Depends(invalidates_dashboard)])
+
+
+async def _get_failure_mode(engagement_id: int, fm_id: int, db: AsyncSession) -> FailureMode:
+    fm = await db.scalar(select(FailureMode).where(FailureMode.id == fm_id, FailureMode.engagement_id == engagement_id))
+    if not fm:
+        raise HTTPException(status_code=404, detail="Failure mode not found")
+    return fm
 
 
 @router.get("/", response_model=List[FailureModeResponse])
-def list_failure_modes(engagement_id: int, db: Session = Depends(get_db)):
-    return db.query(FailureMode).filter(FailureMode.engagement_id == engagement_id).all()
+async def list_failure_modes(engagement_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(FailureMode).where(FailureMode.engagement_id == engagement_id))).all()
 
 
 @router.post("/", response_model=FailureModeResponse, status_code=201)
-def create_failure_mode(engagement_id: int, data: FailureModeCreate, db: Session = Depends(get_db)):
+async def create_failure_mode(engagement_id: int, data: FailureModeCreate, db: AsyncSession = Depends(get_async_db)):
     fm = FailureMode(engagement_id=engagement_id, **data.model_dump())
     db.add(fm)
-    db.commit()
-    db.refresh(fm)
+    await db.commit()
+    await db.refresh(fm)
     return fm
 
 
+@router.post("/bulk", response_model=FailureModeBulkResponse, status_code=201)
+async def bulk_create_failure_modes(
+    engagement_id: int, data: List[FailureModeBulkItem], db: AsyncSession = Depends(get_async_db)
+):
+    """Create failure modes and their nested loss scenarios in one transaction."""
+    if not await db.scalar(select(Engagement.id).where(Engagement.id == engagement_id)):
+        raise HTTPException(status_code=404, detail="Engagement not found")
+    try:
+        fm_ids, scenario_ids = await db.run_sync(
+            create_failure_modes, engagement_id, [item.model_dump() for item in data]
+        )
+    except BulkValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    return FailureModeBulkResponse(ids=fm_ids, loss_scenario_ids=scenario_ids)
+
+
 @router.get("/{fm_id}", response_model=FailureModeResponse)
-def get_failure_mode(engagement_id: int, fm_id: int, db: Session = Depends(get_db)):
-    fm = db.query(FailureMode).filter(FailureMode.id == fm_id, FailureMode.engagement_id == engagement_id).first()
-    if not fm:
-        raise HTTPException(status_code=404, detail="Failure mode not found")
-    return fm
+async def get_failure_mode(engagement_id: int, fm_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await _get_failure_mode(engagement_id, fm_id, db)
 
 
 @router.put("/{fm_id}", response_model=FailureModeResponse)
-def update_failure_mode(engagement_id: int, fm_id: int, data: FailureModeUpdate, db: Session = Depends(get_db)):
-    fm = db.query(FailureMode).filter(FailureMode.id == fm_id, FailureMode.engagement_id == engagement_id).first()
-    if not fm:
-        raise HTTPException(status_code=404, detail="Failure mode not found")
+async def update_failure_mode(
+    engagement_id: int, fm_id: int, data: FailureModeUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    fm = await _get_failure_mode(engagement_id, fm_id, db)
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(fm, key, value)
-    db.commit()
-    db.refresh(fm)
+    await db.commit()
+    await db.refresh(fm)
     return fm
 
 
 @router.patch("/{fm_id}/toggle", response_model=FailureModeResponse)
-def toggle_failure_mode(engagement_id: int, fm_id: int, db: Session = Depends(get_db)):
-    fm = db.query(FailureMode).filter(FailureMode.id == fm_id, FailureMode.engagement_id == engagement_id).first()
-    if not fm:
-        raise HTTPException(status_code=404, detail="Failure mode not found")
+async def toggle_failure_mode(engagement_id: int, fm_id: int, db: AsyncSession = Depends(get_async_db)):
+    fm = await _get_failure_mode(engagement_id, fm_id, db)
     fm.is_included = not fm.is_included
-    db.commit()
-    db.refresh(fm)
+    await db.commit()
+    await db.refresh(fm)
     return fm
 
 
 @router.delete("/{fm_id}", status_code=204)
-def delete_failure_mode(engagement_id: int, fm_id: int, db: Session = Depends(get_db)):
-    fm = db.query(FailureMode).filter(FailureMode.id == fm_id, FailureMode.engagement_id == engagement_id).first()
-    if not fm:
-        raise HTTPException(status_code=404, detail="Failure mode not found")
-    db.delete(fm)
-    db.commit()
+async def delete_failure_mode(engagement_id: int, fm_id: int, db: AsyncSession = Depends(get_async_db)):
+    fm = await _get_failure_mode(engagement_id, fm_id, db)
+    await db.delete(fm)
+    await db.commit()
@@ -1,52 +1,58 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.goods_service import GoodsService
+from app.routers.dashboard import invalidates_dashboard
 from app.schemas.goods_service import GoodsServiceCreate, GoodsServiceUpdate, GoodsServiceResponse
 
-router = APIRouter(prefix="/api/engagements/{engagement_id}/goods-services", tags=["goods_services"])
+router = APIRouter(prefix="/api/engagements/{engagement_id}/goods-services", tags=["goods_services"], dependencies=[Depends(invalidates_dashboard)])
+
+
+async def _get_goods_service(engagement_id: int, gs_id: int, db: AsyncSession) -> GoodsService:
+    gs = await db.scalar(
+        select(GoodsService).where(GoodsService.id == gs_id, GoodsService.engagement_id == engagement_id)
+    )
+    if not gs:
+        raise HTTPException(status_code=404, detail="Goods/Service not found")
+    return gs
 
 
 @router.get("/", response_model=List[GoodsServiceResponse])
-def list_goods_services(engagement_id: int, db: Session = Depends(get_db)):
-    return db.query(GoodsService).filter(GoodsService.engagement_id == engagement_id).all()
+async def list_goods_services(engagement_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(GoodsService).where(GoodsService.engagement_id == engagement_id))).all()
 
 
 @router.post("/", response_model=GoodsServiceResponse, status_code=201)
-def create_goods_service(engagement_id: int, data: GoodsServiceCreate, db: Session = Depends(get_db)):
+async def create_goods_service(engagement_id: int, data: GoodsServiceCreate, db: AsyncSession = Depends(get_async_db)):
     gs = GoodsService(engagement_id=engagement_id, **data.model_dump())
     db.add(gs)
-    db.commit()
-    db.refresh(gs)
+    await db.commit()
+    await db.refresh(gs)
     return gs
 
 
 @router.get("/{gs_id}", response_model=GoodsServiceResponse)
-def get_goods_service(engagement_id: int, gs_id: int, db: Session = Depends(get_db)):
-    gs = db.query(GoodsService).filter(GoodsService.id == gs_id, GoodsService.engagement_id == engagement_id).first()
-    if not gs:
-        raise HTTPException(status_code=404, detail="Goods/Service not found")
-    return gs
+async def get_goods_service(engagement_id: int, gs_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await _get_goods_service(engagement_id, gs_id, db)
 
 
 @router.put("/{gs_id}", response_model=GoodsServiceResponse)
-def update_goods_service(engagement_id: int, gs_id: int, data: GoodsServiceUpdate, db: Session = Depends(get_db)):
-    gs = db.query(GoodsService).filter(GoodsService.id == gs_id, GoodsService.engagement_id == engagement_id).first()
-    if not gs:
-        raise HTTPException(status_code=404, detail="Goods/Service not found")
+async def update_goods_service(
+    engagement_id: int, gs_id: int, data: GoodsServiceUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    gs = await _get_goods_service(engagement_id, gs_id, db)
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(gs, key, value)
-    db.commit()
-    db.refresh(gs)
+    await db.commit()
+    await db.refresh(gs)
     return gs
 
 
 @router.delete("/{gs_id}", status_code=204)
-def delete_goods_service(engagement_id: int, gs_id: int, db: Session = Depends(get_db)):
-    gs = db.query(GoodsService).filter(GoodsService.id == gs_id, GoodsService.engagement_id == engagement_id).first()
-    if not gs:
-        raise HTTPException(status_code=404, detail="Goods/Service not found")
-    db.delete(gs)
-    db.commit()
+async def delete_goods_service(engagement_id: int, gs_id: int, db: AsyncSession = Depends(get_async_db)):
+    gs = await _get_goods_service(engagement_id, gs_id, db)
+    await db.delete(gs)
+    await db.commit()
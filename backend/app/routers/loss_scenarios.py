@@ -1,62 +1,85 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.loss_scenario import LossScenario
 from app.models.failure_mode import FailureMode
+from app.routers.dashboard import invalidates_dashboard
+from app.schemas.bulk import BulkCreateResponse
 from app.schemas.loss_scenario import LossScenarioCreate, LossScenarioUpdate, LossScenarioResponse
+from app.services.bulk_service import BulkValidationError, create_loss_scenarios
 
 router = APIRouter(
     prefix="/api/engagements/{engagement_id}/failure-modes/{fm_id}/loss-scenarios",
     tags=["loss_scenarios"],
+    dependencies=[Depends(invalidates_dashboard)],
 )
 
 
-def _verify_fm(engagement_id: int, fm_id: int, db: Session) -> FailureMode:
-    fm = db.query(FailureMode).filter(
-        FailureMode.id == fm_id,
-        FailureMode.engagement_id == engagement_id,
-    ).first()
-    if not fm:
+async def _verify_fm(engagement_id: int, fm_id: int, db: AsyncSession) -> None:
+    found = await db.scalar(
+        select(FailureMode.id).where(FailureMode.id == fm_id, FailureMode.engagement_id == engagement_id)
+    )
+    if not found:
         raise HTTPException(status_code=404, detail="Failure mode not found")
-    return fm
+
+
+async def _get_loss_scenario(fm_id: int, ls_id: int, db: AsyncSession) -> LossScenario:
+    ls = await db.scalar(select(LossScenario).where(LossScenario.id == ls_id, LossScenario.failure_mode_id == fm_id))
+    if not ls:
+        raise HTTPException(status_code=404, detail="Loss scenario not found")
+    return ls
 
 
 @router.get("/", response_model=List[LossScenarioResponse])
-def list_loss_scenarios(engagement_id: int, fm_id: int, db: Session = Depends(get_db)):
-    _verify_fm(engagement_id, fm_id, db)
-    return db.query(LossScenario).filter(LossScenario.failure_mode_id == fm_id).all()
+async def list_loss_scenarios(engagement_id: int, fm_id: int, db: AsyncSession = Depends(get_async_db)):
+    await _verify_fm(engagement_id, fm_id, db)
+    return (await db.scalars(select(LossScenario).where(LossScenario.failure_mode_id == fm_id))).all()
 
 
 @router.post("/", response_model=LossScenarioResponse, status_code=201)
-def create_loss_scenario(engagement_id: int, fm_id: int, data: LossScenarioCreate, db: Session = Depends(get_db)):
-    _verify_fm(engagement_id, fm_id, db)
+async def create_loss_scenario(
+    engagement_id: int, fm_id: int, data: LossScenarioCreate, db: AsyncSession = Depends(get_async_db)
+):
+    await _verify_fm(engagement_id, fm_id, db)
     ls = LossScenario(failure_mode_id=fm_id, **data.model_dump())
     db.add(ls)
-    db.commit()
-    db.refresh(ls)
+    await db.commit()
+    await db.refresh(ls)
     return ls
 
 
+@router.post("/bulk", response_model=BulkCreateResponse, status_code=201)
+async def bulk_create_loss_scenarios(
+    engagement_id: int, fm_id: int, data: List[LossScenarioCreate], db: AsyncSession = Depends(get_async_db)
+):
+    await _verify_fm(engagement_id, fm_id, db)
+    try:
+        ids = await db.run_sync(create_loss_scenarios, engagement_id, fm_id, [item.model_dump() for item in data])
+    except BulkValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    return BulkCreateResponse(ids=ids)
+
+
 @router.put("/{ls_id}", response_model=LossScenarioResponse)
-def update_loss_scenario(engagement_id: int, fm_id: int, ls_id: int, data: LossScenarioUpdate, db: Session = Depends(get_db)):
-    _verify_fm(engagement_id, fm_id, db)
-    ls = db.query(LossScenario).filter(LossScenario.id == ls_id, LossScenario.failure_mode_id == fm_id).first()
-    if not ls:
-        raise HTTPException(status_code=404, detail="Loss scenario not found")
+async def update_loss_scenario(
+    engagement_id: int, fm_id: int, ls_id: int, data: LossScenarioUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    await _verify_fm(engagement_id, fm_id, db)
+    ls = await _get_loss_scenario(fm_id, ls_id, db)
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(ls, key, value)
-    db.commit()
-    db.refresh(ls)
+    await db.commit()
+    await db.refresh(ls)
     return ls
 
 
 @router.delete("/{ls_id}", status_code=204)
-def delete_loss_scenario(engagement_id: int, fm_id: int, ls_id: int, db: Session = Depends(get_db)):
-    _verify_fm(engagement_id, fm_id, db)
-    ls = db.query(LossScenario).filter(LossScenario.id == ls_id, LossScenario.failure_mode_id == fm_id).first()
-    if not ls:
-        raise HTTPException(status_code=404, detail="Loss scenario not found")
-    db.delete(ls)
-    db.commit()
+async def delete_loss_scenario(engagement_id: int, fm_id: int, ls_id: int, db: AsyncSession = Depends(get_async_db)):
+    await _verify_fm(engagement_id, fm_id, db)
+    ls = await _get_loss_scenario(fm_id, ls_id, db)
+    await db.delete(ls)
+    await db.commit()
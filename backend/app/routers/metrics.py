@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from app.observability import CONTENT_TYPE, registry
+
+router = APIRouter(tags=["observability"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
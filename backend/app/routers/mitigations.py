@@ -1,71 +1,132 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.mitigation import Mitigation, FailureModeMitigation
+from app.routers.dashboard import invalidates_dashboard
 from app.schemas.mitigation import (
     MitigationCreate,
     MitigationUpdate,
     MitigationResponse,
     FailureModeMitigationLink,
     FailureModeMitigationResponse,
+    FailureModeMitigationBulkLink,
+    FailureModeMitigationBulkResponse,
+    MitigationPortfolioRequest,
+    MitigationPortfolioResponse,
 )
+from app.services.bulk_service import BulkValidationError, upsert_mitigation_links
+from app.services.portfolio_service import load_mitigation_options, optimize_mitigations
+from app.services.quantification_service import check_simulation_limits, load_engine_inputs
+from app.services.simulation_executor import SimulationQueueFull, run_in_simulation_executor
 
-router = APIRouter(prefix="/api/engagements/{engagement_id}/mitigations", tags=["mitigations"])
+router = APIRouter(prefix="/api/engagements/{engagement_id}/mitigations", tags=["mitigations"], dependencies=[Depends(invalidates_dashboard)])
+
+
+async def _get_mitigation(engagement_id: int, mit_id: int, db: AsyncSession) -> Mitigation:
+    mitigation = await db.scalar(
+        select(Mitigation).where(Mitigation.id == mit_id, Mitigation.engagement_id == engagement_id)
+    )
+    if not mitigation:
+        raise HTTPException(status_code=404, detail="Mitigation not found")
+    return mitigation
+
+
+async def _get_link(mit_id: int, fm_id: int, db: AsyncSession):
+    return await db.scalar(
+        select(FailureModeMitigation).where(
+            FailureModeMitigation.mitigation_id == mit_id,
+            FailureModeMitigation.failure_mode_id == fm_id,
+        )
+    )
 
 
 @router.get("/", response_model=List[MitigationResponse])
-def list_mitigations(engagement_id: int, db: Session = Depends(get_db)):
-    return db.query(Mitigation).filter(Mitigation.engagement_id == engagement_id).all()
+async def list_mitigations(engagement_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(Mitigation).where(Mitigation.engagement_id == engagement_id))).all()
 
 
 @router.post("/", response_model=MitigationResponse, status_code=201)
-def create_mitigation(engagement_id: int, data: MitigationCreate, db: Session = Depends(get_db)):
+async def create_mitigation(engagement_id: int, data: MitigationCreate, db: AsyncSession = Depends(get_async_db)):
     mitigation = Mitigation(engagement_id=engagement_id, **data.model_dump())
     db.add(mitigation)
-    db.commit()
-    db.refresh(mitigation)
+    await db.commit()
+    await db.refresh(mitigation)
     return mitigation
 
 
+@router.post("/links", response_model=FailureModeMitigationBulkResponse)
+async def bulk_link_mitigations(
+    engagement_id: int,
+    data: List[FailureModeMitigationBulkLink],
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Create or update many mitigation ↔ failure mode links in one transaction."""
+    try:
+        ids, created, updated = await db.run_sync(
+            upsert_mitigation_links, engagement_id, [item.model_dump() for item in data]
+        )
+    except BulkValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    return FailureModeMitigationBulkResponse(ids=ids, created=created, updated=updated)
+
+
+@router.post("/portfolio", response_model=MitigationPortfolioResponse)
+async def optimize_mitigation_portfolio(
+    engagement_id: int,
+    data: MitigationPortfolioRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Best subset of mitigations within ``budget`` and the cost vs. reduction frontier."""
+    try:
+        fm_inputs, _ = await db.run_sync(load_engine_inputs, engagement_id)
+        check_simulation_limits(fm_inputs, data.num_simulations)
+        options = await db.run_sync(load_mitigation_options, engagement_id)
+        await db.rollback()
+        return await run_in_simulation_executor(
+            optimize_mitigations, fm_inputs, options, data.num_simulations, data.budget, data.objective, data.seed,
+        )
+    except SimulationQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.put("/{mit_id}", response_model=MitigationResponse)
-def update_mitigation(engagement_id: int, mit_id: int, data: MitigationUpdate, db: Session = Depends(get_db)):
-    mitigation = db.query(Mitigation).filter(Mitigation.id == mit_id, Mitigation.engagement_id == engagement_id).first()
-    if not mitigation:
-        raise HTTPException(status_code=404, detail="Mitigation not found")
+async def update_mitigation(
+    engagement_id: int, mit_id: int, data: MitigationUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    mitigation = await _get_mitigation(engagement_id, mit_id, db)
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(mitigation, key, value)
-    db.commit()
-    db.refresh(mitigation)
+    await db.commit()
+    await db.refresh(mitigation)
     return mitigation
 
 
 @router.delete("/{mit_id}", status_code=204)
-def delete_mitigation(engagement_id: int, mit_id: int, db: Session = Depends(get_db)):
-    mitigation = db.query(Mitigation).filter(Mitigation.id == mit_id, Mitigation.engagement_id == engagement_id).first()
-    if not mitigation:
-        raise HTTPException(status_code=404, detail="Mitigation not found")
-    db.delete(mitigation)
-    db.commit()
+async def delete_mitigation(engagement_id: int, mit_id: int, db: AsyncSession = Depends(get_async_db)):
+    mitigation = await _get_mitigation(engagement_id, mit_id, db)
+    await db.delete(mitigation)
+    await db.commit()
 
 
 @router.post("/{mit_id}/link", response_model=FailureModeMitigationResponse, status_code=201)
-def link_mitigation_to_failure_mode(
+async def link_mitigation_to_failure_mode(
     engagement_id: int,
     mit_id: int,
     data: FailureModeMitigationLink,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    existing = db.query(FailureModeMitigation).filter(
-        FailureModeMitigation.mitigation_id == mit_id,
-        FailureModeMitigation.failure_mode_id == data.failure_mode_id,
-    ).first()
+    existing = await _get_link(mit_id, data.failure_mode_id, db)
     if existing:
         existing.frequency_reduction = data.frequency_reduction
         existing.severity_reduction = data.severity_reduction
-        db.commit()
-        db.refresh(existing)
+        await db.commit()
+        await db.refresh(existing)
         return existing
 
     link = FailureModeMitigation(
@@ -75,23 +136,20 @@ def link_mitigation_to_failure_mode(
         severity_reduction=data.severity_reduction,
     )
     db.add(link)
-    db.commit()
-    db.refresh(link)
+    await db.commit()
+    await db.refresh(link)
     return link
 
 
 @router.delete("/{mit_id}/unlink/{fm_id}", status_code=204)
-def unlink_mitigation_from_failure_mode(
+async def unlink_mitigation_from_failure_mode(
     engagement_id: int,
     mit_id: int,
     fm_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    link = db.query(FailureModeMitigation).filter(
-        FailureModeMitigation.mitigation_id == mit_id,
-        FailureModeMitigation.failure_mode_id == fm_id,
-    ).first()
+    link = await _get_link(mit_id, fm_id, db)
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
-    db.delete(link)
-    db.commit()
+    await db.delete(link)
+    await db.commit()
@@ -1,52 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.party import Party
+from app.routers.dashboard import invalidates_dashboard
 from app.schemas.party import PartyCreate, PartyUpdate, PartyResponse
 
-router = APIRouter(prefix="/api/engagements/{engagement_id}/parties", tags=["parties"])
+router = APIRouter(prefix="/api/engagements/{engagement_id}/parties", tags=["parties"], dependencies=[Depends(invalidates_dashboard)])
+
+
+async def _get_party(engagement_id: int, party_id: int, db: AsyncSession) -> Party:
+    party = await db.scalar(select(Party).where(Party.id == party_id, Party.engagement_id == engagement_id))
+    if not party:
+        raise HTTPException(status_code=404, detail="Party not found")
+    return party
 
 
 @router.get("/", response_model=List[PartyResponse])
-def list_parties(engagement_id: int, db: Session = Depends(get_db)):
-    return db.query(Party).filter(Party.engagement_id == engagement_id).all()
+async def list_parties(engagement_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(Party).where(Party.engagement_id == engagement_id))).all()
 
 
 @router.post("/", response_model=PartyResponse, status_code=201)
-def create_party(engagement_id: int, data: PartyCreate, db: Session = Depends(get_db)):
+async def create_party(engagement_id: int, data: PartyCreate, db: AsyncSession = Depends(get_async_db)):
     party = Party(engagement_id=engagement_id, **data.model_dump())
     db.add(party)
-    db.commit()
-    db.refresh(party)
+    await db.commit()
+    await db.refresh(party)
     return party
 
 
 @router.get("/{party_id}", response_model=PartyResponse)
-def get_party(engagement_id: int, party_id: int, db: Session = Depends(get_db)):
-    party = db.query(Party).filter(Party.id == party_id, Party.engagement_id == engagement_id).first()
-    if not party:
-        raise HTTPException(status_code=404, detail="Party not found")
-    return party
+async def get_party(engagement_id: int, party_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await _get_party(engagement_id, party_id, db)
 
 
 @router.put("/{party_id}", response_model=PartyResponse)
-def update_party(engagement_id: int, party_id: int, data: PartyUpdate, db: Session = Depends(get_db)):
-    party = db.query(Party).filter(Party.id == party_id, Party.engagement_id == engagement_id).first()
-    if not party:
-        raise HTTPException(status_code=404, detail="Party not found")
+async def update_party(engagement_id: int, party_id: int, data: PartyUpdate, db: AsyncSession = Depends(get_async_db)):
+    party = await _get_party(engagement_id, party_id, db)
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(party, key, value)
-    db.commit()
-    db.refresh(party)
+    await db.commit()
+    await db.refresh(party)
     return party
 
 
 @router.delete("/{party_id}", status_code=204)
-def delete_party(engagement_id: int, party_id: int, db: Session = Depends(get_db)):
-    party = db.query(Party).filter(Party.id == party_id, Party.engagement_id == engagement_id).first()
-    if not party:
-        raise HTTPException(status_code=404, detail="Party not found")
-    db.delete(party)
-    db.commit()
+async def delete_party(engagement_id: int, party_id: int, db: AsyncSession = Depends(get_async_db)):
+    party = await _get_party(engagement_id, party_id, db)
+    await db.delete(party)
+    await db.commit()
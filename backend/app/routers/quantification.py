@@ -1,48 +1,192 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Literal, Optional
 
-from app.database import get_db
-from app.models.quantification import QuantificationRun
+from app.database import get_async_db
+from app.http_cache import make_etag, check_etag
+from app.models.quantification import QuantificationRun, QuantificationRunArtifact
+from app.observability import add_timing
+from app.responses import FastJSONResponse
 from app.schemas.quantification import (
+    QuantificationRunArtifactResponse,
     QuantificationRunRequest,
     QuantificationRunResponse,
 )
-from app.services.quantification_service import run_quantification
+from app.security import is_admin, require_admin
+from app.services.quantification_service import (
+    check_simulation_limits,
+    load_engine_inputs,
+    simulate_and_attribute,
+    store_quantification,
+)
+from app.services.run_profile import RunProfile
+from app.services.run_serializer import serialize_run, serialize_runs
+from app.services.simulation_executor import SimulationQueueFull, run_in_simulation_executor, single_flight
 
 router = APIRouter(prefix="/api/engagements/{engagement_id}/quantification", tags=["quantification"])
 
+# Run payloads are built directly from trusted ORM rows and returned as
+# FastJSONResponse, so ``response_model`` only documents the shape. Pass
+# ``compact=true`` for start/width histograms and columnar results.
+
+
+async def _run_and_store(
+    bind: AsyncEngine, engagement_id: int, num_simulations: int, profiler: Optional[str] = None
+) -> tuple[tuple[int, int], dict[str, float]]:
+    """Simulate and store both runs; return their ids and the stage timings.
+
+    Shared by coalesced requests (``single_flight``), so it works in a
+    session of its own rather than in any one request's, and leaves
+    ``Server-Timing`` to each caller.
+    """
+    profile = RunProfile()
+    async with AsyncSession(bind, autoflush=False, expire_on_commit=False) as db:
+        fm_inputs, contract_value = await db.run_sync(load_engine_inputs, engagement_id, profile)
+        check_simulation_limits(fm_inputs, num_simulations)
+        # Release the read transaction (and, on SQLite, its snapshot) while the
+        # simulation runs on its own executor
+        await db.rollback()
+        results, contributions = await run_in_simulation_executor(
+            simulate_and_attribute, fm_inputs, num_simulations, profile, profiler
+        )
+        unmit_run, mit_run = await db.run_sync(
+            store_quantification, engagement_id, num_simulations, results, contract_value, profile, contributions
+        )
+    return (unmit_run.id, mit_run.id), dict(profile.stages)
+
 
 @router.post("/run", response_model=List[QuantificationRunResponse])
-def run_quantification_endpoint(
+async def run_quantification_endpoint(
     engagement_id: int,
     data: QuantificationRunRequest,
-    db: Session = Depends(get_db),
+    compact: bool = False,
+    profiler: Optional[Literal["cprofile", "sampling", "tracemalloc"]] = None,
+    admin: bool = Depends(is_admin),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    """Run and store the unmitigated and mitigated simulations.
+
+    Admins may pass ``profiler`` to profile both simulations; the output is
+    stored as artifacts of each run (see ``/runs/{run_id}/artifacts``).
+    """
+    if profiler and not admin:
+        raise HTTPException(status_code=403, detail="Admin token required to profile a run")
+    # Identical requests arriving while a run is in flight share its result;
+    # each loads the stored runs in its own session
     try:
-        unmit_run, mit_run = run_quantification(db, engagement_id, data.num_simulations)
+        run_ids, stages = await single_flight(
+            ("quantification", engagement_id, data.num_simulations, profiler),
+            lambda: _run_and_store(db.bind, engagement_id, data.num_simulations, profiler),
+        )
+    except SimulationQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    return [unmit_run, mit_run]
+    for stage, seconds in stages.items():
+        add_timing(stage, seconds)
+    runs = (await db.scalars(
+        select(QuantificationRun)
+        .options(selectinload(QuantificationRun.results))
+        .where(QuantificationRun.id.in_(run_ids))
+        .order_by(QuantificationRun.is_mitigated)
+    )).all()
+    return FastJSONResponse(serialize_runs(runs, compact))
 
 
 @router.get("/runs", response_model=List[QuantificationRunResponse])
-def list_runs(engagement_id: int, db: Session = Depends(get_db)):
-    return (
-        db.query(QuantificationRun)
-        .filter(QuantificationRun.engagement_id == engagement_id)
+async def list_runs(
+    engagement_id: int,
+    request: Request,
+    response: Response,
+    compact: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Runs are immutable once stored; created_at guards against SQLite reusing
+    # the ids of a deleted engagement's runs.
+    version = (await db.execute(
+        select(func.count(QuantificationRun.id), func.max(QuantificationRun.id), func.max(QuantificationRun.created_at))
+        .where(QuantificationRun.engagement_id == engagement_id)
+    )).one()
+    not_modified = check_etag(request, response, make_etag("runs", engagement_id, compact, *version))
+    if not_modified:
+        return not_modified
+
+    runs = (await db.scalars(
+        select(QuantificationRun)
+        .options(selectinload(QuantificationRun.results))
+        .where(QuantificationRun.engagement_id == engagement_id)
         .order_by(QuantificationRun.created_at.desc())
-        .all()
-    )
+    )).all()
+    return FastJSONResponse(serialize_runs(runs, compact), headers=dict(response.headers))
 
 
 @router.get("/runs/{run_id}", response_model=QuantificationRunResponse)
-def get_run(engagement_id: int, run_id: int, db: Session = Depends(get_db)):
-    run = (
-        db.query(QuantificationRun)
-        .filter(QuantificationRun.id == run_id, QuantificationRun.engagement_id == engagement_id)
-        .first()
+async def get_run(
+    engagement_id: int,
+    run_id: int,
+    request: Request,
+    response: Response,
+    compact: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    version = (await db.execute(
+        select(QuantificationRun.id, QuantificationRun.created_at)
+        .where(QuantificationRun.id == run_id, QuantificationRun.engagement_id == engagement_id)
+    )).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Run not found")
+    not_modified = check_etag(request, response, make_etag("run", compact, *version))
+    if not_modified:
+        return not_modified
+
+    run = await db.scalar(
+        select(QuantificationRun)
+        .options(selectinload(QuantificationRun.results))
+        .where(QuantificationRun.id == run_id, QuantificationRun.engagement_id == engagement_id)
     )
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
-    return run
+    return FastJSONResponse(serialize_run(run, compact), headers=dict(response.headers))
+
+
+@router.get(
+    "/runs/{run_id}/artifacts",
+    response_model=List[QuantificationRunArtifactResponse],
+    dependencies=[Depends(require_admin)],
+)
+async def list_run_artifacts(engagement_id: int, run_id: int, db: AsyncSession = Depends(get_async_db)):
+    rows = (await db.execute(
+        select(
+            QuantificationRunArtifact.id,
+            QuantificationRunArtifact.name,
+            QuantificationRunArtifact.media_type,
+            func.length(QuantificationRunArtifact.content).label("size"),
+            QuantificationRunArtifact.created_at,
+        )
+        .join(QuantificationRun)
+        .where(QuantificationRun.id == run_id, QuantificationRun.engagement_id == engagement_id)
+        .order_by(QuantificationRunArtifact.id)
+    )).all()
+    return [row._asdict() for row in rows]
+
+
+@router.get("/runs/{run_id}/artifacts/{name}", dependencies=[Depends(require_admin)])
+async def get_run_artifact(engagement_id: int, run_id: int, name: str, db: AsyncSession = Depends(get_async_db)):
+    artifact = await db.scalar(
+        select(QuantificationRunArtifact)
+        .join(QuantificationRun)
+        .where(
+            QuantificationRun.id == run_id,
+            QuantificationRun.engagement_id == engagement_id,
+            QuantificationRunArtifact.name == name,
+        )
+    )
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return Response(
+        artifact.content,
+        media_type=artifact.media_type,
+        headers={"Content-Disposition": f'attachment; filename="run-{run_id}-{artifact.name}"'},
+    )
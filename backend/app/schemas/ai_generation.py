@@ -1,19 +1,57 @@
 from pydantic import BaseModel
-from typing import Any, Dict
+from typing import Any, Dict, List, Literal, Optional
 
 
 class GenerateFailureModesRequest(BaseModel):
     goods_service_id: int
 
 
+class BulkGenerateFailureModesRequest(BaseModel):
+    goods_service_ids: Optional[List[int]] = None  # default: all of the engagement's
+
+
 class EstimateLossesRequest(BaseModel):
     failure_mode_id: int
     loss_scenario_id: int
 
 
+class BatchEstimateLossesRequest(BaseModel):
+    loss_scenario_ids: Optional[List[int]] = None  # default: all of the engagement's
+    apply: bool = True  # write accepted estimates back to the loss scenarios
+
+
 class SuggestMitigationsRequest(BaseModel):
-    pass  # Uses all included failure modes for the engagement
+    # Uses all included failure modes for the engagement. "map_reduce" queries
+    # chunks of failure modes concurrently and merges the suggestions;
+    # "auto" does so when there are more than AI_MITIGATION_CHUNK_SIZE.
+    mode: Literal["auto", "single", "map_reduce"] = "auto"
 
 
 class AIGenerationResponse(BaseModel):
     data: Dict[str, Any]
+
+
+class BulkGenerationItem(BaseModel):
+    goods_service_id: int
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class BulkGenerationResponse(BaseModel):
+    results: List[BulkGenerationItem]  # in goods/service order
+
+
+class LossEstimate(BaseModel):
+    loss_scenario_id: int
+    severity_low: float
+    severity_mid: float
+    severity_high: float
+    distribution_type: str
+    confidence: Optional[float] = None
+    reasoning: str = ""
+
+
+class BatchEstimateLossesResponse(BaseModel):
+    estimates: List[LossEstimate]
+    updated: int
+    errors: List[str]
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class BulkCreateResponse(BaseModel):
+    ids: List[int]
@@ -22,6 +22,16 @@ class MitigationSummary(BaseModel):
     cost: float
     el_reduction: float
     roi: Optional[float]
+    var_95_reduction: Optional[float] = None
+    tvar_95_reduction: Optional[float] = None
+    # Per-mitigation rows: the reductions above are of the mitigation alone
+    # (add-one); loo_* are what it adds on top of all the others
+    # (leave-one-out), and loo_roi is the ROI of that
+    mitigation_id: Optional[int] = None
+    loo_el_reduction: Optional[float] = None
+    loo_var_95_reduction: Optional[float] = None
+    loo_tvar_95_reduction: Optional[float] = None
+    loo_roi: Optional[float] = None
 
 
 class DashboardResponse(BaseModel):
@@ -0,0 +1,50 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.schemas.engagement import EngagementCreate
+from app.schemas.party import PartyCreate
+from app.schemas.goods_service import GoodsServiceCreate
+from app.schemas.failure_mode import FailureModeCreate
+from app.schemas.loss_scenario import LossScenarioCreate
+from app.schemas.mitigation import MitigationCreate, FailureModeMitigationLink
+
+# Exported rows keep their original ids; foreign keys inside the document
+# (goods_service_id, affected_party_id, failure_mode_id) refer to those ids
+# and are remapped to the new rows on import.
+
+EXPORT_FORMAT_VERSION = 1
+
+
+class PartyExport(PartyCreate):
+    id: int
+
+
+class GoodsServiceExport(GoodsServiceCreate):
+    id: int
+
+
+class LossScenarioExport(LossScenarioCreate):
+    id: int
+
+
+class FailureModeExport(FailureModeCreate):
+    id: int
+    loss_scenarios: List[LossScenarioExport] = []
+
+
+class MitigationExport(MitigationCreate):
+    id: int
+    links: List[FailureModeMitigationLink] = []
+
+
+class EngagementExport(BaseModel):
+    format_version: int = EXPORT_FORMAT_VERSION
+    engagement: EngagementCreate
+    parties: List[PartyExport] = []
+    goods_services: List[GoodsServiceExport] = []
+    failure_modes: List[FailureModeExport] = []
+    mitigations: List[MitigationExport] = []
+
+
+class EngagementCloneRequest(BaseModel):
+    name: Optional[str] = None
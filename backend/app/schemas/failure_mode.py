@@ -1,5 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+
+from app.schemas.loss_scenario import LossScenarioCreate
 
 
 class FailureModeCreate(BaseModel):
@@ -16,6 +18,10 @@ class FailureModeCreate(BaseModel):
     is_included: bool = True
 
 
+class FailureModeBulkItem(FailureModeCreate):
+    loss_scenarios: List[LossScenarioCreate] = []
+
+
 class FailureModeUpdate(BaseModel):
     goods_service_id: Optional[int] = None
     name: Optional[str] = None
@@ -46,3 +52,8 @@ class FailureModeResponse(BaseModel):
     is_included: bool
 
     model_config = {"from_attributes": True}
+
+
+class FailureModeBulkResponse(BaseModel):
+    ids: List[int]
+    loss_scenario_ids: List[List[int]]  # per failure mode, in request order
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 
 class MitigationCreate(BaseModel):
@@ -33,6 +33,10 @@ class FailureModeMitigationLink(BaseModel):
     severity_reduction: float = 0.0
 
 
+class FailureModeMitigationBulkLink(FailureModeMitigationLink):
+    mitigation_id: int
+
+
 class FailureModeMitigationResponse(BaseModel):
     id: int
     failure_mode_id: int
@@ -41,3 +45,38 @@ class FailureModeMitigationResponse(BaseModel):
     severity_reduction: float
 
     model_config = {"from_attributes": True}
+
+
+class FailureModeMitigationBulkResponse(BaseModel):
+    ids: List[int]  # link id for each request entry
+    created: int
+    updated: int
+
+
+class MitigationPortfolioRequest(BaseModel):
+    budget: Optional[float] = Field(None, ge=0)  # None: no limit, only the frontier matters
+    objective: Literal["expected_loss", "tvar_95"] = "expected_loss"
+    num_simulations: int = Field(10000, ge=1)
+    seed: Optional[int] = None
+
+
+class MitigationPortfolio(BaseModel):
+    mitigation_ids: List[int]
+    names: List[str]
+    cost: float
+    expected_loss: float
+    tvar_95: float
+    expected_loss_reduction: float
+    tvar_95_reduction: float
+    roi: Optional[float] = None  # on expected loss reduction; None when free
+
+
+class MitigationPortfolioResponse(BaseModel):
+    objective: str
+    budget: Optional[float]
+    num_simulations: int
+    baseline: MitigationPortfolio
+    best: MitigationPortfolio
+    frontier: List[MitigationPortfolio]  # efficient portfolios, ascending cost
+    evaluations: int
+    exhaustive: bool  # False if the search hit its evaluation limit
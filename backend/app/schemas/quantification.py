@@ -1,10 +1,10 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 
 class QuantificationRunRequest(BaseModel):
-    num_simulations: int = 10000
+    num_simulations: int = Field(10000, ge=1)
 
 
 class QuantificationResultResponse(BaseModel):
@@ -41,7 +41,18 @@ class QuantificationRunResponse(BaseModel):
     risk_asymmetry_ratio: float
     histogram_bins: List[float]
     histogram_counts: List[int]
+    timings: Optional[Dict[str, Any]] = None
+    peak_memory_bytes: Optional[int] = None
+    mitigation_contributions: Optional[List[Dict[str, Any]]] = None
     created_at: datetime
     results: List[QuantificationResultResponse] = []
 
     model_config = {"from_attributes": True}
+
+
+class QuantificationRunArtifactResponse(BaseModel):
+    id: int
+    name: str
+    media_type: str
+    size: int
+    created_at: datetime
@@ -0,0 +1,20 @@
+"""Admin-only access, granted by the ``X-Admin-Token`` header."""
+
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.config import settings
+
+
+def is_admin(x_admin_token: Optional[str] = Header(None)) -> bool:
+    """Whether the request carries the configured admin token."""
+    if not settings.ADMIN_TOKEN or not x_admin_token:
+        return False
+    return secrets.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode())
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,149 @@
+"""In-process metrics for Claude calls, aggregated per endpoint and engagement.
+
+``ClaudeService`` records one ``CallRecord`` per logical call: cache hits,
+successful responses and failures after all retries alike. Aggregates keep
+counters and a bounded window of recent latencies for percentiles, so memory
+stays flat however many calls are made. Counters reset on restart.
+"""
+
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+# USD per million tokens: (input, output, cache write, cache read)
+PRICING = {
+    "claude-sonnet-4-5-20250929": (3.00, 15.00, 3.75, 0.30),
+}
+_LATENCY_WINDOW = 512
+
+
+@dataclass
+class CallRecord:
+    endpoint: str
+    engagement_id: Optional[int]
+    model: str
+    latency: float  # seconds, including retries and backoff
+    cached: bool = False
+    error: Optional[str] = None
+    retries: int = 0
+    stop_reason: Optional[str] = None
+    parse: Optional[str] = None  # "clean", "repaired" or "stream"
+    parse_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+    @property
+    def cost(self) -> float:
+        rates = PRICING.get(self.model)
+        if rates is None:
+            return 0.0
+        tokens = (self.input_tokens, self.output_tokens, self.cache_creation_input_tokens, self.cache_read_input_tokens)
+        return sum(t * rate for t, rate in zip(tokens, rates)) / 1_000_000
+
+
+_TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+@dataclass
+class _Aggregate:
+    calls: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    retries: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    parse_seconds: float = 0.0
+    cost: float = 0.0
+    tokens: Counter = field(default_factory=Counter)
+    stop_reasons: Counter = field(default_factory=Counter)
+    parse_paths: Counter = field(default_factory=Counter)
+    latencies: deque = field(default_factory=lambda: deque(maxlen=_LATENCY_WINDOW))
+
+    def add(self, record: CallRecord) -> None:
+        self.calls += 1
+        self.cache_hits += record.cached
+        self.errors += record.error is not None
+        self.retries += record.retries
+        self.latency_total += record.latency
+        self.latency_max = max(self.latency_max, record.latency)
+        self.parse_seconds += record.parse_seconds
+        self.cost += record.cost
+        self.tokens.update({f: getattr(record, f) for f in _TOKEN_FIELDS})
+        if record.stop_reason:
+            self.stop_reasons[record.stop_reason] += 1
+        if record.parse:
+            self.parse_paths[record.parse] += 1
+        if not record.cached:
+            self.latencies.append(record.latency)
+
+    def merge(self, other: "_Aggregate") -> None:
+        for name in ("calls", "cache_hits", "errors", "retries", "latency_total", "parse_seconds", "cost"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.latency_max = max(self.latency_max, other.latency_max)
+        self.tokens.update(other.tokens)
+        self.stop_reasons.update(other.stop_reasons)
+        self.parse_paths.update(other.parse_paths)
+        self.latencies.extend(other.latencies)
+
+    def summary(self) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def pct(p: float) -> Optional[float]:
+            return round(latencies[min(int(p * len(latencies)), len(latencies) - 1)], 4) if latencies else None
+
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "retries": self.retries,
+            "latency_mean": round(self.latency_total / self.calls, 4) if self.calls else None,
+            "latency_p50": pct(0.50),
+            "latency_p95": pct(0.95),
+            "latency_max": round(self.latency_max, 4),
+            "parse_seconds": round(self.parse_seconds, 4),
+            "cost_usd": round(self.cost, 6),
+            **{f: self.tokens[f] for f in _TOKEN_FIELDS},
+            "stop_reasons": dict(self.stop_reasons),
+            "parse_paths": dict(self.parse_paths),
+        }
+
+
+class AIMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, Optional[int]], _Aggregate] = {}
+
+    def record(self, record: CallRecord) -> None:
+        key = (record.endpoint, record.engagement_id)
+        with self._lock:
+            self._stats.setdefault(key, _Aggregate()).add(record)
+
+    def summary(self, engagement_id: Optional[int] = None) -> dict[str, Any]:
+        """Totals plus breakdowns by endpoint and by engagement."""
+        total = _Aggregate()
+        by_endpoint: dict[str, _Aggregate] = {}
+        by_engagement: dict[Optional[int], _Aggregate] = {}
+        with self._lock:
+            for (endpoint, eid), agg in self._stats.items():
+                if engagement_id is not None and eid != engagement_id:
+                    continue
+                total.merge(agg)
+                by_endpoint.setdefault(endpoint, _Aggregate()).merge(agg)
+                by_engagement.setdefault(eid, _Aggregate()).merge(agg)
+        return {
+            "totals": total.summary(),
+            "by_endpoint": {k: v.summary() for k, v in sorted(by_endpoint.items())},
+            "by_engagement": {
+                str(k): v.summary() for k, v in sorted(by_engagement.items(), key=lambda kv: (kv[0] is None, kv[0] or 0))
+            },
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+ai_metrics = AIMetrics()
@@ -0,0 +1,142 @@
+"""Batch writes: many rows per INSERT, one transaction per request.
+
+Each helper issues set-based statements (``INSERT ... RETURNING id`` via
+SQLAlchemy's insertmanyvalues, ``UPDATE`` by primary key) instead of one
+``add``/``flush`` per row. Callers commit.
+"""
+
+from typing import Iterable, Sequence
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.failure_mode import FailureMode
+from app.models.goods_service import GoodsService
+from app.models.loss_scenario import LossScenario
+from app.models.mitigation import Mitigation, FailureModeMitigation
+from app.models.party import Party
+
+
+class BulkValidationError(ValueError):
+    """A batch references rows outside the engagement."""
+
+
+def bulk_insert(db: Session, model, rows: Sequence[dict]) -> list[int]:
+    """Insert ``rows`` and return the new primary keys in input order."""
+    if not rows:
+        return []
+    if db.get_bind().dialect.name == "sqlite":
+        # pysqlite has no insert sentinel, so sort_by_parameter_order would
+        # degrade to one INSERT per row. SQLite assigns rowids as max+1 in
+        # VALUES order and the batches run sequentially, so ascending ids
+        # already follow the input order.
+        return sorted(db.scalars(insert(model).returning(model.id), list(rows)).all())
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(db.scalars(stmt, list(rows)).all())
+
+
+def _check_ids(db: Session, column, engagement_column, engagement_id: int, ids: Iterable[int], label: str) -> None:
+    wanted = {i for i in ids if i is not None}
+    if not wanted:
+        return
+    found = set(db.scalars(select(column).where(engagement_column == engagement_id, column.in_(wanted))))
+    missing = sorted(wanted - found)
+    if missing:
+        raise BulkValidationError(f"Unknown {label} ids for this engagement: {missing}")
+
+
+def check_party_ids(db: Session, engagement_id: int, party_ids: Iterable[int]) -> None:
+    _check_ids(db, Party.id, Party.engagement_id, engagement_id, party_ids, "party")
+
+
+def check_goods_service_ids(db: Session, engagement_id: int, gs_ids: Iterable[int]) -> None:
+    _check_ids(db, GoodsService.id, GoodsService.engagement_id, engagement_id, gs_ids, "goods/service")
+
+
+def check_failure_mode_ids(db: Session, engagement_id: int, fm_ids: Iterable[int]) -> None:
+    _check_ids(db, FailureMode.id, FailureMode.engagement_id, engagement_id, fm_ids, "failure mode")
+
+
+def check_mitigation_ids(db: Session, engagement_id: int, mit_ids: Iterable[int]) -> None:
+    _check_ids(db, Mitigation.id, Mitigation.engagement_id, engagement_id, mit_ids, "mitigation")
+
+
+def create_loss_scenarios(db: Session, engagement_id: int, fm_id: int, scenarios: Sequence[dict]) -> list[int]:
+    check_party_ids(db, engagement_id, (s["affected_party_id"] for s in scenarios))
+    return bulk_insert(db, LossScenario, [{**s, "failure_mode_id": fm_id} for s in scenarios])
+
+
+def create_failure_modes(
+    db: Session,
+    engagement_id: int,
+    failure_modes: Sequence[dict],
+) -> tuple[list[int], list[list[int]]]:
+    """Insert failure modes with their nested ``loss_scenarios``.
+
+    Returns the failure mode ids and, per failure mode, its loss scenario ids.
+    """
+    check_goods_service_ids(db, engagement_id, (fm.get("goods_service_id") for fm in failure_modes))
+    check_party_ids(
+        db, engagement_id,
+        (s["affected_party_id"] for fm in failure_modes for s in fm.get("loss_scenarios", [])),
+    )
+
+    fm_rows = [
+        {k: v for k, v in fm.items() if k != "loss_scenarios"} | {"engagement_id": engagement_id}
+        for fm in failure_modes
+    ]
+    fm_ids = bulk_insert(db, FailureMode, fm_rows)
+
+    scenario_rows = []
+    owners = []
+    for index, (fm_id, fm) in enumerate(zip(fm_ids, failure_modes)):
+        for scenario in fm.get("loss_scenarios", []):
+            scenario_rows.append({**scenario, "failure_mode_id": fm_id})
+            owners.append(index)
+    scenario_ids = bulk_insert(db, LossScenario, scenario_rows)
+
+    grouped: list[list[int]] = [[] for _ in fm_ids]
+    for owner, scenario_id in zip(owners, scenario_ids):
+        grouped[owner].append(scenario_id)
+    return fm_ids, grouped
+
+
+def upsert_mitigation_links(db: Session, engagement_id: int, links: Sequence[dict]) -> tuple[list[int], int, int]:
+    """Create or update failure mode ↔ mitigation links.
+
+    A link is identified by ``(mitigation_id, failure_mode_id)``; when a pair
+    appears more than once the last entry wins. Returns the link id for each
+    input entry plus the created and updated counts.
+    """
+    check_mitigation_ids(db, engagement_id, (link["mitigation_id"] for link in links))
+    check_failure_mode_ids(db, engagement_id, (link["failure_mode_id"] for link in links))
+
+    latest: dict[tuple[int, int], dict] = {}
+    for link in links:
+        latest[(link["mitigation_id"], link["failure_mode_id"])] = link
+
+    existing: dict[tuple[int, int], int] = {}
+    if latest:
+        rows = db.execute(
+            select(FailureModeMitigation.id, FailureModeMitigation.mitigation_id, FailureModeMitigation.failure_mode_id)
+            .where(FailureModeMitigation.mitigation_id.in_({m for m, _ in latest}))
+        )
+        existing = {(mit_id, fm_id): link_id for link_id, mit_id, fm_id in rows}
+
+    updates = [
+        {
+            "id": existing[key],
+            "frequency_reduction": link["frequency_reduction"],
+            "severity_reduction": link["severity_reduction"],
+        }
+        for key, link in latest.items() if key in existing
+    ]
+    if updates:
+        db.execute(update(FailureModeMitigation), updates)
+
+    new_keys = [key for key in latest if key not in existing]
+    new_ids = bulk_insert(db, FailureModeMitigation, [latest[key] for key in new_keys])
+    ids_by_key = {**existing, **dict(zip(new_keys, new_ids))}
+
+    ids = [ids_by_key[(link["mitigation_id"], link["failure_mode_id"])] for link in links]
+    return ids, len(new_ids), len(updates)
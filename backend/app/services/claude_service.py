@@ -1,19 +1,98 @@
 """Claude API integration for AI-powered risk analysis."""
 
+import asyncio
 import json
 import logging
+import random
 import re
-from typing import Any
-
-from anthropic import Anthropic
+import threading
+import time
+import weakref
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, TypeVar
 
 from app.config import settings
+from app.prompts.base import Prompt
 from app.prompts.failure_mode_generation import build_failure_mode_prompt
-from app.prompts.loss_estimation import build_loss_estimation_prompt
+from app.prompts.loss_estimation import build_loss_estimation_prompt, build_batch_loss_estimation_prompt
 from app.prompts.mitigation_suggestion import build_mitigation_prompt
+from app.services.ai_metrics import AIMetrics, CallRecord, ai_metrics
+from app.services.json_stream import JSONArrayStreamParser
+from app.services.llm_cache import LLMCache, get_llm_cache
+
+if TYPE_CHECKING:
+    # The SDK takes a noticeable share of app start-up; it is imported when
+    # the first client is created
+    from anthropic import AsyncAnthropic
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# A client owns an HTTP connection pool, so it is created once and shared
+# rather than per request. httpx async pools are bound to the event loop they
+# were opened on, so clients are kept per loop — in a server process that is
+# a single client.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncAnthropic]" = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def get_async_client() -> "AsyncAnthropic":
+    """Return the shared AsyncAnthropic client for the running event loop."""
+    from anthropic import AsyncAnthropic
+
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            # Retries are done by ClaudeService so they can be counted
+            client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY, max_retries=0)
+            _async_clients[loop] = client
+        return client
+
+
+async def gather_limited(aws: Iterable[Awaitable[T]], limit: int) -> list[T | BaseException]:
+    """Await ``aws`` concurrently, at most ``limit`` at a time.
+
+    Results come back in input order; an awaitable that raised contributes its
+    exception instead of cancelling the others.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(bounded(aw) for aw in aws), return_exceptions=True)
+
+
+# Rate limited (429), overloaded (529) and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504, 529}
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    from anthropic import APIConnectionError
+
+    return isinstance(exc, APIConnectionError) or getattr(exc, "status_code", None) in RETRYABLE_STATUS
+
+
+def _backoff_delay(exc: BaseException, attempt: int) -> float:
+    """Exponential backoff with jitter, at least any ``retry-after`` the API sent."""
+    delay = min(settings.AI_RETRY_BASE_DELAY * 2 ** attempt, settings.AI_RETRY_MAX_DELAY)
+    delay *= random.uniform(0.5, 1.0)
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        delay = max(delay, float(headers.get("retry-after", 0)))
+    except ValueError:
+        pass
+    return delay
+
+
+def _usage(record: CallRecord, message: Any) -> None:
+    usage = getattr(message, "usage", None)
+    for name in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+        setattr(record, name, getattr(usage, name, None) or 0)
+
 
 def _repair_json(text: str) -> dict[str, Any]:
     """Try to parse JSON, repairing common issues from LLM output."""
@@ -60,21 +139,156 @@ def _repair_json(text: str) -> dict[str, Any]:
 
 
 class ClaudeService:
-    def __init__(self):
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+    def __init__(
+        self,
+        client: Optional["AsyncAnthropic"] = None,
+        cache: Optional[LLMCache] = None,
+        bypass_cache: bool = False,
+        endpoint: str = "",
+        engagement_id: Optional[int] = None,
+        metrics: Optional[AIMetrics] = None,
+    ):
+        self.client = client or get_async_client()
         self.model = "claude-sonnet-4-5-20250929"
+        self.max_tokens = 8192
+        self.cache = cache or get_llm_cache()
+        # Skip cache reads (the fresh response still replaces the entry)
+        self.bypass_cache = bypass_cache
+        # Calls are recorded in ``metrics`` under this endpoint and engagement
+        self.endpoint = endpoint
+        self.engagement_id = engagement_id
+        self.metrics = metrics or ai_metrics
 
-    def _call_claude(self, prompt: str) -> dict[str, Any]:
-        """Make a Claude API call and parse the JSON response."""
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=8192,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        text = response.content[0].text.strip()
-        return _repair_json(text)
+    def _new_record(self) -> CallRecord:
+        return CallRecord(endpoint=self.endpoint, engagement_id=self.engagement_id, model=self.model, latency=0.0)
+
+    async def _retrying(self, call: Callable[[], Awaitable[T]], record: CallRecord) -> T:
+        """Await ``call()``, retrying rate limits and transient errors with backoff."""
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                if record.retries >= settings.AI_MAX_RETRIES or not _is_retryable(e):
+                    raise
+                delay = _backoff_delay(e, record.retries)
+                logger.warning("Claude call failed (%s); retry %d in %.1fs", e, record.retries + 1, delay)
+                record.retries += 1
+                await asyncio.sleep(delay)
+
+    async def _call_claude(self, prompt: Prompt) -> dict[str, Any]:
+        """Make a Claude API call and parse the JSON response.
+
+        The prompt's stable prefix is sent as a separate block marked for
+        prompt caching. Every call is recorded in ``self.metrics``.
+        """
+        record = self._new_record()
+        start = time.perf_counter()
+        try:
+            key = None
+            if self.cache is not None:
+                key = LLMCache.make_key(self.model, prompt.text, max_tokens=self.max_tokens)
+                if not self.bypass_cache:
+                    cached = await self.cache.aget(key)
+                    if cached is not None:
+                        record.cached = True
+                        return _repair_json(cached)
+
+            response = await self._retrying(
+                lambda: self.client.messages.create(
+                    model=self.model,
+                    max_tokens=self.max_tokens,
+                    messages=[{"role": "user", "content": prompt.content()}],
+                ),
+                record,
+            )
+            record.stop_reason = getattr(response, "stop_reason", None)
+            _usage(record, response)
+            text = response.content[0].text.strip()
+            parse_start = time.perf_counter()
+            try:
+                result = json.loads(text)
+                record.parse = "clean"
+            except json.JSONDecodeError:
+                record.parse = "repaired"
+                result = _repair_json(text)
+            finally:
+                record.parse_seconds = time.perf_counter() - parse_start
+            # Cache only complete responses that parsed; a truncated reply is
+            # worth retrying rather than replaying
+            if key is not None and record.stop_reason != "max_tokens":
+                await self.cache.aset(key, text)
+            return result
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.latency = time.perf_counter() - start
+            self.metrics.record(record)
+
+    async def _stream_claude(self, prompt: Prompt, array_key: str) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """Stream a Claude call, yielding each element of ``array_key`` as it completes.
 
-    def generate_failure_modes(
+        Yields ``("item", element)`` per array element, then one
+        ``("done", summary)``. A response cut off by ``max_tokens`` keeps the
+        elements completed so far and is reported as ``truncated``.
+        """
+        parser = JSONArrayStreamParser(array_key)
+        record = self._new_record()
+        start = time.perf_counter()
+        try:
+            key = None
+            if self.cache is not None:
+                key = LLMCache.make_key(self.model, prompt.text, max_tokens=self.max_tokens)
+                cached = None if self.bypass_cache else await self.cache.aget(key)
+                if cached is not None:
+                    record.cached = True
+                    for item in parser.feed(cached):
+                        yield "item", item
+                    yield "done", {"count": parser.items_seen, "truncated": False, "stop_reason": "end_turn", "cached": True}
+                    return
+
+            # Only opening the stream is retried; once text has been sent to
+            # the caller a failure is final
+            async with AsyncExitStack() as stack:
+                stream = await self._retrying(
+                    lambda: stack.enter_async_context(self.client.messages.stream(
+                        model=self.model,
+                        max_tokens=self.max_tokens,
+                        messages=[{"role": "user", "content": prompt.content()}],
+                    )),
+                    record,
+                )
+                async for text in stream.text_stream:
+                    for item in parser.feed(text):
+                        yield "item", item
+                final = await stream.get_final_message()
+
+            record.stop_reason = stop_reason = getattr(final, "stop_reason", None)
+            _usage(record, final)
+            record.parse = "stream"
+            if parser.items_seen == 0 and parser.text.strip():
+                # Not the expected shape; fall back to whole-document repair
+                record.parse = "repaired"
+                try:
+                    items = _repair_json(parser.text).get(array_key) or []
+                except ValueError:
+                    items = []
+                for item in items:
+                    if isinstance(item, dict):
+                        parser.items_seen += 1
+                        yield "item", item
+            truncated = stop_reason == "max_tokens" or not parser.complete
+            if key is not None and not truncated:
+                await self.cache.aset(key, parser.text.strip())
+            yield "done", {"count": parser.items_seen, "truncated": truncated, "stop_reason": stop_reason, "cached": False}
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.latency = time.perf_counter() - start
+            self.metrics.record(record)
+
+    async def generate_failure_modes(
         self,
         goods_service_name: str,
         goods_service_description: str,
@@ -98,9 +312,13 @@ class ClaudeService:
             currency=currency,
             parties=parties,
         )
-        return self._call_claude(prompt)
+        return await self._call_claude(prompt)
 
-    def estimate_loss_parameters(
+    def stream_failure_modes(self, **prompt_args: Any) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """Streaming ``generate_failure_modes``; takes the same arguments."""
+        return self._stream_claude(build_failure_mode_prompt(**prompt_args), "failure_modes")
+
+    async def estimate_loss_parameters(
         self,
         failure_mode_name: str,
         failure_mode_description: str,
@@ -128,9 +346,25 @@ class ClaudeService:
             current_mid=current_mid,
             current_high=current_high,
         )
-        return self._call_claude(prompt)
+        return await self._call_claude(prompt)
 
-    def suggest_mitigations(
+    async def estimate_loss_parameters_batch(
+        self,
+        industry: str,
+        contract_value: float,
+        currency: str,
+        failure_modes: list[dict],
+    ) -> dict[str, Any]:
+        """Refine loss estimates for several scenarios in one Claude call."""
+        prompt = build_batch_loss_estimation_prompt(
+            industry=industry,
+            contract_value=contract_value,
+            currency=currency,
+            failure_modes=failure_modes,
+        )
+        return await self._call_claude(prompt)
+
+    async def suggest_mitigations(
         self,
         failure_modes: list[dict],
         industry: str,
@@ -144,4 +378,8 @@ class ClaudeService:
             contract_value=contract_value,
             currency=currency,
         )
-        return self._call_claude(prompt)
+        return await self._call_claude(prompt)
+
+    def stream_mitigations(self, **prompt_args: Any) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """Streaming ``suggest_mitigations``; takes the same arguments."""
+        return self._stream_claude(build_mitigation_prompt(**prompt_args), "mitigations")
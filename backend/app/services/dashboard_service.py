@@ -1,25 +1,95 @@
-"""Assembles dashboard response from latest quantification runs."""
+"""Assembles dashboard response from latest quantification runs.
 
+The assembled response is materialized per engagement in ``DashboardSnapshot``
+when a quantification finishes, so reads are a single primary-key lookup.
+Writes under an engagement invalidate its snapshot when they commit: the
+engagement-scoped routers mark the request's session with
+``invalidate_on_commit`` (see ``routers.dashboard.invalidates_dashboard``),
+and the snapshot is deleted in the same transaction. The next read rebuilds
+it from the stored runs.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from typing import Optional
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
 
 from app.models.engagement import Engagement
 from app.models.quantification import QuantificationRun
 from app.models.mitigation import Mitigation
-from app.models.party import Party
+from app.models.dashboard_snapshot import DashboardSnapshot
 from app.schemas.dashboard import (
     DashboardResponse,
     ScenarioSummary,
     PartyExposureSummary,
     MitigationSummary,
 )
-from app.engine.risk_metrics import mitigation_value
+from app.observability.instruments import dashboard_cache
 
+# engagement_id -> (etag, JSON-ready payload). Entries are only served while
+# their etag matches the snapshot row, so a stale entry in another worker is
+# never used. Payloads are private copies, never the ORM's JSON attribute.
+_cache: dict[int, tuple[str, dict]] = {}
+_cache_lock = threading.Lock()
+# Session.info keys: snapshots written in the session's open transaction,
+# cached only once it commits; engagement whose snapshot every commit drops
+_PENDING = "dashboard_snapshots_pending"
+_INVALIDATE = "dashboard_invalidate_engagement"
+
+
+def _remember(engagement_id: int, etag: str, payload: dict) -> None:
+    with _cache_lock:
+        _cache[engagement_id] = (etag, copy.deepcopy(payload))
+
+
+def invalidate_on_commit(db: Session, engagement_id: int) -> None:
+    """Invalidate the engagement's dashboard with every commit of ``db``."""
+    db.info[_INVALIDATE] = engagement_id
+
+
+@event.listens_for(Session, "before_commit")
+def _invalidate_marked_dashboard(session: Session) -> None:
+    engagement_id = session.info.get(_INVALIDATE)
+    if engagement_id is not None:
+        session.flush()  # cascades first, so they don't expect a row the bulk delete removed
+        invalidate_dashboard(session, engagement_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_snapshots(session: Session) -> None:
+    for engagement_id, (etag, payload) in session.info.pop(_PENDING, {}).items():
+        _remember(engagement_id, etag, payload)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending_snapshots(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING, None)
 
-def get_dashboard(db: Session, engagement_id: int) -> DashboardResponse:
-    engagement = db.query(Engagement).filter(Engagement.id == engagement_id).first()
-    if not engagement:
-        raise ValueError("Engagement not found")
 
+def _latest_run(db: Session, engagement_id: int, is_mitigated: bool) -> Optional[QuantificationRun]:
+    return (
+        db.query(QuantificationRun)
+        .filter(QuantificationRun.engagement_id == engagement_id, QuantificationRun.is_mitigated == is_mitigated)
+        .order_by(QuantificationRun.created_at.desc(), QuantificationRun.id.desc())
+        .first()
+    )
+
+
+def build_dashboard(
+    db: Session,
+    engagement: Engagement,
+    unmit_run: Optional[QuantificationRun] = None,
+    mit_run: Optional[QuantificationRun] = None,
+) -> DashboardResponse:
+    """Assemble the dashboard from the given (or latest stored) runs."""
+    engagement_id = engagement.id
     response = DashboardResponse(
         engagement_id=engagement.id,
         engagement_name=engagement.name,
@@ -27,19 +97,9 @@ def get_dashboard(db: Session, engagement_id: int) -> DashboardResponse:
         currency=engagement.currency,
     )
 
-    # Get latest unmitigated and mitigated runs
-    unmit_run = (
-        db.query(QuantificationRun)
-        .filter(QuantificationRun.engagement_id == engagement_id, QuantificationRun.is_mitigated == False)
-        .order_by(QuantificationRun.created_at.desc())
-        .first()
-    )
-    mit_run = (
-        db.query(QuantificationRun)
-        .filter(QuantificationRun.engagement_id == engagement_id, QuantificationRun.is_mitigated == True)
-        .order_by(QuantificationRun.created_at.desc())
-        .first()
-    )
+    if unmit_run is None:
+        unmit_run = _latest_run(db, engagement_id, is_mitigated=False)
+        mit_run = _latest_run(db, engagement_id, is_mitigated=True)
 
     if not unmit_run:
         return response
@@ -90,6 +150,8 @@ def get_dashboard(db: Session, engagement_id: int) -> DashboardResponse:
             ))
 
     # Mitigation summary
+    from app.engine.risk_metrics import mitigation_value  # numpy; loaded on first use
+
     mitigations = db.query(Mitigation).filter(Mitigation.engagement_id == engagement_id).all()
     total_mit_cost = sum(m.cost for m in mitigations)
     if mit_run and unmit_run:
@@ -100,6 +162,143 @@ def get_dashboard(db: Session, engagement_id: int) -> DashboardResponse:
             cost=total_mit_cost,
             el_reduction=el_reduction,
             roi=roi,
+            var_95_reduction=unmit_run.total_var_95 - mit_run.total_var_95,
+            tvar_95_reduction=unmit_run.total_tvar_95 - mit_run.total_tvar_95,
         ))
 
+        # One row per mitigation, most valuable on top of the others first.
+        # Mitigations added since the run have no contribution yet.
+        contributions = {c["mitigation_id"]: c for c in mit_run.mitigation_contributions or []}
+        base_el = unmit_run.total_expected_loss
+
+        def roi_of(reduction: float, cost: float) -> Optional[float]:
+            return mitigation_value(base_el, base_el - reduction, cost) if cost > 0 else None
+
+        rows = [(m, contributions[m.id]) for m in mitigations if m.id in contributions]
+        for m, c in sorted(rows, key=lambda row: row[1]["loo_el_reduction"], reverse=True):
+            cost = m.cost or 0.0
+            response.mitigation_summary.append(MitigationSummary(
+                mitigation_id=m.id,
+                name=m.name,
+                cost=cost,
+                el_reduction=c["el_reduction"],
+                roi=roi_of(c["el_reduction"], cost),
+                var_95_reduction=c["var_95_reduction"],
+                tvar_95_reduction=c["tvar_95_reduction"],
+                loo_el_reduction=c["loo_el_reduction"],
+                loo_var_95_reduction=c["loo_var_95_reduction"],
+                loo_tvar_95_reduction=c["loo_tvar_95_reduction"],
+                loo_roi=roi_of(c["loo_el_reduction"], cost),
+            ))
+
     return response
+
+
+def _compute_etag(payload: dict) -> str:
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def refresh_dashboard_snapshot(
+    db: Session,
+    engagement: Engagement,
+    unmit_run: Optional[QuantificationRun] = None,
+    mit_run: Optional[QuantificationRun] = None,
+) -> tuple[str, dict]:
+    """Rebuild and store the snapshot, returning ``(etag, payload)``.
+
+    The caller commits; the in-memory cache takes the snapshot only then.
+    """
+    response = build_dashboard(db, engagement, unmit_run, mit_run)
+    payload = response.model_dump(mode="json")
+    etag = _compute_etag(payload)
+
+    _upsert_snapshot(db, engagement.id, etag, payload)
+    db.info.setdefault(_PENDING, {})[engagement.id] = (etag, payload)
+    return etag, payload
+
+
+def _upsert_snapshot(db: Session, engagement_id: int, etag: str, payload: dict) -> None:
+    """Insert or replace the snapshot row.
+
+    Concurrent readers may rebuild the same invalidated snapshot; a plain
+    get-then-add would fail the primary key for all but the first.
+    """
+    values = {"engagement_id": engagement_id, "etag": etag, "payload": payload}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(DashboardSnapshot).values(**values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[DashboardSnapshot.engagement_id],
+            set_={"etag": stmt.excluded.etag, "payload": stmt.excluded.payload},
+        ))
+    else:
+        try:
+            with db.begin_nested():
+                db.execute(insert(DashboardSnapshot).values(**values))
+        except IntegrityError:
+            db.execute(
+                update(DashboardSnapshot)
+                .where(DashboardSnapshot.engagement_id == engagement_id)
+                .values(etag=etag, payload=payload)
+            )
+    # The statements bypass the identity map
+    loaded = db.identity_map.get(identity_key(DashboardSnapshot, engagement_id))
+    if loaded is not None:
+        db.expire(loaded)
+
+
+def invalidate_dashboard(db: Session, engagement_id: int) -> None:
+    """Drop the stored snapshot so the next read rebuilds it. The caller commits."""
+    db.query(DashboardSnapshot).filter(DashboardSnapshot.engagement_id == engagement_id).delete(
+        synchronize_session=False
+    )
+    db.info.get(_PENDING, {}).pop(engagement_id, None)
+    with _cache_lock:
+        _cache.pop(engagement_id, None)
+
+
+def get_dashboard_etag(db: Session, engagement_id: int) -> Optional[str]:
+    """Current snapshot version for an engagement, or None if not materialized."""
+    row = (
+        db.query(DashboardSnapshot.etag)
+        .filter(DashboardSnapshot.engagement_id == engagement_id)
+        .first()
+    )
+    return row[0] if row else None
+
+
+def get_dashboard_snapshot(db: Session, engagement_id: int, etag: Optional[str] = None) -> tuple[str, dict]:
+    """Return ``(etag, payload)``, rebuilding the snapshot if it was invalidated.
+
+    The payload is the JSON-ready ``DashboardResponse`` dump, so the router can
+    send it without re-validating. Pass ``etag`` if the caller has just read
+    it with ``get_dashboard_etag``.
+    """
+    if etag is None:
+        etag = get_dashboard_etag(db, engagement_id)
+    if etag is not None:
+        with _cache_lock:
+            cached = _cache.get(engagement_id)
+        if cached and cached[0] == etag:
+            dashboard_cache.inc(result="memory")
+            return cached
+
+        snapshot = db.get(DashboardSnapshot, engagement_id)
+        if snapshot is not None:
+            _remember(engagement_id, snapshot.etag, snapshot.payload)
+            dashboard_cache.inc(result="snapshot")
+            return snapshot.etag, snapshot.payload
+
+    engagement = db.query(Engagement).filter(Engagement.id == engagement_id).first()
+    if not engagement:
+        raise ValueError("Engagement not found")
+
+    etag, payload = refresh_dashboard_snapshot(db, engagement)
+    db.commit()
+    dashboard_cache.inc(result="rebuild")
+    return etag, payload
+
+
+def get_dashboard(db: Session, engagement_id: int) -> DashboardResponse:
+    return DashboardResponse.model_validate(get_dashboard_snapshot(db, engagement_id)[1])
@@ -0,0 +1,187 @@
+"""Export, import and deep-clone engagement model graphs.
+
+An export is a single JSON document holding the engagement with its parties,
+goods/services, failure modes (with loss scenarios) and mitigations (with
+failure mode links). Quantification runs are derived data and are not
+copied. Rows are read with column-level selects and written with bulk
+inserts, remapping the document's ids to the new primary keys as each table
+is inserted, so a clone is a handful of statements in one transaction.
+"""
+
+import enum
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.engagement import Engagement
+from app.models.party import Party
+from app.models.goods_service import GoodsService
+from app.models.failure_mode import FailureMode
+from app.models.loss_scenario import LossScenario
+from app.models.mitigation import Mitigation, FailureModeMitigation
+from app.schemas.engagement import EngagementCreate
+from app.schemas.party import PartyCreate
+from app.schemas.goods_service import GoodsServiceCreate
+from app.schemas.failure_mode import FailureModeCreate
+from app.schemas.loss_scenario import LossScenarioCreate
+from app.schemas.mitigation import MitigationCreate, FailureModeMitigationLink
+from app.schemas.engagement_transfer import EXPORT_FORMAT_VERSION
+from app.services.bulk_service import bulk_insert
+
+
+class TransferError(ValueError):
+    """An import document is inconsistent (e.g. a dangling reference)."""
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _select_rows(db: Session, columns: Iterable, stmt_filter) -> list[dict]:
+    stmt = stmt_filter(select(*columns))
+    return [{k: _plain(v) for k, v in row.items()} for row in db.execute(stmt).mappings()]
+
+
+def _columns(model, schema, *extra: str) -> list:
+    table = model.__table__
+    return [table.c.id] + [table.c[name] for name in (*schema.model_fields, *extra)]
+
+
+def export_engagement(db: Session, engagement_id: int) -> dict[str, Any]:
+    """Export an engagement's model graph as a JSON-ready dict."""
+    engagement = _select_rows(
+        db,
+        [Engagement.__table__.c[name] for name in EngagementCreate.model_fields],
+        lambda s: s.where(Engagement.id == engagement_id),
+    )
+    if not engagement:
+        raise ValueError("Engagement not found")
+
+    parties = _select_rows(
+        db, _columns(Party, PartyCreate),
+        lambda s: s.where(Party.engagement_id == engagement_id).order_by(Party.id),
+    )
+    goods_services = _select_rows(
+        db, _columns(GoodsService, GoodsServiceCreate),
+        lambda s: s.where(GoodsService.engagement_id == engagement_id).order_by(GoodsService.id),
+    )
+    failure_modes = _select_rows(
+        db, _columns(FailureMode, FailureModeCreate),
+        lambda s: s.where(FailureMode.engagement_id == engagement_id).order_by(FailureMode.id),
+    )
+    scenarios = _select_rows(
+        db, _columns(LossScenario, LossScenarioCreate, "failure_mode_id"),
+        lambda s: s.join(FailureMode, LossScenario.failure_mode_id == FailureMode.id)
+        .where(FailureMode.engagement_id == engagement_id)
+        .order_by(LossScenario.id),
+    )
+    mitigations = _select_rows(
+        db, _columns(Mitigation, MitigationCreate),
+        lambda s: s.where(Mitigation.engagement_id == engagement_id).order_by(Mitigation.id),
+    )
+    links = _select_rows(
+        db,
+        [FailureModeMitigation.__table__.c[name] for name in (*FailureModeMitigationLink.model_fields, "mitigation_id")],
+        lambda s: s.join(Mitigation, FailureModeMitigation.mitigation_id == Mitigation.id)
+        .where(Mitigation.engagement_id == engagement_id)
+        .order_by(FailureModeMitigation.id),
+    )
+
+    scenarios_by_fm: dict[int, list[dict]] = {fm["id"]: [] for fm in failure_modes}
+    for scenario in scenarios:
+        scenarios_by_fm[scenario.pop("failure_mode_id")].append(scenario)
+    for fm in failure_modes:
+        fm["loss_scenarios"] = scenarios_by_fm[fm["id"]]
+
+    links_by_mitigation: dict[int, list[dict]] = {m["id"]: [] for m in mitigations}
+    for link in links:
+        links_by_mitigation[link.pop("mitigation_id")].append(link)
+    for mitigation in mitigations:
+        mitigation["links"] = links_by_mitigation[mitigation["id"]]
+
+    return {
+        "format_version": EXPORT_FORMAT_VERSION,
+        "engagement": engagement[0],
+        "parties": parties,
+        "goods_services": goods_services,
+        "failure_modes": failure_modes,
+        "mitigations": mitigations,
+    }
+
+
+def _remap(id_map: dict[int, int], old_id: Optional[int], label: str, nullable: bool = False) -> Optional[int]:
+    if old_id is None and nullable:
+        return None
+    try:
+        return id_map[old_id]
+    except KeyError:
+        raise TransferError(f"Reference to unknown {label} id {old_id}") from None
+
+
+def _insert_remapped(db: Session, model, rows: list[dict]) -> dict[int, int]:
+    """Bulk insert rows (dropping their ``id``) and map old ids to new ones."""
+    if len({row["id"] for row in rows}) != len(rows):
+        raise TransferError(f"Duplicate ids in {model.__tablename__}")
+    new_ids = bulk_insert(db, model, [{k: v for k, v in row.items() if k != "id"} for row in rows])
+    return {row["id"]: new_id for row, new_id in zip(rows, new_ids)}
+
+
+def import_engagement(db: Session, document: dict[str, Any], name: Optional[str] = None) -> Engagement:
+    """Create a new engagement from an export document. The caller commits."""
+    version = document.get("format_version")
+    if version != EXPORT_FORMAT_VERSION:
+        raise TransferError(
+            f"Unsupported format_version {version}; this server imports version {EXPORT_FORMAT_VERSION}"
+        )
+    fields = dict(document["engagement"])
+    if name:
+        fields["name"] = name
+    engagement = Engagement(**fields)
+    db.add(engagement)
+    db.flush()
+    eid = engagement.id
+
+    party_map = _insert_remapped(db, Party, [{**p, "engagement_id": eid} for p in document["parties"]])
+    gs_map = _insert_remapped(db, GoodsService, [{**g, "engagement_id": eid} for g in document["goods_services"]])
+
+    failure_modes = document["failure_modes"]
+    fm_map = _insert_remapped(db, FailureMode, [
+        {
+            **{k: v for k, v in fm.items() if k != "loss_scenarios"},
+            "engagement_id": eid,
+            "goods_service_id": _remap(gs_map, fm.get("goods_service_id"), "goods/service", nullable=True),
+        }
+        for fm in failure_modes
+    ])
+    bulk_insert(db, LossScenario, [
+        {
+            **{k: v for k, v in ls.items() if k != "id"},
+            "failure_mode_id": fm_map[fm["id"]],
+            "affected_party_id": _remap(party_map, ls["affected_party_id"], "party"),
+        }
+        for fm in failure_modes
+        for ls in fm.get("loss_scenarios", [])
+    ])
+
+    mitigations = document["mitigations"]
+    mit_map = _insert_remapped(db, Mitigation, [
+        {**{k: v for k, v in m.items() if k != "links"}, "engagement_id": eid}
+        for m in mitigations
+    ])
+    bulk_insert(db, FailureModeMitigation, [
+        {
+            **link,
+            "mitigation_id": mit_map[m["id"]],
+            "failure_mode_id": _remap(fm_map, link["failure_mode_id"], "failure mode"),
+        }
+        for m in mitigations
+        for link in m.get("links", [])
+    ])
+    return engagement
+
+
+def clone_engagement(db: Session, engagement_id: int, name: Optional[str] = None) -> Engagement:
+    """Deep-copy an engagement's model graph. The caller commits."""
+    document = export_engagement(db, engagement_id)
+    return import_engagement(db, document, name or f"{document['engagement']['name']} (copy)")
@@ -0,0 +1,121 @@
+"""Incremental extraction of array elements from a streamed JSON document.
+
+LLM responses have the shape ``{"<key>": [{...}, {...}, ...], ...}``. The
+parser is fed text chunks as they arrive and returns each object element of
+the ``<key>`` array as soon as its closing brace is seen, so callers can act
+on the first element long before the response is complete. Every character
+is scanned once and only the unfinished element (or key) is kept for
+rescanning, so feeding is linear in the response length. Text before the
+first ``{`` (code fences, prose, even prose quoting ``"`` or ``[``) is
+ignored. If the stream stops mid-element, the elements already returned stand
+and the partial one is dropped.
+"""
+
+import json
+from typing import Any, Optional
+
+
+class JSONArrayStreamParser:
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.items_seen = 0
+        self._chunks: list[str] = []
+        # Unconsumed tail of the stream, from the earliest offset still needed
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._in_array = False
+        self._array_done = False
+        self._element_start: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        """True once the target array's closing bracket has been seen."""
+        return self._array_done
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        """Consume ``chunk`` and return the array elements it completed."""
+        self._chunks.append(chunk)
+        found = []
+        text = self._buf + chunk
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._depth == 0:
+                # Outside the top-level object only its opening brace counts
+                if ch == "{":
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start:i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif ch == ":" and self._depth == 1:
+                self._current_key = self._last_string
+            elif ch in "{[":
+                if (
+                    ch == "{" and self._in_array and self._depth == 2
+                    and self._element_start is None
+                ):
+                    self._element_start = i
+                elif (
+                    ch == "[" and self._depth == 1 and not self._array_done
+                    and self._current_key == self.array_key
+                ):
+                    self._in_array = True
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._in_array and self._depth == 2 and ch == "}" and self._element_start is not None:
+                    element = self._parse(text[self._element_start:i + 1])
+                    self._element_start = None
+                    if element is not None:
+                        found.append(element)
+                elif self._in_array and self._depth == 1 and ch == "]":
+                    self._in_array = False
+                    self._array_done = True
+        self._consume(text)
+        self.items_seen += len(found)
+        return found
+
+    def _consume(self, text: str) -> None:
+        """Keep only the part of ``text`` a later chunk can still need."""
+        keep = len(text)
+        if self._element_start is not None:
+            keep = self._element_start
+        elif self._in_string:
+            keep = self._string_start
+        self._buf = text[keep:]
+        self._pos = len(text) - keep
+        if self._element_start is not None:
+            self._element_start -= keep
+        self._string_start -= keep
+
+    @staticmethod
+    def _parse(fragment: str) -> Optional[dict[str, Any]]:
+        try:
+            value = json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
@@ -0,0 +1,126 @@
+"""Batched loss-parameter estimation.
+
+Scenarios are grouped into prompts of at most ``AI_ESTIMATE_BATCH_SIZE``,
+keeping each failure mode's scenarios together so its description is sent
+once per prompt, and the engagement context once per prompt rather than per
+scenario. Prompts are sent concurrently (bounded by ``AI_MAX_CONCURRENCY``)
+and accepted estimates are written back with one bulk UPDATE.
+"""
+
+from itertools import groupby
+from typing import Any, Sequence
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.loss_scenario import DistributionType, LossScenario
+from app.services.claude_service import ClaudeService, gather_limited
+
+ESTIMATE_FIELDS = ("severity_low", "severity_mid", "severity_high", "distribution_type")
+_DISTRIBUTIONS = {d.value for d in DistributionType}
+
+
+def scenario_input(ls: LossScenario) -> dict[str, Any]:
+    """Prompt fields for one scenario; needs ``failure_mode`` and ``affected_party`` loaded."""
+    party = ls.affected_party
+    return {
+        "scenario_id": ls.id,
+        "failure_mode_id": ls.failure_mode_id,
+        "failure_mode_name": ls.failure_mode.name,
+        "failure_mode_description": ls.failure_mode.description,
+        "loss_category": ls.loss_category,
+        "affected_party_name": party.name if party else "Unknown",
+        "affected_party_role": party.role.value if party and hasattr(party.role, "value") else "unknown",
+        "current_low": ls.severity_low,
+        "current_mid": ls.severity_mid,
+        "current_high": ls.severity_high,
+    }
+
+
+def chunk_scenarios(scenarios: Sequence[dict], size: int) -> list[list[dict]]:
+    """Split scenarios into prompt-sized groups ordered by failure mode."""
+    ordered = sorted(scenarios, key=lambda s: (s["failure_mode_id"], s["scenario_id"]))
+    return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+
+def _prompt_failure_modes(chunk: Sequence[dict]) -> list[dict]:
+    return [
+        {
+            "name": group[0]["failure_mode_name"],
+            "description": group[0]["failure_mode_description"],
+            "scenarios": group,
+        }
+        for group in (list(g) for _, g in groupby(chunk, key=lambda s: s["failure_mode_id"]))
+    ]
+
+
+def validate_estimate(estimate: dict) -> dict[str, Any]:
+    """Return the writable fields of an estimate, or raise ValueError."""
+    try:
+        low, mid, high = (float(estimate[k]) for k in ("severity_low", "severity_mid", "severity_high"))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("missing or non-numeric severity") from None
+    if not 0 <= low <= mid <= high:
+        raise ValueError(f"severities must satisfy 0 <= low <= mid <= high (got {low}, {mid}, {high})")
+    distribution = estimate.get("distribution_type", "lognormal")
+    if distribution not in _DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution_type {distribution!r}")
+    return {"severity_low": low, "severity_mid": mid, "severity_high": high, "distribution_type": distribution}
+
+
+async def estimate_losses_batch(
+    service: ClaudeService,
+    context: dict[str, Any],
+    scenarios: Sequence[dict],
+    batch_size: int,
+    concurrency: int,
+) -> tuple[list[dict], list[str]]:
+    """Estimate every scenario, ``batch_size`` per call, calls in parallel.
+
+    ``context`` holds ``industry``, ``contract_value`` and ``currency``.
+    Returns validated estimates (with ``loss_scenario_id``, ``confidence``
+    and ``reasoning``) and human-readable errors for scenarios that could
+    not be estimated; one failed call does not discard the others.
+    """
+    chunks = chunk_scenarios(scenarios, batch_size)
+    outcomes = await gather_limited(
+        (service.estimate_loss_parameters_batch(failure_modes=_prompt_failure_modes(chunk), **context) for chunk in chunks),
+        concurrency,
+    )
+
+    estimates: list[dict] = []
+    errors: list[str] = []
+    for chunk, outcome in zip(chunks, outcomes):
+        ids = [s["scenario_id"] for s in chunk]
+        if isinstance(outcome, BaseException):
+            errors.append(f"Claude API error for scenarios {ids}: {outcome}")
+            continue
+        by_id = {}
+        for estimate in outcome.get("estimates") or []:
+            if isinstance(estimate, dict) and estimate.get("scenario_id") in ids:
+                by_id[estimate["scenario_id"]] = estimate
+        for scenario_id in ids:
+            estimate = by_id.get(scenario_id)
+            if estimate is None:
+                errors.append(f"No estimate returned for scenario {scenario_id}")
+                continue
+            try:
+                fields = validate_estimate(estimate)
+            except ValueError as e:
+                errors.append(f"Rejected estimate for scenario {scenario_id}: {e}")
+                continue
+            estimates.append({
+                "loss_scenario_id": scenario_id,
+                **fields,
+                "confidence": estimate.get("confidence"),
+                "reasoning": estimate.get("reasoning", ""),
+            })
+    return estimates, errors
+
+
+def apply_loss_estimates(db: Session, estimates: Sequence[dict]) -> int:
+    """Write estimates back in one bulk UPDATE by primary key. The caller commits."""
+    rows = [{"id": e["loss_scenario_id"], **{k: e[k] for k in ESTIMATE_FIELDS}} for e in estimates]
+    if rows:
+        db.execute(update(LossScenario), rows)
+    return len(rows)
@@ -0,0 +1,124 @@
+"""Map-reduce mitigation suggestions for engagements with many failure modes.
+
+One prompt covering every failure mode grows with the engagement and, past a
+few dozen modes, runs into ``max_tokens`` or takes minutes. Instead, failure
+modes are split into chunks of at most ``AI_MITIGATION_CHUNK_SIZE``, keeping
+each category together where it fits so a chunk's mitigations can address
+related risks. Chunks are queried concurrently (bounded by
+``AI_MAX_CONCURRENCY``), so latency is that of the slowest chunk, and the
+suggestions are merged here: mitigations with the same name are combined,
+and links are kept only to failure modes that exist.
+"""
+
+import re
+from collections import defaultdict
+from typing import Any, Sequence
+
+from app.services.claude_service import ClaudeService, gather_limited
+
+_STOPWORDS = {"a", "an", "and", "for", "of", "the", "to", "with"}
+
+
+def chunk_failure_modes(failure_modes: Sequence[dict], size: int) -> list[list[dict]]:
+    """Split failure modes into category-coherent chunks of at most ``size``.
+
+    Categories are packed largest first; a category larger than ``size`` is
+    split across chunks of its own.
+    """
+    by_category: dict[str, list[dict]] = defaultdict(list)
+    for fm in failure_modes:
+        by_category[fm.get("category") or ""].append(fm)
+
+    chunks: list[list[dict]] = []
+    for category in sorted(by_category, key=lambda c: (-len(by_category[c]), c)):
+        group = by_category[category]
+        if len(group) >= size:
+            full = len(group) - len(group) % size
+            chunks.extend(group[i:i + size] for i in range(0, full, size))
+            group = group[full:]
+            if not group:
+                continue
+        target = next((c for c in chunks if len(c) + len(group) <= size), None)
+        if target is None:
+            chunks.append(list(group))
+        else:
+            target.extend(group)
+    return chunks
+
+
+def _name_key(name: str) -> str:
+    words = re.findall(r"[a-z0-9]+", name.lower())
+    return " ".join(sorted(w for w in words if w not in _STOPWORDS))
+
+
+def merge_mitigations(results: Sequence[dict], failure_mode_names: Sequence[str]) -> list[dict]:
+    """Combine per-chunk suggestions into one deduplicated, linked set.
+
+    Mitigations whose names match (ignoring case, punctuation, word order and
+    filler words) are merged: their failure mode links are unioned, keeping
+    the larger reduction factors where both link the same failure mode, and
+    the higher cost estimate is kept. Links to names that are not failure
+    modes of the engagement are dropped, as are mitigations left without any.
+    """
+    canonical = {name.strip().lower(): name for name in failure_mode_names}
+    merged: dict[str, dict] = {}
+    for result in results:
+        for mitigation in result.get("mitigations") or []:
+            if not isinstance(mitigation, dict) or not mitigation.get("name"):
+                continue
+            links = {}
+            for link in mitigation.get("applicable_failure_modes") or []:
+                name = canonical.get(str(link.get("failure_mode_name", "")).strip().lower())
+                if name is not None:
+                    links[name] = {**link, "failure_mode_name": name}
+            if not links:
+                continue
+
+            key = _name_key(mitigation["name"])
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = {**mitigation, "applicable_failure_modes": links}
+                continue
+            existing["estimated_cost"] = max(existing.get("estimated_cost") or 0, mitigation.get("estimated_cost") or 0)
+            for name, link in links.items():
+                previous = existing["applicable_failure_modes"].get(name)
+                if previous is None:
+                    existing["applicable_failure_modes"][name] = link
+                else:
+                    for factor in ("frequency_reduction", "severity_reduction"):
+                        previous[factor] = max(previous.get(factor) or 0, link.get(factor) or 0)
+
+    return [
+        {**mitigation, "applicable_failure_modes": list(mitigation["applicable_failure_modes"].values())}
+        for mitigation in merged.values()
+    ]
+
+
+async def suggest_mitigations_map_reduce(
+    service: ClaudeService,
+    prompt_args: dict[str, Any],
+    chunk_size: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    """``suggest_mitigations`` over chunks of failure modes, merged.
+
+    Returns ``{"mitigations": [...], "chunks": n, "errors": [...]}``. A
+    failed chunk is reported in ``errors``; if every chunk fails the first
+    error is raised.
+    """
+    failure_modes = prompt_args["failure_modes"]
+    chunks = chunk_failure_modes(failure_modes, chunk_size)
+    outcomes = await gather_limited(
+        (service.suggest_mitigations(**{**prompt_args, "failure_modes": chunk}) for chunk in chunks),
+        concurrency,
+    )
+    failures = [o for o in outcomes if isinstance(o, BaseException)]
+    if failures and len(failures) == len(outcomes):
+        raise failures[0]
+    results = [o for o in outcomes if not isinstance(o, BaseException)]
+    return {
+        "mitigations": merge_mitigations(results, [fm["name"] for fm in failure_modes]),
+        "chunks": len(chunks),
+        "errors": [f"Claude API error for {len(chunk)} failure modes: {o}"
+                   for chunk, o in zip(chunks, outcomes) if isinstance(o, BaseException)],
+    }
@@ -0,0 +1,69 @@
+"""Mitigation portfolio optimization for an engagement.
+
+Reads the engagement's model and mitigation costs, samples one set of
+unmitigated draws and searches subsets of mitigations against it (see
+``app.engine.portfolio``). The search is CPU-bound and runs on the
+simulation executor; nothing is stored.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.mitigation import Mitigation
+from app.schemas.mitigation import MitigationPortfolio, MitigationPortfolioResponse
+
+if TYPE_CHECKING:
+    from app.engine.monte_carlo import FailureModeInput
+    from app.engine.portfolio import MitigationOption, Portfolio
+
+
+def load_mitigation_options(db: Session, engagement_id: int) -> list[MitigationOption]:
+    from app.engine.portfolio import MitigationOption
+
+    mitigations = db.query(Mitigation).filter(Mitigation.engagement_id == engagement_id).all()
+    return [MitigationOption(mitigation_id=m.id, name=m.name, cost=m.cost or 0.0) for m in mitigations]
+
+
+def optimize_mitigations(
+    fm_inputs: list[FailureModeInput],
+    options: list[MitigationOption],
+    num_simulations: int,
+    budget: Optional[float] = None,
+    objective: str = "expected_loss",
+    seed: Optional[int] = None,
+) -> MitigationPortfolioResponse:
+    """Best subset of ``options`` within ``budget`` and the cost/reduction frontier."""
+    from app.engine.portfolio import CommonDraws, optimize_portfolio
+
+    draws = CommonDraws.sample(fm_inputs, num_simulations, seed)
+    result = optimize_portfolio(draws, options, budget, objective)
+    names = {o.mitigation_id: o.name for o in options}
+    baseline_el = result.baseline.expected_loss
+
+    def portfolio(p: Portfolio) -> MitigationPortfolio:
+        from app.engine.risk_metrics import mitigation_value
+
+        return MitigationPortfolio(
+            mitigation_ids=list(p.mitigation_ids),
+            names=[names[m] for m in p.mitigation_ids],
+            cost=p.cost,
+            expected_loss=p.expected_loss,
+            tvar_95=p.tvar_95,
+            expected_loss_reduction=p.expected_loss_reduction,
+            tvar_95_reduction=p.tvar_95_reduction,
+            roi=mitigation_value(baseline_el, p.expected_loss, p.cost) if p.cost > 0 else None,
+        )
+
+    return MitigationPortfolioResponse(
+        objective=result.objective,
+        budget=result.budget,
+        num_simulations=num_simulations,
+        baseline=portfolio(result.baseline),
+        best=portfolio(result.best),
+        frontier=[portfolio(p) for p in result.frontier],
+        evaluations=result.evaluations,
+        exhaustive=result.exhaustive,
+    )
@@ -1,27 +1,43 @@
-"""Orchestrates quantification: reads DB → builds engine inputs → runs simulation → stores results."""
+"""Orchestrates quantification: reads DB → builds engine inputs → runs simulation → stores results.
 
-from sqlalchemy.orm import Session
+Each stage is timed into a ``RunProfile``, which is persisted on the stored
+runs as ``timings`` and ``peak_memory_bytes``. Both runs come from one set
+of draws, on which the mitigated run also stores what each mitigation
+contributes (``attribute_mitigations``).
+
+The engine (numpy) is imported inside the functions that use it, so that
+importing the app does not pay for it; the first run does.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, Optional
+
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.models.engagement import Engagement
 from app.models.failure_mode import FailureMode
-from app.models.quantification import QuantificationRun, QuantificationResult
-from app.engine.monte_carlo import (
-    FailureModeInput,
-    LossScenarioInput,
-    MitigationEffect,
-    SimulationConfig,
-    run_simulation,
-)
-from app.engine.risk_metrics import (
-    compute_metrics,
-    risk_asymmetry_ratio,
-    generate_histogram,
-)
-from app.engine.loss_aggregator import aggregate_results
+from app.models.mitigation import FailureModeMitigation
+from app.models.quantification import QuantificationRun, QuantificationResult, QuantificationRunArtifact
+from app.config import settings
+from app.observability import record_simulation
+from app.services.dashboard_service import refresh_dashboard_snapshot
+from app.services.run_profile import RunProfile
+
+if TYPE_CHECKING:
+    from app.engine.monte_carlo import FailureModeInput, SimulationResult
+    from app.engine.portfolio import CommonDraws
+
+
+class SimulationLimitError(ValueError):
+    """A run request exceeds the configured trial or sample caps."""
 
 
 def build_engine_inputs(engagement: Engagement) -> list[FailureModeInput]:
     """Build engine input dataclasses from DB models."""
+    from app.engine.monte_carlo import FailureModeInput, LossScenarioInput, MitigationEffect
+
     inputs = []
     for fm in engagement.failure_modes:
         if not fm.is_included:
@@ -59,35 +75,142 @@ def build_engine_inputs(engagement: Engagement) -> list[FailureModeInput]:
     return inputs
 
 
-def run_quantification(
+def load_engine_inputs(
+    db: Session, engagement_id: int, profile: Optional[RunProfile] = None
+) -> tuple[list[FailureModeInput], float]:
+    """Read an engagement's model into engine inputs and its contract value."""
+    profile = profile or RunProfile()
+    with profile.stage("load_inputs"):
+        # Eager-load the model in one query per table; lazy loads in
+        # build_engine_inputs would cost three queries per failure mode
+        engagement = (
+            db.query(Engagement)
+            .options(
+                selectinload(Engagement.failure_modes).selectinload(FailureMode.loss_scenarios),
+                selectinload(Engagement.failure_modes)
+                .selectinload(FailureMode.failure_mode_mitigations)
+                .joinedload(FailureModeMitigation.mitigation),
+            )
+            .filter(Engagement.id == engagement_id)
+            .first()
+        )
+        if not engagement:
+            raise ValueError("Engagement not found")
+        fm_inputs = build_engine_inputs(engagement)
+    if not fm_inputs:
+        raise ValueError("No failure modes with loss scenarios to simulate")
+    return fm_inputs, engagement.contract_value or 0
+
+
+def check_simulation_limits(fm_inputs: list[FailureModeInput], num_simulations: int) -> None:
+    """Reject runs whose trial count or memory footprint exceeds the caps."""
+    if num_simulations > settings.SIMULATION_MAX_TRIALS:
+        raise SimulationLimitError(
+            f"num_simulations may not exceed {settings.SIMULATION_MAX_TRIALS:,}"
+        )
+    n_scenarios = sum(len(fm.loss_scenarios) for fm in fm_inputs)
+    if num_simulations * n_scenarios > settings.SIMULATION_MAX_SAMPLES:
+        raise SimulationLimitError(
+            f"{num_simulations:,} trials x {n_scenarios} loss scenarios exceeds the limit of "
+            f"{settings.SIMULATION_MAX_SAMPLES:,} samples; reduce num_simulations"
+        )
+
+
+def attribute_mitigations(draws: CommonDraws, profile: Optional[RunProfile] = None) -> list[dict[str, Any]]:
+    """Add-one and leave-one-out loss reductions of each mitigation. Pure CPU.
+
+    ``draws`` are the runs' own (see ``simulate_and_attribute``), so the
+    reductions are of the stored runs' events rather than of a separate
+    simulation.
+    """
+    if not draws.mitigation_ids():
+        return []
+    profile = profile or RunProfile()
+    with profile.stage("attribution"):
+        contributions = [asdict(c) for c in draws.contributions()]
+    profile.record_peak_memory()
+    return contributions
+
+
+def simulate_and_attribute(
+    fm_inputs: list[FailureModeInput],
+    num_simulations: int,
+    profile: Optional[RunProfile] = None,
+    profiler: Optional[str] = None,
+) -> tuple[tuple[SimulationResult, SimulationResult], list[dict[str, Any]]]:
+    """Run the unmitigated and mitigated simulations and ``attribute_mitigations``
+    on their shared draws, as one executor job. Pure CPU, no database."""
+    profile = profile or RunProfile()
+    unmitigated, mitigated, draws = _simulate(fm_inputs, num_simulations, profile, profiler)
+    return (unmitigated, mitigated), attribute_mitigations(draws, profile)
+
+
+def _simulate(
+    fm_inputs: list[FailureModeInput],
+    num_simulations: int,
+    profile: RunProfile,
+    profiler: Optional[str],
+) -> tuple[SimulationResult, SimulationResult, CommonDraws]:
+    """Both runs from one pass over shared draws (``engine.portfolio``).
+
+    With ``profiler`` (one of ``run_profiler.PROFILERS``) the pass is
+    profiled and its output kept in ``profile.artifacts``.
+    """
+    from app.engine.portfolio import simulate_on_common_draws
+    from app.services.run_profiler import make_profiler
+
+    before = profile.stages.get("simulate", 0.0)
+    hook = make_profiler(profiler) if profiler else None
+    with profile.stage("simulate"):
+        result = simulate_on_common_draws(fm_inputs, num_simulations, hook=hook)
+    if hook is not None:
+        profile.profiler = profiler
+        profile.artifacts = hook.artifacts
+    profile.record_peak_memory()
+    record_simulation(num_simulations, profile.stages["simulate"] - before)
+    return result
+
+
+def store_quantification(
     db: Session,
     engagement_id: int,
-    num_simulations: int = 10000,
+    num_simulations: int,
+    results: tuple[SimulationResult, SimulationResult],
+    contract_value: float,
+    profile: Optional[RunProfile] = None,
+    contributions: Optional[list[dict[str, Any]]] = None,
 ) -> tuple[QuantificationRun, QuantificationRun]:
-    """Run both unmitigated and mitigated simulations, store results."""
-    engagement = db.query(Engagement).filter(Engagement.id == engagement_id).first()
+    """Store both runs, refresh the dashboard snapshot and commit.
+
+    The returned runs have their ``results`` loaded and carry ``profile``'s
+    timings, completed with the storage stages. ``contributions`` from
+    ``attribute_mitigations`` and any profiler artifacts are stored on the
+    mitigated run.
+    """
+    profile = profile or RunProfile()
+    engagement = db.get(Engagement, engagement_id)
     if not engagement:
         raise ValueError("Engagement not found")
 
-    fm_inputs = build_engine_inputs(engagement)
-    if not fm_inputs:
-        raise ValueError("No failure modes with loss scenarios to simulate")
-
-    contract_value = engagement.contract_value or 0
-
-    # Unmitigated run
-    config_unmit = SimulationConfig(n_simulations=num_simulations, apply_mitigations=False)
-    result_unmit = run_simulation(fm_inputs, config_unmit)
-    unmit_run = _store_run(db, engagement_id, num_simulations, False, result_unmit, contract_value)
-
-    # Mitigated run
-    config_mit = SimulationConfig(n_simulations=num_simulations, apply_mitigations=True)
-    result_mit = run_simulation(fm_inputs, config_mit)
-    mit_run = _store_run(db, engagement_id, num_simulations, True, result_mit, contract_value)
+    result_unmit, result_mit = results
+    unmit_run = _store_run(db, engagement_id, num_simulations, False, result_unmit, contract_value, profile)
+    mit_run = _store_run(db, engagement_id, num_simulations, True, result_mit, contract_value, profile)
+    mit_run.mitigation_contributions = contributions
 
+    with profile.stage("dashboard"):
+        refresh_dashboard_snapshot(db, engagement, unmit_run, mit_run)
+        db.flush()
+    for run, sim_result in ((unmit_run, result_unmit), (mit_run, result_mit)):
+        run.timings = profile.timings(sim_result)
+        run.peak_memory_bytes = profile.peak_memory_bytes
+    for artifact in profile.artifacts:
+        db.add(QuantificationRunArtifact(
+            run_id=mit_run.id, name=artifact.name, media_type=artifact.media_type, content=artifact.content,
+        ))
     db.commit()
-    db.refresh(unmit_run)
-    db.refresh(mit_run)
+    for run in (unmit_run, mit_run):
+        db.refresh(run)
+        run.results  # load while a session is guaranteed to be usable
     return unmit_run, mit_run
 
 
@@ -98,11 +221,30 @@ def _store_run(
     is_mitigated: bool,
     sim_result,
     contract_value: float,
+    profile: RunProfile,
 ) -> QuantificationRun:
     """Store simulation results in the database."""
-    agg = aggregate_results(sim_result)
+    with profile.stage("store"):
+        return _store_run_rows(db, engagement_id, num_simulations, is_mitigated, sim_result, contract_value, profile)
+
+
+def _store_run_rows(
+    db: Session,
+    engagement_id: int,
+    num_simulations: int,
+    is_mitigated: bool,
+    sim_result,
+    contract_value: float,
+    profile: RunProfile,
+) -> QuantificationRun:
+    from app.engine.loss_aggregator import aggregate_results
+    from app.engine.risk_metrics import compute_metrics, generate_histogram, risk_asymmetry_ratio
+
+    with profile.stage("aggregate"):
+        agg = aggregate_results(sim_result)
     total_metrics = agg.total_metrics
-    hist_bins, hist_counts = generate_histogram(sim_result.total_losses)
+    with profile.stage("histograms"):
+        hist_bins, hist_counts = generate_histogram(sim_result.total_losses)
 
     run = QuantificationRun(
         engagement_id=engagement_id,
@@ -127,8 +269,10 @@ def _store_run(
         )
         if fm_result is None:
             continue
-        fm_metrics = compute_metrics(fm_result.total_losses)
-        fm_bins, fm_counts = generate_histogram(fm_result.total_losses)
+        with profile.stage("aggregate"):
+            fm_metrics = compute_metrics(fm_result.total_losses)
+        with profile.stage("histograms"):
+            fm_bins, fm_counts = generate_histogram(fm_result.total_losses)
         db.add(QuantificationResult(
             run_id=run.id,
             failure_mode_id=rs.failure_mode_id,
@@ -149,12 +293,13 @@ def _store_run(
 
     # Per party results
     for party_id, pe in agg.party_exposures.items():
-        p_bins, p_counts = generate_histogram(
-            next(
-                fr.total_losses for fr in sim_result.failure_mode_results
-                if any(sr.party_id == party_id for sr in fr.scenario_results)
-            ) if sim_result.failure_mode_results else __import__('numpy').zeros(0)
-        )
+        with profile.stage("histograms"):
+            p_bins, p_counts = generate_histogram(
+                next(
+                    fr.total_losses for fr in sim_result.failure_mode_results
+                    if any(sr.party_id == party_id for sr in fr.scenario_results)
+                ) if sim_result.failure_mode_results else __import__('numpy').zeros(0)
+            )
         db.add(QuantificationResult(
             run_id=run.id,
             party_id=party_id,
@@ -173,4 +318,5 @@ def _store_run(
             histogram_counts=p_counts,
         ))
 
+    db.flush()
     return run
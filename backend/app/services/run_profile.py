@@ -0,0 +1,92 @@
+"""Per-stage timing and peak memory of a quantification request.
+
+A ``RunProfile`` travels with one run request through loading, simulation
+and storage; each stage adds its wall-clock seconds, and the totals are
+persisted on both ``QuantificationRun`` rows the request produces. Timing
+costs a ``perf_counter`` call per stage. The final ``COMMIT`` is the one
+step not covered, since the timings are part of what it writes; ``store``
+includes flushing the inserts.
+
+Peak memory is the process's peak resident set size (``getrusage``) read
+after the simulation: a high-water mark since the process started, so it
+shows when a run pushed the worker's memory up, at no cost to the run.
+Allocation-level detail is the ``tracemalloc`` profiler's job (see
+``run_profiler``), opted into per request, since tracing slows every
+allocation in the process.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+if TYPE_CHECKING:
+    from app.engine.monte_carlo import SimulationResult
+
+STAGES = ("load_inputs", "simulate", "attribution", "aggregate", "histograms", "store", "dashboard")
+# Slowest failure modes kept per run, so large engagements stay small on the wire
+SLOWEST_FAILURE_MODES = 10
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of the process so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+@dataclass
+class RunProfile:
+    stages: dict[str, float] = field(default_factory=dict)  # seconds
+    peak_memory_bytes: Optional[int] = None
+    # Set when the simulation ran under a profiler, whose overhead is then
+    # part of the simulate stage; its artifacts are stored once, on the
+    # mitigated run
+    profiler: Optional[str] = None
+    artifacts: list = field(default_factory=list)
+    _nested: list[float] = field(default_factory=list, repr=False)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to stage ``name``.
+
+        Stages nest: time spent in an inner stage is not counted again in the
+        outer one, so the stages add up to the total.
+        """
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            inner = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed - inner
+
+    def record_peak_memory(self) -> None:
+        """Record the process's peak resident set size as of now."""
+        peak = peak_rss_bytes()
+        if peak is not None:
+            self.peak_memory_bytes = max(self.peak_memory_bytes or 0, peak)
+
+    def timings(self, sim_result: Optional["SimulationResult"] = None) -> dict[str, Any]:
+        """JSON-ready breakdown, with ``sim_result``'s slowest failure modes."""
+        stages = {name: round(self.stages[name], 6) for name in STAGES if name in self.stages}
+        data: dict[str, Any] = {"stages": stages, "total": round(sum(self.stages.values()), 6)}
+        if self.profiler:
+            data["profiler"] = self.profiler
+        if sim_result is not None:
+            slowest = sorted(sim_result.failure_mode_results, key=lambda fr: fr.seconds, reverse=True)
+            data["failure_modes"] = [
+                {"failure_mode_id": fr.failure_mode_id, "name": fr.name, "seconds": round(fr.seconds, 6)}
+                for fr in slowest[:SLOWEST_FAILURE_MODES]
+            ]
+        return data
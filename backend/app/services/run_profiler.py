@@ -0,0 +1,243 @@
+"""Opt-in profilers for a single simulation, stored as run artifacts.
+
+Each profiler is a ``SimulationHook`` for one simulation, a ``run_simulation``
+or ``simulate_on_common_draws`` call (which yields both runs of a
+quantification, so they share its profile). Every profile records
+per-failure-mode time and traced memory growth, and the NumPy arrays still
+alive when the simulation ends (the ``np.lib`` tracemalloc domain). On top
+of that:
+
+* ``cprofile`` — deterministic profile of the simulating thread; the top
+  functions by cumulative time, plus ``cprofile.pstats`` (load it with
+  ``pstats.Stats`` or snakeviz);
+* ``sampling`` — the simulating thread's stack every
+  ``PROFILE_SAMPLE_INTERVAL_MS``, as ``sampling.folded`` (flamegraph.pl or
+  speedscope input) and the hottest functions; far lower overhead than
+  cProfile on numpy-heavy code;
+* ``tracemalloc`` — allocation growth by source line between the start and
+  end of the simulation.
+
+The summary is always ``profile.json``.
+"""
+
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.engine.monte_carlo import (
+    FailureModeInput,
+    FailureModeResult,
+    SimulationConfig,
+    SimulationHook,
+    SimulationResult,
+)
+
+PROFILERS = ("cprofile", "sampling", "tracemalloc")
+_TOP = 30
+
+# Profiled simulations may overlap (SIMULATION_WORKERS > 1), so tracing is
+# reference counted: the first hook to start starts it, the last to finish
+# stops it. Tracing that was already on is left alone.
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_started = False
+
+
+def _acquire_trace() -> None:
+    global _trace_users, _trace_started
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_started = True
+        _trace_users += 1
+
+
+def _release_trace() -> None:
+    global _trace_users, _trace_started
+    with _trace_lock:
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_started:
+            tracemalloc.stop()
+            _trace_started = False
+
+
+@dataclass
+class Artifact:
+    name: str
+    media_type: str
+    content: bytes
+
+
+def _traced_bytes() -> Optional[int]:
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+
+def numpy_allocations() -> Optional[dict[str, Any]]:
+    """Live NumPy allocations by source line, or None when not tracing."""
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.DomainFilter(inclusive=True, domain=np.lib.tracemalloc_domain)]
+    )
+    stats = snapshot.statistics("lineno")
+    return {
+        "live_blocks": sum(s.count for s in stats),
+        "live_bytes": sum(s.size for s in stats),
+        "top": [{"site": str(s.traceback), "blocks": s.count, "bytes": s.size} for s in stats[:_TOP]],
+    }
+
+
+class ProfilerHook(SimulationHook):
+    kind = ""
+
+    def __init__(self):
+        self.failure_modes: list[dict[str, Any]] = []
+        self.artifacts: list[Artifact] = []
+
+    def start(self, failure_modes: list[FailureModeInput], config: SimulationConfig) -> None:
+        # Traced while profiled simulations run only, since tracing slows
+        # every allocation
+        _acquire_trace()
+        self._config = config
+        self._start = time.perf_counter()
+
+    def failure_mode_started(self, fm: FailureModeInput) -> None:
+        self._fm_traced = _traced_bytes()
+
+    def failure_mode_finished(self, fm: FailureModeInput, result: FailureModeResult) -> None:
+        traced = _traced_bytes()
+        self.failure_modes.append({
+            "failure_mode_id": fm.failure_mode_id,
+            "name": fm.name,
+            "loss_scenarios": len(fm.loss_scenarios),
+            "seconds": round(result.seconds, 6),
+            "traced_bytes_delta": traced - self._fm_traced if traced is not None and self._fm_traced is not None else None,
+        })
+
+    def finish(self, result: Optional[SimulationResult]) -> None:
+        try:
+            summary = {
+                "profiler": self.kind,
+                "n_simulations": self._config.n_simulations,
+                "apply_mitigations": self._config.apply_mitigations,
+                "completed": result is not None,
+                "seconds": round(time.perf_counter() - self._start, 6),
+                "numpy": numpy_allocations(),
+                **self.details(),
+                "failure_modes": sorted(self.failure_modes, key=lambda fm: fm["seconds"], reverse=True),
+            }
+        finally:
+            _release_trace()
+        self.artifacts.insert(0, Artifact("profile.json", "application/json", json.dumps(summary, indent=1).encode()))
+
+    def details(self) -> dict[str, Any]:
+        return {}
+
+
+class CProfileHook(ProfilerHook):
+    kind = "cprofile"
+
+    def start(self, failure_modes, config):
+        super().start(failure_modes, config)
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def finish(self, result):
+        self._profiler.disable()
+        super().finish(result)
+
+    def details(self):
+        stats = pstats.Stats(self._profiler)
+        self.artifacts.append(Artifact("cprofile.pstats", "application/octet-stream", marshal.dumps(stats.stats)))
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return {"functions": [
+            {
+                "function": pstats.func_std_string(func),
+                "calls": nc,
+                "tottime": round(tt, 6),
+                "cumtime": round(ct, 6),
+            }
+            for func, (cc, nc, tt, ct, callers) in rows[:_TOP]
+        ]}
+
+
+class SamplingHook(ProfilerHook):
+    kind = "sampling"
+
+    def start(self, failure_modes, config):
+        super().start(failure_modes, config)
+        self._target = threading.get_ident()
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="simulation-sampler", daemon=True)
+        self._thread.start()
+
+    def _sample(self) -> None:
+        interval = settings.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+
+    def finish(self, result):
+        self._stop.set()
+        self._thread.join()
+        super().finish(result)
+
+    def details(self):
+        folded = "\n".join(f"{stack} {n}" for stack, n in self._stacks.most_common())
+        self.artifacts.append(Artifact("sampling.folded", "text/plain", folded.encode()))
+        samples = sum(self._stacks.values())
+        leaves: Counter = Counter()
+        for stack, n in self._stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        return {
+            "samples": samples,
+            "interval_ms": settings.PROFILE_SAMPLE_INTERVAL_MS,
+            "hottest": [
+                {"function": fn, "samples": n, "share": round(n / samples, 4)} for fn, n in leaves.most_common(_TOP)
+            ],
+        }
+
+
+class TracemallocHook(ProfilerHook):
+    kind = "tracemalloc"
+
+    def start(self, failure_modes, config):
+        super().start(failure_modes, config)
+        self._snapshot = tracemalloc.take_snapshot()
+
+    def details(self):
+        if not tracemalloc.is_tracing():
+            return {"allocations": None}
+        growth = tracemalloc.take_snapshot().compare_to(self._snapshot, "lineno")
+        return {"allocations": [
+            {"site": str(s.traceback), "size_diff": s.size_diff, "count_diff": s.count_diff, "size": s.size}
+            for s in growth[:_TOP]
+        ]}
+
+
+_HOOKS = {hook.kind: hook for hook in (CProfileHook, SamplingHook, TracemallocHook)}
+
+
+def make_profiler(kind: str) -> ProfilerHook:
+    if kind not in _HOOKS:
+        raise ValueError(f"Unknown profiler {kind!r}; choose from {', '.join(PROFILERS)}")
+    return _HOOKS[kind]()
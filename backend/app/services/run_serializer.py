@@ -0,0 +1,61 @@
+"""Serialize stored quantification runs straight to JSON-ready dicts.
+
+Run rows are written only by the quantification service, so the API can skip
+Pydantic validation and emit them directly. Field names are taken from the
+response schemas so the two representations cannot drift apart.
+
+The compact encoding shrinks large runs for clients that opt in:
+
+* evenly spaced histogram bins become ``{"start", "width", "counts"}``
+  (bin ``i`` is at ``start + i * width``) instead of a float per bin;
+* ``results`` becomes columnar — one array per field — instead of a list of
+  objects repeating every key.
+"""
+
+from typing import Any, Iterable
+
+from app.models.quantification import QuantificationRun
+from app.schemas.quantification import QuantificationResultResponse, QuantificationRunResponse
+
+RUN_FIELDS = [f for f in QuantificationRunResponse.model_fields if f not in ("results", "histogram_bins", "histogram_counts")]
+RESULT_FIELDS = [f for f in QuantificationResultResponse.model_fields if f not in ("histogram_bins", "histogram_counts")]
+
+
+def compact_histogram(bins: list[float], counts: list[int]) -> dict[str, Any]:
+    """Encode a histogram as start/width/counts when its bins are evenly spaced."""
+    bins = bins or []
+    counts = counts or []
+    if len(bins) >= 2:
+        start = bins[0]
+        width = (bins[-1] - bins[0]) / (len(bins) - 1)
+        tolerance = 1e-9 * max(abs(bins[-1]), abs(start), 1.0)
+        if all(abs(b - (start + i * width)) <= tolerance for i, b in enumerate(bins)):
+            return {"start": start, "width": width, "counts": counts}
+    return {"bins": bins, "counts": counts}
+
+
+def _histogram_fields(obj, compact: bool) -> dict[str, Any]:
+    if compact:
+        return {"histogram": compact_histogram(obj.histogram_bins, obj.histogram_counts)}
+    return {"histogram_bins": obj.histogram_bins or [], "histogram_counts": obj.histogram_counts or []}
+
+
+def serialize_run(run: QuantificationRun, compact: bool = False) -> dict[str, Any]:
+    data = {f: getattr(run, f) for f in RUN_FIELDS}
+    data.update(_histogram_fields(run, compact))
+
+    results = run.results
+    if compact:
+        columns = {f: [getattr(r, f) for r in results] for f in RESULT_FIELDS}
+        columns["histogram"] = [compact_histogram(r.histogram_bins, r.histogram_counts) for r in results]
+        data["results"] = columns
+    else:
+        data["results"] = [
+            {**{f: getattr(r, f) for f in RESULT_FIELDS}, **_histogram_fields(r, compact=False)}
+            for r in results
+        ]
+    return data
+
+
+def serialize_runs(runs: Iterable[QuantificationRun], compact: bool = False) -> list[dict[str, Any]]:
+    return [serialize_run(run, compact) for run in runs]
@@ -0,0 +1,136 @@
+"""Dedicated, bounded executor for CPU-bound Monte Carlo simulations.
+
+Async endpoints hand simulations to this pool so they never block the event
+loop, and so long runs cannot exhaust the threadpool that serves sync
+endpoints. numpy releases the GIL inside its vectorized kernels, so worker
+threads overlap usefully with request handling.
+
+Admission control: at most ``SIMULATION_WORKERS`` jobs run and
+``SIMULATION_MAX_QUEUE`` more wait; beyond that ``SimulationQueueFull`` is
+raised with a retry hint derived from recent job durations. ``single_flight``
+coalesces identical concurrent requests onto one job.
+"""
+
+import asyncio
+import functools
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Hashable, Optional, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_in_flight = 0
+_avg_duration: Optional[float] = None  # exponential moving average, seconds
+_flights: dict[Hashable, asyncio.Task] = {}
+
+
+class SimulationQueueFull(Exception):
+    """The simulation executor is saturated; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Simulation queue is full, retry later")
+        self.retry_after = retry_after
+
+
+def get_simulation_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SIMULATION_WORKERS,
+                thread_name_prefix="simulation",
+            )
+        return _executor
+
+
+def queue_depth() -> int:
+    """Jobs currently running or waiting on the executor."""
+    return _in_flight
+
+
+def _retry_after(in_flight: int) -> int:
+    per_job = _avg_duration if _avg_duration is not None else settings.SIMULATION_RETRY_AFTER
+    waves = (in_flight - settings.SIMULATION_WORKERS) / settings.SIMULATION_WORKERS + 1
+    return max(1, math.ceil(per_job * waves))
+
+
+def _admit() -> None:
+    global _in_flight
+    with _lock:
+        if _in_flight >= settings.SIMULATION_WORKERS + settings.SIMULATION_MAX_QUEUE:
+            raise SimulationQueueFull(_retry_after(_in_flight))
+        _in_flight += 1
+
+
+def _release(duration: float) -> None:
+    global _in_flight, _avg_duration
+    with _lock:
+        _in_flight -= 1
+        _avg_duration = duration if _avg_duration is None else 0.8 * _avg_duration + 0.2 * duration
+
+
+def _timed(fn: Callable[..., T]) -> T:
+    start = time.perf_counter()
+    try:
+        return fn()
+    finally:
+        _release(time.perf_counter() - start)
+
+
+async def run_in_simulation_executor(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run ``fn(*args, **kwargs)`` on the simulation executor and await it.
+
+    Raises ``SimulationQueueFull`` instead of queueing when the executor is
+    saturated.
+    """
+    _admit()
+    loop = asyncio.get_running_loop()
+    try:
+        job = loop.run_in_executor(get_simulation_executor(), _timed, functools.partial(fn, *args, **kwargs))
+    except RuntimeError:
+        # Executor shut down; the job was never scheduled
+        _release(0.0)
+        raise
+    return await job
+
+
+async def single_flight(key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+    """Await ``fn()``, sharing its result with concurrent callers using ``key``.
+
+    The first caller starts ``fn`` as a task; callers arriving while it is in
+    flight await the same outcome (result or exception) instead of starting
+    again. Every caller waits through ``asyncio.shield``, so one that is
+    cancelled (e.g. its client disconnected) stops waiting without cancelling
+    the task for the others. The task can outlive the caller that started it,
+    so ``fn`` must not use anything that caller's request owns, such as its
+    database session, and should return plain values rather than objects
+    bound to one.
+    """
+    loop = asyncio.get_running_loop()
+    flight = _flights.get(key)
+    if flight is None or flight.get_loop() is not loop:
+        flight = loop.create_task(fn())
+        _flights[key] = flight
+        flight.add_done_callback(functools.partial(_land, key))
+    return await asyncio.shield(flight)
+
+
+def _land(key: Hashable, flight: asyncio.Task) -> None:
+    if _flights.get(key) is flight:
+        del _flights[key]
+    if not flight.cancelled():
+        flight.exception()  # mark retrieved: no warning when every caller left
+
+
+def shutdown_simulation_executor(wait: bool = True) -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
@@ -0,0 +1,4 @@
+"""Performance benchmarks. Run each module from ``backend/``, e.g.::
+
+    python -m benchmarks.serialization
+"""
@@ -0,0 +1,150 @@
+"""Benchmark dashboard-style reads while quantification runs are being written.
+
+Creates a file-backed SQLite database and, for each journal configuration,
+runs writer threads that repeatedly store a run with its per-scenario results
+(as ``store_quantification`` does) while reader threads repeatedly load the
+latest runs for an engagement. Reports read latency percentiles, writes per
+second and ``database is locked`` errors for:
+
+* ``rollback`` — SQLite defaults (rollback journal, ``synchronous=FULL``);
+* ``wal`` — the application's configured PRAGMAs (``sqlite_pragmas()``).
+
+Usage::
+
+    python -m benchmarks.db_concurrency [--seconds 5] [--readers 4] [--writers 1] [--results 50] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.database import Base, create_db_engine, sqlite_pragmas
+from app.models.quantification import QuantificationRun
+from benchmarks.serialization import build_run
+
+CONFIGS = {
+    "rollback": {"journal_mode": "DELETE", "synchronous": "FULL"},
+    "wal": None,  # settings
+}
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_config(name: str, args) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="crp-bench-"), "bench.db")
+    pragmas = CONFIGS[name]
+    if pragmas is not None:
+        pragmas = {**sqlite_pragmas(), **pragmas}
+    # A short busy timeout surfaces lock contention as errors instead of
+    # hiding it entirely inside the latency numbers.
+    engine = create_db_engine(
+        f"sqlite:///{path}",
+        pragmas=pragmas,
+        connect_args={"check_same_thread": False, "timeout": args.busy_timeout},
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+    with SessionLocal() as db:
+        engagement_id = build_run(db, args.results).engagement_id
+
+    stop = threading.Event()
+    read_ms: list[float] = []
+    counters = {"writes": 0, "read_errors": 0, "write_errors": 0}
+    lock = threading.Lock()
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    runs = (
+                        db.query(QuantificationRun)
+                        .options(selectinload(QuantificationRun.results))
+                        .filter(QuantificationRun.engagement_id == engagement_id)
+                        .order_by(QuantificationRun.created_at.desc())
+                        .limit(2)
+                        .all()
+                    )
+                    sum(len(r.results) for r in runs)
+            except OperationalError:
+                with lock:
+                    counters["read_errors"] += 1
+                continue
+            with lock:
+                read_ms.append((time.perf_counter() - start) * 1000)
+
+    def writer(seed: int):
+        while not stop.is_set():
+            try:
+                with SessionLocal() as db:
+                    build_run(db, args.results, seed=seed)
+            except OperationalError:
+                with lock:
+                    counters["write_errors"] += 1
+                continue
+            with lock:
+                counters["writes"] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    return {
+        "config": name,
+        "reads": len(read_ms),
+        "read_p50_ms": statistics.median(read_ms) if read_ms else 0.0,
+        "read_p95_ms": _percentile(read_ms, 95),
+        "read_max_ms": max(read_ms, default=0.0),
+        "writes_per_s": counters["writes"] / args.seconds,
+        "read_errors": counters["read_errors"],
+        "write_errors": counters["write_errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--results", type=int, default=50, help="results per written run")
+    parser.add_argument("--busy-timeout", type=float, default=1.0, help="seconds")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    rows = [run_config(name, args) for name in CONFIGS]
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per config")
+    print(f"{'config':<10}{'reads':>8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'writes/s':>10}{'errors r/w':>12}")
+    for row in rows:
+        print(
+            f"{row['config']:<10}{row['reads']:>8}{row['read_p50_ms']:>9.2f}{row['read_p95_ms']:>9.2f}"
+            f"{row['read_max_ms']:>9.2f}{row['writes_per_s']:>10.1f}"
+            f"{row['read_errors']:>6}/{row['write_errors']}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "rows": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Benchmark the Monte Carlo engine and record scaling curves.
+
+Starting from a base case, each sweep varies one dimension and times, per
+case:
+
+* ``simulate`` — ``run_simulation`` (median of ``--repeat`` runs);
+* ``quantify`` — the quantification path: ``simulate_on_common_draws`` plus
+  the per-mitigation contributions on those draws;
+* ``metrics`` — ``compute_metrics`` on the total losses;
+* ``aggregate`` — ``aggregate_results`` (per-mode metrics and party totals);
+
+along with peak traced memory of one ``run_simulation`` call and throughput
+in trials × scenarios per second.
+
+Sweeps: ``trials``, ``failure_modes``, ``scenarios`` (per failure mode),
+``frequency`` (events per year: low / mid / high) and ``distribution``.
+
+``--json`` writes the results; ``--baseline`` compares against an earlier
+``--json`` file and exits non-zero if any median timing regressed by more
+than ``--threshold`` (peak memory likewise). Each timing also records its
+noise (the median absolute deviation of its repeats), and a slowdown within
+``NOISE_FACTOR`` times the combined noise of both runs is not reported; a
+comparison needs at least ``MIN_REPEAT`` repeats for the noise to mean
+anything. ``baseline.json`` next to this module is the committed ``--quick``
+baseline; timings depend on the machine, so regenerate it on yours before
+comparing.
+
+Usage::
+
+    python -m benchmarks.engine [--quick] [--repeat 3] [--sweep trials ...] [--json out.json]
+                                [--baseline benchmarks/baseline.json] [--threshold 0.25]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import numpy as np
+
+from app.engine.loss_aggregator import aggregate_results
+from app.engine.monte_carlo import (
+    FailureModeInput,
+    LossScenarioInput,
+    MitigationEffect,
+    SimulationConfig,
+    run_simulation,
+)
+from app.engine.portfolio import simulate_on_common_draws
+from app.engine.risk_metrics import compute_metrics
+
+BASE = {"trials": 10_000, "failure_modes": 10, "scenarios": 3, "frequency": "mid", "distribution": "lognormal"}
+
+# Events per year (low, mid, high)
+FREQUENCIES = {"low": (0.02, 0.1, 0.3), "mid": (0.5, 1.0, 3.0), "high": (5.0, 10.0, 20.0)}
+
+SWEEPS = {
+    "trials": [1_000, 10_000, 100_000, 500_000],
+    "failure_modes": [1, 10, 50, 200],
+    "scenarios": [1, 3, 10],
+    "frequency": list(FREQUENCIES),
+    "distribution": ["lognormal", "triangular", "uniform"],
+}
+QUICK_SWEEPS = {
+    "trials": [1_000, 10_000, 50_000],
+    "failure_modes": [1, 10, 50],
+    "scenarios": [1, 3, 10],
+    "frequency": list(FREQUENCIES),
+    "distribution": ["lognormal", "triangular", "uniform"],
+}
+
+TIMINGS = ("simulate_ms", "quantify_ms", "metrics_ms", "aggregate_ms")
+# Sub-millisecond differences are timer noise, not regressions
+MIN_DELTA = {"simulate_ms": 1.0, "quantify_ms": 1.0, "metrics_ms": 1.0, "aggregate_ms": 1.0, "peak_mb": 0.5}
+# Fewer repeats make the median a single sample's noise
+MIN_REPEAT = 3
+NOISE_FACTOR = 3
+
+
+def build_inputs(failure_modes: int, scenarios: int, frequency: str, distribution: str, seed: int = 0):
+    """Deterministic engine inputs of the requested shape."""
+    rng = np.random.default_rng(seed)
+    freq_low, freq_mid, freq_high = FREQUENCIES[frequency]
+    fms = []
+    for i in range(failure_modes):
+        mid = float(rng.uniform(5_000, 500_000))
+        fms.append(FailureModeInput(
+            failure_mode_id=i + 1,
+            name=f"Failure mode {i + 1}",
+            frequency_low=freq_low,
+            frequency_mid=freq_mid,
+            frequency_high=freq_high,
+            loss_scenarios=[
+                LossScenarioInput(
+                    scenario_id=i * scenarios + j + 1,
+                    name=f"Scenario {j + 1}",
+                    party_id=j % 4 + 1,
+                    loss_category="direct",
+                    distribution_type=distribution,
+                    severity_low=mid / 5,
+                    severity_mid=mid,
+                    severity_high=mid * 6,
+                )
+                for j in range(scenarios)
+            ],
+            mitigations=[MitigationEffect(i % 5 + 1, f"Mitigation {i % 5 + 1}", 0.3, 0.2)],
+        ))
+    return fms
+
+
+def _median_ms(fn: Callable[[], Any], repeat: int) -> tuple[float, float]:
+    """Median and median absolute deviation of ``repeat`` timings, in ms."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(samples)
+    return median, statistics.median(abs(s - median) for s in samples)
+
+
+def _timing(name: str, fn: Callable[[], Any], repeat: int) -> dict:
+    median, noise = _median_ms(fn, repeat)
+    return {f"{name}_ms": round(median, 3), f"{name}_noise_ms": round(noise, 3)}
+
+
+def run_case(case: dict, repeat: int) -> dict:
+    fms = build_inputs(case["failure_modes"], case["scenarios"], case["frequency"], case["distribution"])
+    config = SimulationConfig(n_simulations=case["trials"], seed=42)
+
+    tracemalloc.start()
+    result = run_simulation(fms, config)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = {
+        **_timing("simulate", lambda: run_simulation(fms, config), repeat),
+        **_timing("quantify", lambda: simulate_on_common_draws(fms, case["trials"], seed=42)[2].contributions(), repeat),
+        **_timing("metrics", lambda: compute_metrics(result.total_losses), repeat),
+        **_timing("aggregate", lambda: aggregate_results(result), repeat),
+    }
+    simulate_ms = timings["simulate_ms"]
+    samples = case["trials"] * case["failure_modes"] * case["scenarios"]
+    return {
+        **case,
+        **timings,
+        "peak_mb": round(peak / 2**20, 2),
+        "samples_per_s": round(samples / (simulate_ms / 1000)) if simulate_ms else None,
+    }
+
+
+def compare(rows: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """Regressions of ``rows`` against ``baseline`` beyond ``threshold`` (a fraction)."""
+    previous = {(r["sweep"], str(r[r["sweep"]])): r for r in baseline}
+    regressions = []
+    for row in rows:
+        before = previous.get((row["sweep"], str(row[row["sweep"]])))
+        if before is None:
+            continue
+        for metric in (*TIMINGS, "peak_mb"):
+            old, new = before.get(metric), row.get(metric)
+            noise_key = metric.replace("_ms", "_noise_ms")
+            noise = NOISE_FACTOR * (before.get(noise_key, 0) + row.get(noise_key, 0)) if metric in TIMINGS else 0
+            if old and new and new > old * (1 + threshold) and new - old > max(MIN_DELTA[metric], noise):
+                regressions.append(
+                    f"{row['sweep']}={row[row['sweep']]}: {metric} {old:g} -> {new:g} ({new / old - 1:+.0%})"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sweeps")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sweep", nargs="+", choices=list(SWEEPS), help="default: all")
+    parser.add_argument("--json", dest="json_path")
+    parser.add_argument("--baseline", help="earlier --json output to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    args = parser.parse_args()
+    if args.baseline and args.repeat < MIN_REPEAT:
+        parser.error(f"--baseline needs --repeat {MIN_REPEAT} or more")
+
+    sweeps = QUICK_SWEEPS if args.quick else SWEEPS
+    rows = []
+    print(f"{'sweep':<14}{'value':>10}{'simulate ms':>13}{'quantify ms':>13}{'metrics ms':>12}{'aggregate ms':>14}{'peak MB':>10}{'samples/s':>14}")
+    for sweep in args.sweep or list(sweeps):
+        for value in sweeps[sweep]:
+            row = {"sweep": sweep, **run_case({**BASE, sweep: value}, args.repeat)}
+            rows.append(row)
+            print(
+                f"{sweep:<14}{value!s:>10}{row['simulate_ms']:>13.1f}{row['quantify_ms']:>13.1f}{row['metrics_ms']:>12.2f}"
+                f"{row['aggregate_ms']:>14.2f}{row['peak_mb']:>10.1f}{row['samples_per_s'] or 0:>14,}"
+            )
+
+    if args.json_path:
+        meta = {
+            "python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+            "repeat": args.repeat, "quick": args.quick,
+        }
+        with open(args.json_path, "w") as f:
+            json.dump({"meta": meta, "base": BASE, "rows": rows}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(rows, json.load(f)["rows"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""HTTP load test of the quantification workflow.
+
+Imports generated engagements (``benchmarks.synthetic``) through
+``POST /api/engagements/import``, runs one quantification each so dashboards
+have data, then has ``--concurrency`` workers issue a weighted mix of
+requests for ``--duration`` seconds:
+
+* ``dashboard`` — ``GET .../dashboard/``
+* ``runs`` — ``GET .../quantification/runs``
+* ``list`` — ``GET .../failure-modes/``
+* ``edit`` — ``PUT`` a loss scenario's severities
+* ``run`` — ``POST .../quantification/run``
+
+Reports p50/p95/p99 latency, throughput and error rate per route. ``429``
+responses from run admission control are counted as ``rejected``, not as
+errors.
+
+By default the app runs in-process (httpx ``ASGITransport``) against a
+temporary SQLite database; client and server then share one event loop, so
+absolute numbers are pessimistic but comparisons between configurations
+hold. ``--url`` targets a running server instead, e.g. one started with
+``uvicorn app.main:app --port 8080 --workers 2``.
+
+Usage::
+
+    python -m benchmarks.loadtest [--url http://localhost:8080] [--duration 30] [--concurrency 16]
+                                  [--mix dashboard=45,runs=10,list=15,edit=25,run=5]
+                                  [--engagements 4] [--failure-modes 50] [--scenarios 4]
+                                  [--run-trials 5000] [--seed 0] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+
+import httpx
+
+from benchmarks.synthetic import SyntheticSpec, export_document, generate
+
+DEFAULT_MIX = "dashboard=45,runs=10,list=15,edit=25,run=5"
+
+
+@dataclass
+class Target:
+    engagement_id: int
+    scenarios: list[tuple[int, int]]  # (failure mode id, loss scenario id)
+
+
+@dataclass
+class Stats:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name.strip()!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def op_dashboard(client, target, rng, args):
+    return await client.get(f"/api/engagements/{target.engagement_id}/dashboard/")
+
+
+async def op_runs(client, target, rng, args):
+    return await client.get(f"/api/engagements/{target.engagement_id}/quantification/runs")
+
+
+async def op_list(client, target, rng, args):
+    return await client.get(f"/api/engagements/{target.engagement_id}/failure-modes/")
+
+
+async def op_edit(client, target, rng, args):
+    fm_id, ls_id = rng.choice(target.scenarios)
+    mid = rng.uniform(1e4, 1e6)
+    return await client.put(
+        f"/api/engagements/{target.engagement_id}/failure-modes/{fm_id}/loss-scenarios/{ls_id}",
+        json={"severity_low": mid / 4, "severity_mid": mid, "severity_high": mid * 5},
+    )
+
+
+async def op_run(client, target, rng, args):
+    return await client.post(
+        f"/api/engagements/{target.engagement_id}/quantification/run",
+        json={"num_simulations": args.run_trials},
+    )
+
+
+OPERATIONS = {"dashboard": op_dashboard, "runs": op_runs, "list": op_list, "edit": op_edit, "run": op_run}
+
+
+async def setup(client: httpx.AsyncClient, args) -> list[Target]:
+    targets = []
+    for n in range(args.engagements):
+        spec = SyntheticSpec(
+            failure_modes=args.failure_modes,
+            scenarios_per_mode=args.scenarios,
+            parties=args.parties,
+            goods_services=5,
+            mitigations=max(args.failure_modes // 10, 1),
+            seed=args.seed + n,
+        )
+        r = await client.post("/api/engagements/import", json=export_document(generate(spec)))
+        r.raise_for_status()
+        eid = r.json()["id"]
+        document = (await client.get(f"/api/engagements/{eid}/export")).json()
+        scenarios = [(fm["id"], ls["id"]) for fm in document["failure_modes"] for ls in fm["loss_scenarios"]]
+        r = await client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": args.run_trials})
+        r.raise_for_status()
+        targets.append(Target(eid, scenarios))
+    return targets
+
+
+async def worker(client, targets, mix, args, stats: Stats, deadline: float, seed: int) -> None:
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await OPERATIONS[name](client, rng.choice(targets), rng, args)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        stats.latencies[name].append((time.perf_counter() - start) * 1000)
+        stats.statuses[name][status] += 1
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)] if ordered else 0.0
+
+
+def report(stats: Stats, elapsed: float) -> list[dict]:
+    rows = []
+    for name in list(OPERATIONS) + ["total"]:
+        if name == "total":
+            latencies = [ms for values in stats.latencies.values() for ms in values]
+            statuses = sum(stats.statuses.values(), Counter())
+        else:
+            latencies, statuses = stats.latencies.get(name, []), stats.statuses.get(name, Counter())
+        if not latencies:
+            continue
+        count = len(latencies)
+        rejected = statuses.get(429, 0)
+        errors = sum(n for status, n in statuses.items() if not (isinstance(status, int) and status < 400)) - rejected
+        rows.append({
+            "route": name,
+            "requests": count,
+            "rps": round(count / elapsed, 2),
+            "error_rate": round(errors / count, 4),
+            "rejected": rejected,
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(_percentile(latencies, 95), 2),
+            "p99_ms": round(_percentile(latencies, 99), 2),
+            "max_ms": round(max(latencies), 2),
+            "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        })
+    return rows
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        else:
+            client = _in_process_client(stack, args)
+        await stack.enter_async_context(client)
+
+        setup_start = time.perf_counter()
+        targets = await setup(client, args)
+        print(
+            f"set up {len(targets)} engagements ({args.failure_modes} failure modes x {args.scenarios} scenarios) "
+            f"in {time.perf_counter() - setup_start:.1f}s"
+        )
+
+        stats = Stats()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            worker(client, targets, mix, args, stats, deadline, args.seed * 1000 + i)
+            for i in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+    return {"args": vars(args), "elapsed_s": round(elapsed, 2), "rows": report(stats, elapsed)}
+
+
+def _in_process_client(stack: AsyncExitStack, args) -> httpx.AsyncClient:
+    """An ASGI client for the app, with its sessions bound to a temporary database."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import Base, create_async_db_engine, create_db_engine, get_async_db, get_db
+    from app.main import app
+
+    path = os.path.join(tempfile.mkdtemp(prefix="crp-loadtest-"), "loadtest.db")
+    engine = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{path}")
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    async def cleanup():
+        app.dependency_overrides.clear()
+        await async_engine.dispose()
+        engine.dispose()
+
+    stack.push_async_callback(cleanup)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=args.timeout
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="running server; default: in-process")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight,...")
+    parser.add_argument("--engagements", type=int, default=4)
+    parser.add_argument("--failure-modes", type=int, default=50)
+    parser.add_argument("--scenarios", type=int, default=4, help="loss scenarios per failure mode")
+    parser.add_argument("--parties", type=int, default=10)
+    parser.add_argument("--run-trials", type=int, default=5_000)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per request, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    print(f"{args.concurrency} workers for {result['elapsed_s']}s")
+    print(f"{'route':<11}{'requests':>9}{'req/s':>9}{'errors':>8}{'429':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for row in result["rows"]:
+        print(
+            f"{row['route']:<11}{row['requests']:>9}{row['rps']:>9.1f}{row['error_rate']:>8.1%}{row['rejected']:>6}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Benchmark run serialization: validated stdlib path vs. the fast path.
+
+Builds a run with 200 per-scenario results (50-bin histograms each) in a
+temporary SQLite database and times, per request:
+
+* ``baseline`` — what FastAPI does for ``response_model`` endpoints:
+  validate the ORM object, dump to JSON-compatible data, ``json.dumps``;
+* ``fast`` — ``serialize_run`` straight from the ORM row + ``FastJSONResponse``;
+* ``fast+compact`` — the same with start/width histograms and columnar results.
+
+Both function-level and in-process HTTP latencies are reported, along with
+raw and gzipped body sizes.
+
+Usage::
+
+    python -m benchmarks.serialization [--results 200] [--repeat 50] [--json out.json]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base, create_async_db_engine, get_db, get_async_db
+from app.main import app
+from app.models.engagement import Engagement
+from app.models.quantification import QuantificationRun, QuantificationResult
+from app.responses import FastJSONResponse
+from app.schemas.quantification import QuantificationRunResponse
+from app.services.run_serializer import serialize_run
+
+
+def _histogram(rng, n_bins: int = 50):
+    losses = rng.lognormal(10, 1.2, size=2000)
+    counts, edges = np.histogram(losses, bins=n_bins)
+    bins = [(float(edges[i]) + float(edges[i + 1])) / 2 for i in range(n_bins)]
+    return bins, counts.tolist()
+
+
+def build_run(db: Session, n_results: int, seed: int = 0) -> QuantificationRun:
+    rng = np.random.default_rng(seed)
+    engagement = Engagement(name="Serialization benchmark", currency="USD")
+    db.add(engagement)
+    db.flush()
+    bins, counts = _histogram(rng)
+    run = QuantificationRun(
+        engagement_id=engagement.id,
+        num_simulations=10000,
+        total_expected_loss=1.0e6,
+        total_var_95=2.5e6,
+        total_tvar_95=3.1e6,
+        total_var_99=4.2e6,
+        risk_asymmetry_ratio=1.7,
+        histogram_bins=bins,
+        histogram_counts=counts,
+    )
+    db.add(run)
+    db.flush()
+    for i in range(n_results):
+        bins, counts = _histogram(rng)
+        pct = sorted(float(x) for x in rng.lognormal(9, 1.0, size=10))
+        db.add(QuantificationResult(
+            run_id=run.id,
+            failure_mode_id=i + 1,
+            label=f"Failure mode {i + 1}",
+            expected_loss=pct[4], var_95=pct[7], tvar_95=pct[8], var_99=pct[9],
+            p5=pct[0], p25=pct[2], p50=pct[4], p75=pct[6], p95=pct[7], p99=pct[9],
+            histogram_bins=bins,
+            histogram_counts=counts,
+        ))
+    db.commit()
+    return run
+
+
+def _time_ms(fn, repeat: int) -> float:
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    # A file, so the sync baseline app and the async API share one database
+    path = os.path.join(tempfile.mkdtemp(prefix="crp-bench-"), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    db = SessionLocal()
+    run = build_run(db, args.results)
+    run_id, engagement_id = run.id, run.engagement_id
+    run.results  # load once; function-level timings exclude the DB
+
+    adapter = TypeAdapter(QuantificationRunResponse)
+
+    def baseline_body() -> bytes:
+        validated = adapter.validate_python(run, from_attributes=True)
+        return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+    def fast_body() -> bytes:
+        return FastJSONResponse(serialize_run(run)).body
+
+    def compact_body() -> bytes:
+        return FastJSONResponse(serialize_run(run, compact=True)).body
+
+    # HTTP: the real endpoint vs. an equivalent validated endpoint on a
+    # throwaway app using the stock JSONResponse.
+    def override_get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    baseline_app = FastAPI()
+
+    @baseline_app.get("/run/{rid}", response_model=QuantificationRunResponse, response_class=JSONResponse)
+    def baseline_endpoint(rid: int, session: Session = Depends(get_db)):
+        return session.get(QuantificationRun, rid)
+
+    async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{path}", pragmas={})
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as session:
+            yield session
+
+    baseline_app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    baseline_client = TestClient(baseline_app)
+    client = TestClient(app)
+    run_url = f"/api/engagements/{engagement_id}/quantification/runs/{run_id}"
+    identity = {"Accept-Encoding": "identity"}
+
+    rows = []
+    for name, body_fn, http_fn in [
+        ("baseline", baseline_body, lambda: baseline_client.get(f"/run/{run_id}", headers=identity)),
+        ("fast", fast_body, lambda: client.get(run_url, headers=identity)),
+        ("fast+compact", compact_body, lambda: client.get(f"{run_url}?compact=true", headers=identity)),
+    ]:
+        body = body_fn()
+        rows.append({
+            "variant": name,
+            "serialize_ms": _time_ms(body_fn, args.repeat),
+            "http_ms": _time_ms(http_fn, args.repeat),
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body, compresslevel=9)),
+        })
+
+    app.dependency_overrides.pop(get_async_db, None)
+    db.close()
+
+    base = rows[0]
+    print(f"Run with {args.results} results, median of {args.repeat} iterations")
+    print(f"{'variant':<14}{'serialize ms':>14}{'http ms':>10}{'speedup':>9}{'bytes':>10}{'gzip bytes':>12}")
+    for row in rows:
+        speedup = base["http_ms"] / row["http_ms"] if row["http_ms"] else float("inf")
+        print(
+            f"{row['variant']:<14}{row['serialize_ms']:>14.2f}{row['http_ms']:>10.2f}"
+            f"{speedup:>8.1f}x{row['bytes']:>10}{row['gzip_bytes']:>12}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"results": args.results, "repeat": args.repeat, "rows": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
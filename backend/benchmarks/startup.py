@@ -0,0 +1,101 @@
+"""Benchmark application startup: import-to-ready time in fresh interpreters.
+
+Each repeat starts a new Python process that imports ``app.main``, runs the
+startup lifespan and serves a first ``GET /api/health``, against a temporary
+SQLite database migrated beforehand (as at deploy). Reported per phase:
+
+* ``import`` — ``import app.main``;
+* ``ready`` — import plus lifespan plus the first health response;
+* ``first_engine_use`` — importing the simulation engine afterwards, the
+  cost the first quantification run pays now that it is loaded lazily.
+
+Also reports how many modules the import loaded and which of the heavy
+dependencies (numpy, scipy, anthropic) it pulled in; none is expected.
+
+Usage::
+
+    python -m benchmarks.startup [--repeat 10] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from app import migrations
+from app.database import create_db_engine
+
+HEAVY_MODULES = ("numpy", "scipy", "anthropic")
+
+# Runs in the child process; the TestClient import is kept out of the timings
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+modules = len(sys.modules)
+heavy = [name for name in %(heavy)r if name in sys.modules]
+from fastapi.testclient import TestClient
+t2 = time.perf_counter()
+with TestClient(app.main.app) as client:
+    assert client.get("/api/health").status_code == 200
+    t3 = time.perf_counter()
+import app.engine.monte_carlo, app.engine.loss_aggregator, app.engine.risk_metrics
+t4 = time.perf_counter()
+print(json.dumps({
+    "import": t1 - t0,
+    "ready": (t1 - t0) + (t3 - t2),
+    "first_engine_use": t4 - t3,
+    "modules": modules,
+    "heavy_modules": heavy,
+}))
+"""
+
+
+def probe(database_url: str) -> dict:
+    env = {**os.environ, "DATABASE_URL": database_url, "AUTO_MIGRATE": "false", "LLM_CACHE_ENABLED": "false"}
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE % {"heavy": HEAVY_MODULES}],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='crp-bench-'), 'startup.db')}"
+    engine = create_db_engine(database_url)
+    migrations.upgrade(engine)
+    engine.dispose()
+
+    probe(database_url)  # warm the bytecode and filesystem caches
+    samples = [probe(database_url) for _ in range(args.repeat)]
+
+    report = {
+        "repeat": args.repeat,
+        "modules": samples[-1]["modules"],
+        "heavy_modules": samples[-1]["heavy_modules"],
+    }
+    print(f"{'phase':<18} {'median ms':>10} {'min ms':>10}")
+    for phase in ("import", "ready", "first_engine_use"):
+        values = [s[phase] for s in samples]
+        report[phase] = {"median": statistics.median(values), "min": min(values)}
+        print(f"{phase:<18} {report[phase]['median'] * 1000:>10.1f} {report[phase]['min'] * 1000:>10.1f}")
+    print(f"\nmodules loaded by import: {report['modules']}")
+    print(f"heavy dependencies loaded by import: {', '.join(report['heavy_modules']) or 'none'}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""Seeded synthetic engagements for load and scale testing.
+
+``generate`` builds an engagement model as plain data: parties, goods and
+services, failure modes drawn from the seed taxonomies with nested loss
+scenarios, mitigations and their links. Frequencies and severities are drawn
+from ranges seen in real engagements (0.01–5 events a year; severities from
+thousands to millions, right-skewed). The same spec and seed always give the
+same engagement.
+
+From a model:
+
+* ``engine_inputs`` gives ``FailureModeInput`` lists for the engine, in
+  memory, with ids numbered from 1;
+* ``populate`` writes it to a database with bulk inserts and can add a run
+  history of ``runs`` stored quantification pairs;
+* ``export_document`` gives an ``EngagementExport`` document, for creating
+  it through ``POST /api/engagements/import`` on a running server.
+
+Usage::
+
+    python -m benchmarks.synthetic --db synthetic.db [--failure-modes 500] [--scenarios 10]
+                                   [--parties 50] [--runs 20] [--seed 0] [--engagements 1]
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base, create_db_engine
+from app.engine.monte_carlo import FailureModeInput, LossScenarioInput, MitigationEffect
+from app.models.engagement import Engagement
+from app.models.failure_mode import FailureMode
+from app.models.goods_service import GoodsService
+from app.models.loss_scenario import LossScenario
+from app.models.mitigation import FailureModeMitigation, Mitigation
+from app.models.party import Party
+from app.models.quantification import QuantificationRun
+from app.seed.failure_taxonomy import FAILURE_CATEGORIES
+from app.seed.goods_taxonomy import GOODS_CATEGORIES
+from app.seed.loss_taxonomy import LOSS_CATEGORIES
+from app.seed.mitigation_taxonomy import MITIGATION_TYPES
+from app.services.bulk_service import bulk_insert
+from app.services.quantification_service import load_engine_inputs, simulate_and_attribute, store_quantification
+
+DISTRIBUTIONS = ["lognormal", "triangular", "uniform"]
+DISTRIBUTION_WEIGHTS = [0.7, 0.2, 0.1]
+INDUSTRIES = ["Technology", "Manufacturing", "Healthcare", "Financial Services", "Logistics", "Energy"]
+
+
+@dataclass
+class SyntheticSpec:
+    failure_modes: int = 500
+    scenarios_per_mode: int = 10
+    parties: int = 50
+    goods_services: int = 20
+    mitigations: int = 40
+    links_per_mitigation: int = 8
+    runs: int = 0  # stored quantification pairs (unmitigated + mitigated)
+    run_trials: int = 1_000
+    seed: int = 0
+
+
+def _triple(rng: np.random.Generator, mid: float, low_range, high_range) -> tuple[float, float, float]:
+    return round(mid * rng.uniform(*low_range), 4), round(mid, 4), round(mid * rng.uniform(*high_range), 4)
+
+
+def generate(spec: SyntheticSpec) -> dict[str, Any]:
+    """An engagement as plain data; references between rows are list indices."""
+    rng = np.random.default_rng(spec.seed)
+    industry = INDUSTRIES[spec.seed % len(INDUSTRIES)]
+
+    roles = ["buyer", "supplier"] + [
+        str(r) for r in rng.choice(["third_party", "end_user"], size=max(spec.parties - 2, 0))
+    ]
+    parties = [
+        {
+            "name": f"Party {i + 1}",
+            "role": role,
+            "revenue": round(float(10 ** rng.uniform(5, 9)), 2),
+            "criticality": str(rng.choice(["low", "medium", "high"])),
+        }
+        for i, role in enumerate(roles[:spec.parties])
+    ]
+    goods_services = [
+        {
+            "name": f"{category} {i + 1}",
+            "category": category,
+            "supply_type": str(rng.choice(["goods", "services", "mixed"])),
+            "replaceability": str(rng.choice(["easily_replaceable", "replaceable", "difficult", "irreplaceable"])),
+        }
+        for i, category in enumerate(rng.choice(GOODS_CATEGORIES, size=spec.goods_services))
+    ]
+
+    failure_modes = []
+    for i in range(spec.failure_modes):
+        category = str(rng.choice(FAILURE_CATEGORIES))
+        freq = _triple(rng, float(10 ** rng.uniform(-2, 0.7)), (0.2, 0.6), (1.5, 4.0))
+        scenarios = []
+        for j in range(spec.scenarios_per_mode):
+            severity = _triple(rng, float(10 ** rng.uniform(3, 6.5)), (0.1, 0.4), (3.0, 10.0))
+            scenarios.append({
+                "name": f"Scenario {j + 1}",
+                "party": int(rng.integers(len(parties))) if parties else None,
+                "loss_category": str(rng.choice(LOSS_CATEGORIES)),
+                "distribution_type": str(rng.choice(DISTRIBUTIONS, p=DISTRIBUTION_WEIGHTS)),
+                "severity_low": severity[0],
+                "severity_mid": severity[1],
+                "severity_high": severity[2],
+            })
+        failure_modes.append({
+            "name": f"{category} #{i + 1}",
+            "category": category,
+            "goods_service": int(rng.integers(len(goods_services))) if goods_services else None,
+            "frequency_low": freq[0],
+            "frequency_mid": freq[1],
+            "frequency_high": freq[2],
+            "confidence": round(float(rng.uniform(0.3, 0.9)), 2),
+            "loss_scenarios": scenarios,
+        })
+
+    mitigations, links = [], []
+    n_links = min(spec.links_per_mitigation, spec.failure_modes)
+    for m in range(spec.mitigations):
+        mitigations.append({
+            "name": f"Mitigation {m + 1}",
+            "mitigation_type": str(rng.choice(MITIGATION_TYPES)),
+            "cost": round(float(10 ** rng.uniform(3, 5.5)), 2),
+        })
+        for fm in rng.choice(spec.failure_modes, size=n_links, replace=False):
+            links.append({
+                "mitigation": m,
+                "failure_mode": int(fm),
+                "frequency_reduction": round(float(rng.uniform(0, 0.5)), 3),
+                "severity_reduction": round(float(rng.uniform(0, 0.4)), 3),
+            })
+
+    return {
+        "engagement": {
+            "name": f"Synthetic engagement {spec.seed}",
+            "industry": industry,
+            "contract_value": round(float(10 ** rng.uniform(5, 8)), 2),
+            "currency": "USD",
+        },
+        "parties": parties,
+        "goods_services": goods_services,
+        "failure_modes": failure_modes,
+        "mitigations": mitigations,
+        "links": links,
+    }
+
+
+def engine_inputs(model: dict[str, Any]) -> list[FailureModeInput]:
+    """Engine inputs for a generated model, without a database."""
+    effects: dict[int, list[MitigationEffect]] = {}
+    for link in model["links"]:
+        effects.setdefault(link["failure_mode"], []).append(MitigationEffect(
+            mitigation_id=link["mitigation"] + 1,
+            name=model["mitigations"][link["mitigation"]]["name"],
+            frequency_reduction=link["frequency_reduction"],
+            severity_reduction=link["severity_reduction"],
+        ))
+    inputs, scenario_id = [], 0
+    for i, fm in enumerate(model["failure_modes"]):
+        scenarios = []
+        for ls in fm["loss_scenarios"]:
+            scenario_id += 1
+            scenarios.append(LossScenarioInput(
+                scenario_id=scenario_id,
+                name=ls["name"],
+                party_id=(ls["party"] or 0) + 1,
+                loss_category=ls["loss_category"],
+                distribution_type=ls["distribution_type"],
+                severity_low=ls["severity_low"],
+                severity_mid=ls["severity_mid"],
+                severity_high=ls["severity_high"],
+            ))
+        inputs.append(FailureModeInput(
+            failure_mode_id=i + 1,
+            name=fm["name"],
+            frequency_low=fm["frequency_low"],
+            frequency_mid=fm["frequency_mid"],
+            frequency_high=fm["frequency_high"],
+            loss_scenarios=scenarios,
+            mitigations=effects.get(i, []),
+        ))
+    return inputs
+
+
+def export_document(model: dict[str, Any]) -> dict[str, Any]:
+    """The model in the engagement export format; row ids are index + 1."""
+    failure_modes, scenario_id = [], 0
+    for i, fm in enumerate(model["failure_modes"]):
+        scenarios = []
+        for ls in fm["loss_scenarios"]:
+            scenario_id += 1
+            scenarios.append({
+                **{k: v for k, v in ls.items() if k != "party"},
+                "id": scenario_id,
+                "affected_party_id": ls["party"] + 1,
+            })
+        failure_modes.append({
+            **{k: v for k, v in fm.items() if k not in ("loss_scenarios", "goods_service")},
+            "id": i + 1,
+            "goods_service_id": fm["goods_service"] + 1 if fm["goods_service"] is not None else None,
+            "loss_scenarios": scenarios,
+        })
+    links: dict[int, list[dict]] = {}
+    for link in model["links"]:
+        links.setdefault(link["mitigation"], []).append({
+            "failure_mode_id": link["failure_mode"] + 1,
+            "frequency_reduction": link["frequency_reduction"],
+            "severity_reduction": link["severity_reduction"],
+        })
+    return {
+        "engagement": model["engagement"],
+        "parties": [{**p, "id": i + 1} for i, p in enumerate(model["parties"])],
+        "goods_services": [{**gs, "id": i + 1} for i, gs in enumerate(model["goods_services"])],
+        "failure_modes": failure_modes,
+        "mitigations": [{**m, "id": i + 1, "links": links.get(i, [])} for i, m in enumerate(model["mitigations"])],
+    }
+
+
+def populate(db: Session, model: dict[str, Any], runs: int = 0, run_trials: int = 1_000) -> int:
+    """Write ``model`` with bulk inserts and commit; returns the engagement id.
+
+    With ``runs``, one simulation of ``run_trials`` trials is stored ``runs``
+    times as unmitigated/mitigated pairs, backdated a day apart, so reads see
+    a deep history without paying for a simulation per run.
+    """
+    engagement = Engagement(**model["engagement"])
+    db.add(engagement)
+    db.flush()
+    eid = engagement.id
+
+    party_ids = bulk_insert(db, Party, [{**p, "engagement_id": eid} for p in model["parties"]])
+    gs_ids = bulk_insert(db, GoodsService, [{**gs, "engagement_id": eid} for gs in model["goods_services"]])
+    fm_ids = bulk_insert(db, FailureMode, [
+        {
+            **{k: v for k, v in fm.items() if k not in ("loss_scenarios", "goods_service")},
+            "engagement_id": eid,
+            "goods_service_id": gs_ids[fm["goods_service"]] if fm["goods_service"] is not None else None,
+        }
+        for fm in model["failure_modes"]
+    ])
+    bulk_insert(db, LossScenario, [
+        {
+            **{k: v for k, v in ls.items() if k != "party"},
+            "failure_mode_id": fm_id,
+            "affected_party_id": party_ids[ls["party"]],
+        }
+        for fm_id, fm in zip(fm_ids, model["failure_modes"])
+        for ls in fm["loss_scenarios"]
+    ])
+    mit_ids = bulk_insert(db, Mitigation, [{**m, "engagement_id": eid} for m in model["mitigations"]])
+    bulk_insert(db, FailureModeMitigation, [
+        {
+            "mitigation_id": mit_ids[link["mitigation"]],
+            "failure_mode_id": fm_ids[link["failure_mode"]],
+            "frequency_reduction": link["frequency_reduction"],
+            "severity_reduction": link["severity_reduction"],
+        }
+        for link in model["links"]
+    ])
+    db.commit()
+
+    if runs:
+        fm_inputs, contract_value = load_engine_inputs(db, eid)
+        results, contributions = simulate_and_attribute(fm_inputs, run_trials)
+        run_ids = []
+        for _ in range(runs):
+            pair = store_quantification(db, eid, run_trials, results, contract_value, contributions=contributions)
+            run_ids.extend(run.id for run in pair)
+        now = datetime.now(timezone.utc)
+        db.execute(update(QuantificationRun), [
+            {"id": run_id, "created_at": now - timedelta(days=(len(run_ids) - 1 - i) // 2)}
+            for i, run_id in enumerate(run_ids)
+        ])
+        db.commit()
+    return eid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--db", help="SQLite file to create or extend")
+    target.add_argument("--database-url")
+    parser.add_argument("--engagements", type=int, default=1)
+    parser.add_argument("--failure-modes", type=int, default=500)
+    parser.add_argument("--scenarios", type=int, default=10, help="loss scenarios per failure mode")
+    parser.add_argument("--parties", type=int, default=50)
+    parser.add_argument("--mitigations", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=0, help="stored run pairs per engagement")
+    parser.add_argument("--run-trials", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.database_url or f"sqlite:///{args.db}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    for n in range(args.engagements):
+        spec = SyntheticSpec(
+            failure_modes=args.failure_modes,
+            scenarios_per_mode=args.scenarios,
+            parties=args.parties,
+            mitigations=args.mitigations,
+            runs=args.runs,
+            run_trials=args.run_trials,
+            seed=args.seed + n,
+        )
+        start = time.perf_counter()
+        with SessionLocal() as db:
+            eid = populate(db, generate(spec), runs=spec.runs, run_trials=spec.run_trials)
+        print(
+            f"engagement {eid}: {spec.failure_modes} failure modes, "
+            f"{spec.failure_modes * spec.scenarios_per_mode} loss scenarios, {spec.parties} parties, "
+            f"{spec.runs} run pairs in {time.perf_counter() - start:.1f}s"
+        )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""Shared test setup."""
+
+import os
+
+# Keep the LLM cache in memory whatever the environment or .env sets, so
+# tests never create or read a cache file
+os.environ["LLM_CACHE_PATH"] = ""
@@ -0,0 +1,107 @@
+"""Test doubles shared across test modules."""
+
+import asyncio
+import json
+
+
+class StubAPIError(Exception):
+    """An API error carrying an HTTP status, like ``anthropic.APIStatusError``."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class StubAnthropic:
+    """Stands in for AsyncAnthropic: canned JSON replies, records concurrency."""
+
+    def __init__(
+        self,
+        reply=None,
+        delay: float = 0.0,
+        fail_on: str = "",
+        stop_reason: str = "end_turn",
+        chunk_size: int = 16,
+        fail_times: int = 0,
+        fail_status: int = 429,
+        usage: dict | None = None,
+    ):
+        self.reply = reply or {"failure_modes": [{"name": "Stub failure"}]}
+        self.delay = delay
+        self.fail_on = fail_on
+        self.stop_reason = stop_reason
+        self.chunk_size = chunk_size
+        # The first ``fail_times`` calls raise StubAPIError(fail_status)
+        self.fail_times = fail_times
+        self.fail_status = fail_status
+        self.usage = usage or {"input_tokens": 100, "output_tokens": 50}
+        self.chunks_sent = 0
+        self.prompts = []  # prompt text, content blocks joined
+        self.contents = []  # content as sent
+        self.active = 0
+        self.peak = 0
+        self.messages = self
+
+    def _record(self, messages) -> str:
+        content = messages[0]["content"]
+        self.contents.append(content)
+        prompt = content if isinstance(content, str) else "\n\n".join(block["text"] for block in content)
+        self.prompts.append(prompt)
+        return prompt
+
+    def _message(self, **fields):
+        usage = type("Usage", (), dict(self.usage))()
+        return type("Message", (), {"stop_reason": self.stop_reason, "usage": usage, **fields})()
+
+    def _maybe_fail(self, prompt: str) -> None:
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise StubAPIError(self.fail_status)
+        if self.fail_on and self.fail_on in prompt:
+            raise RuntimeError("overloaded")
+
+    async def create(self, model, max_tokens, messages, **kwargs):
+        prompt = self._record(messages)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            self._maybe_fail(prompt)
+        finally:
+            self.active -= 1
+        block = type("Block", (), {"text": json.dumps(self.reply)})()
+        return self._message(content=[block])
+
+    def reply_text(self) -> str:
+        text = json.dumps(self.reply)
+        # A max_tokens stop cuts the reply off part-way
+        return text[: int(len(text) * 0.6)] if self.stop_reason == "max_tokens" else text
+
+    def stream(self, model, max_tokens, messages, **kwargs):
+        return _StubStream(self, self._record(messages))
+
+
+class _StubStream:
+    """``messages.stream(...)`` context manager: the reply in fixed-size chunks."""
+
+    def __init__(self, owner: StubAnthropic, prompt: str):
+        self.owner = owner
+        self.prompt = prompt
+
+    async def __aenter__(self):
+        self.owner._maybe_fail(self.prompt)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    @property
+    async def text_stream(self):
+        text = self.owner.reply_text()
+        for i in range(0, len(text), self.owner.chunk_size):
+            await asyncio.sleep(self.owner.delay)
+            self.owner.chunks_sent += 1
+            yield text[i:i + self.owner.chunk_size]
+
+    async def get_final_message(self):
+        return self.owner._message()
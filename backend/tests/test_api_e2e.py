@@ -15,23 +15,52 @@ We walk through the entire workflow:
   8. Verify dashboard results
 """
 
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.main import app
-
-# In-memory SQLite for test isolation — StaticPool ensures all connections
-# share the same in-memory database (otherwise each connection gets its own)
+from app.models.dashboard_snapshot import DashboardSnapshot
+from app.models.engagement import Engagement
+from app.models.mitigation import FailureModeMitigation
+from app.observability import instrument_engine, registry
+from app.observability.queries import query_budget
+from app.schemas.quantification import QuantificationRunResponse
+from app.config import settings
+from app.routers import quantification as quantification_router
+from app.services import claude_service, dashboard_service, llm_cache, simulation_executor
+from app.services.ai_metrics import ai_metrics
+from app.services.llm_cache import LLMCache
+from tests.stubs import StubAnthropic
+
+# Throwaway SQLite file shared by the sync engine (used by the tests
+# themselves) and the async engine behind the async routers; an in-memory
+# database cannot be shared between the two drivers. NullPool keeps no
+# connection open across TestClient requests, each of which runs on a fresh
+# event loop.
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="crp-test-"), "test.db")
 TEST_ENGINE = create_engine(
-    "sqlite:///:memory:",
+    f"sqlite:///{TEST_DB_PATH}",
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    poolclass=NullPool,
 )
+TEST_ASYNC_ENGINE = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
 TestSession = sessionmaker(autocommit=False, autoflush=False, bind=TEST_ENGINE)
+TestAsyncSession = async_sessionmaker(TEST_ASYNC_ENGINE, autoflush=False, expire_on_commit=False)
+instrument_engine(TEST_ENGINE)
+instrument_engine(TEST_ASYNC_ENGINE.sync_engine)
 
 
 def override_get_db():
@@ -42,7 +71,13 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    async with TestAsyncSession() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 client = TestClient(app)
 
@@ -235,6 +270,18 @@ def add_mitigations(eid: int, fm1_id: int, fm2_id: int):
     return mit1.json(), mit2.json()
 
 
+def build_full_scenario():
+    """Engagement with parties, one goods/service, two FMs, scenarios and mitigations."""
+    eng = create_engagement()
+    eid = eng["id"]
+    buyer, supplier = add_parties(eid)
+    gs = add_goods_service(eid)
+    fm1, fm2 = add_failure_modes(eid, gs["id"])
+    add_loss_scenarios(eid, fm1["id"], fm2["id"], buyer["id"], supplier["id"])
+    add_mitigations(eid, fm1["id"], fm2["id"])
+    return eid, eng
+
+
 # ---------------------------------------------------------------------------
 # Tests
 # ---------------------------------------------------------------------------
@@ -412,6 +459,16 @@ class TestEndToEndQuantification:
         # With 500k contract and potential million-dollar breaches, ratio may exceed 1
         assert unmitigated["risk_asymmetry_ratio"] > 0
 
+        # Per-stage profile of the request, shared by both runs
+        timings = unmitigated["timings"]
+        assert set(timings["stages"]) == {
+            "load_inputs", "simulate", "attribution", "aggregate", "histograms", "store", "dashboard",
+        }
+        assert timings["total"] == pytest.approx(sum(timings["stages"].values()), abs=1e-5)
+        assert len(timings["failure_modes"]) == 2
+        assert mitigated["timings"]["stages"] == timings["stages"]
+        assert unmitigated["peak_memory_bytes"] > 5000 * 8
+
         print(f"\n{'='*60}")
         print(f"QUANTIFICATION RESULTS — Acme Corp Cloud Hosting")
         print(f"{'='*60}")
@@ -489,6 +546,32 @@ class TestEndToEndQuantification:
                 roi_str = f"{m['roi']:.1f}x" if m.get("roi") is not None else "N/A"
                 print(f"  {m['name']:<35} Cost: ${m['cost']:>8,.0f}  EL Reduction: ${m['el_reduction']:>8,.0f}  ROI: {roi_str}")
 
+    def test_dashboard_per_mitigation_rows(self):
+        eid, _ = self._build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 5000})
+        assert r.status_code == 200, r.text
+        unmitigated, mitigated = sorted(r.json(), key=lambda run: run["is_mitigated"])
+        assert len(mitigated["mitigation_contributions"]) == 2
+        # Attributed on the runs' own draws: with one mitigation per failure
+        # mode the reductions add up to the difference between the runs
+        assert sum(c["el_reduction"] for c in mitigated["mitigation_contributions"]) == pytest.approx(
+            unmitigated["total_expected_loss"] - mitigated["total_expected_loss"]
+        )
+
+        rows = client.get(f"/api/engagements/{eid}/dashboard").json()["mitigation_summary"]
+        combined, *per_mitigation = rows
+        assert combined["mitigation_id"] is None
+        assert {m["name"] for m in per_mitigation} == {"Multi-region failover", "Annual security audit & pen testing"}
+        loo = [m["loo_el_reduction"] for m in per_mitigation]
+        assert loo == sorted(loo, reverse=True)
+        for m in per_mitigation:
+            assert m["el_reduction"] > 0
+            assert m["tvar_95_reduction"] > 0
+            assert m["roi"] == pytest.approx((m["el_reduction"] - m["cost"]) / m["cost"])
+            # The two mitigations address different failure modes, so each
+            # saves the same expected loss alone as on top of the other
+            assert m["loo_el_reduction"] == pytest.approx(m["el_reduction"])
+
     def test_dashboard_before_quantification(self):
         """Dashboard should return empty/zero metrics before any run."""
         eng = create_engagement()
@@ -537,3 +620,975 @@ class TestEndToEndQuantification:
         r = client.get(f"/api/engagements/{eid}/quantification/runs")
         assert r.status_code == 200
         assert len(r.json()) == 4  # 2 runs × 2 (unmitigated + mitigated)
+
+
+class TestObservability:
+    def test_server_timing_reports_app_and_db_time(self):
+        eid = create_engagement()["id"]
+        r = client.get(f"/api/engagements/{eid}")
+        timing = r.headers["server-timing"]
+        assert timing.startswith("app;dur=")
+        assert 'db;dur=' in timing and 'queries"' in timing
+
+    def test_run_reports_stage_timings(self):
+        eid, _ = build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        names = [entry.split(";")[0].strip() for entry in r.headers["server-timing"].split(",")]
+        assert {"app", "db", "load_inputs", "simulate", "store"} <= set(names)
+
+    def test_metrics_exposition(self):
+        registry.reset()
+        eid, _ = build_full_scenario()
+        client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        client.get(f"/api/engagements/{eid}/dashboard/")
+        client.get("/no/such/route")
+
+        r = client.get("/metrics")
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = r.text
+        assert 'crp_http_requests_total{method="POST",route="/api/engagements/{engagement_id}/quantification/run",status="200"} 1.0' in text
+        assert 'route="<unmatched>",status="404"' in text
+        assert 'crp_http_request_duration_seconds_bucket{method="POST",route="/api/engagements/",le="+Inf"} 1' in text
+        assert 'crp_db_queries_total{operation="SELECT"}' in text
+        assert "crp_simulation_trials_total 1000.0" in text  # one pass yields both runs
+        assert "crp_simulation_queue_depth 0" in text
+        assert 'crp_dashboard_cache_lookups_total{result="memory"} 1.0' in text
+
+
+    def test_metrics_scrape_does_not_create_llm_cache(self, monkeypatch):
+        monkeypatch.setattr(llm_cache, "_cache", None)
+        r = client.get("/metrics")
+        assert r.status_code == 200
+        assert "\ncrp_llm_cache_hit_ratio " not in r.text
+        assert llm_cache._cache is None
+
+        cache = LLMCache()
+        cache.get("missing")
+        monkeypatch.setattr(llm_cache, "_cache", cache)
+        assert 'crp_llm_cache_lookups_total{result="miss"} 1.0' in client.get("/metrics").text
+
+
+class TestQueryBudgets:
+    """Statement budgets for read paths; a lazy relationship in a loop fails these."""
+
+    @pytest.mark.parametrize("path, budget", [
+        ("", 2),
+        ("/failure-modes/", 1),
+        ("/mitigations/", 1),
+        ("/dashboard/", 1),
+        ("/quantification/runs", 3),
+        ("/export", 7),
+    ])
+    def test_read_routes(self, path, budget):
+        eid, _ = build_full_scenario()
+        client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        with query_budget(budget, max_repeats=1, label=path):
+            assert client.get(f"/api/engagements/{eid}{path}").status_code == 200
+
+    def test_run_loads_inputs_without_n_plus_one(self):
+        eid, _ = build_full_scenario()
+        with query_budget(40) as inspection:
+            client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        selects = {shape: n for shape, n in inspection.shapes.items() if shape.startswith("SELECT")}
+        # Per-run reads happen once for each of the two runs, never per failure mode
+        assert max(selects.values()) <= 3, inspection.report()
+
+
+class TestRunProfiling:
+    @pytest.fixture
+    def admin(self, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+        return {"X-Admin-Token": "s3cret"}
+
+    def _run(self, eid, profiler, headers=None):
+        return client.post(
+            f"/api/engagements/{eid}/quantification/run?profiler={profiler}",
+            json={"num_simulations": 1000},
+            headers=headers or {},
+        )
+
+    def test_profiling_requires_admin_token(self, admin):
+        eid, _ = build_full_scenario()
+        assert self._run(eid, "cprofile").status_code == 403
+        assert self._run(eid, "cprofile", {"X-Admin-Token": "wrong"}).status_code == 403
+        run_id = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000}).json()[0]["id"]
+        assert client.get(f"/api/engagements/{eid}/quantification/runs/{run_id}/artifacts").status_code == 403
+
+    def test_profiling_disabled_without_configured_token(self):
+        eid, _ = build_full_scenario()
+        assert self._run(eid, "sampling", {"X-Admin-Token": ""}).status_code == 403
+
+    @pytest.mark.parametrize("profiler, extra", [
+        ("cprofile", "cprofile.pstats"),
+        ("sampling", "sampling.folded"),
+        ("tracemalloc", None),
+    ])
+    def test_profile_is_stored_on_the_mitigated_run(self, admin, profiler, extra):
+        eid, _ = build_full_scenario()
+        r = self._run(eid, profiler, admin)
+        assert r.status_code == 200, r.text
+        unmitigated, run = r.json()
+        assert not unmitigated["is_mitigated"] and run["is_mitigated"]
+        for stored in (unmitigated, run):
+            assert stored["timings"]["profiler"] == profiler
+        # Both runs come from one profiled pass over shared draws, stored once
+        unmitigated_base = f"/api/engagements/{eid}/quantification/runs/{unmitigated['id']}/artifacts"
+        assert client.get(unmitigated_base, headers=admin).json() == []
+
+        base = f"/api/engagements/{eid}/quantification/runs/{run['id']}/artifacts"
+        listing = client.get(base, headers=admin).json()
+        assert [a["name"] for a in listing] == ["profile.json"] + ([extra] if extra else [])
+        assert listing[0]["size"] > 0  # a very short run may finish before the first stack sample
+
+        summary = client.get(f"{base}/profile.json", headers=admin).json()
+        assert summary["profiler"] == profiler
+        assert {fm["failure_mode_id"] for fm in summary["failure_modes"]} == {
+            rs["failure_mode_id"] for rs in run["results"] if rs["failure_mode_id"]
+        }
+        assert summary["numpy"]["live_blocks"] > 0
+
+        assert client.get(f"{base}/missing", headers=admin).status_code == 404
+        assert client.get(
+            f"/api/engagements/{eid + 1}/quantification/runs/{run['id']}/artifacts/profile.json", headers=admin
+        ).status_code == 404
+
+
+class TestMitigationPortfolio:
+    def test_best_portfolio_within_budget(self):
+        eid, _ = build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/mitigations/portfolio", json={
+            "budget": 30_000, "num_simulations": 5000, "seed": 1,
+        })
+        assert r.status_code == 200, r.text
+        data = r.json()
+        # Only the 25k security audit fits the budget
+        assert data["best"]["names"] == ["Annual security audit & pen testing"]
+        assert data["best"]["cost"] == 25_000
+        assert data["best"]["expected_loss_reduction"] > 0
+        assert data["baseline"]["mitigation_ids"] == []
+        assert data["exhaustive"]
+        costs = [p["cost"] for p in data["frontier"]]
+        assert costs == sorted(costs)
+        assert costs[-1] == 85_000  # both mitigations
+
+    def test_unlimited_budget_and_tvar_objective(self):
+        eid, _ = build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/mitigations/portfolio", json={
+            "objective": "tvar_95", "num_simulations": 2000,
+        })
+        assert r.status_code == 200, r.text
+        best = r.json()["best"]
+        assert len(best["mitigation_ids"]) == 2
+        assert best["tvar_95"] < r.json()["baseline"]["tvar_95"]
+
+    def test_invalid_requests(self):
+        eid, _ = build_full_scenario()
+        base = f"/api/engagements/{eid}/mitigations/portfolio"
+        assert client.post(base, json={"budget": -1}).status_code == 422
+        assert client.post(base, json={"objective": "var_99"}).status_code == 422
+        assert client.post(base, json={"num_simulations": 10_000_000}).status_code == 400
+        assert client.post("/api/engagements/999999/mitigations/portfolio", json={}).status_code == 400
+
+
+class TestDashboardSnapshot:
+    """Dashboard is materialized at run time and invalidated by dependent writes."""
+
+    def _run(self, eid: int):
+        r = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        assert r.status_code == 200, r.text
+
+    def test_snapshot_written_by_run(self):
+        eid, _ = build_full_scenario()
+        self._run(eid)
+
+        db = TestSession()
+        try:
+            snapshot = db.get(DashboardSnapshot, eid)
+            assert snapshot is not None
+            assert snapshot.payload["has_results"] is True
+        finally:
+            db.close()
+
+    def test_etag_not_modified(self):
+        eid, _ = build_full_scenario()
+        self._run(eid)
+
+        r = client.get(f"/api/engagements/{eid}/dashboard/")
+        assert r.status_code == 200
+        etag = r.headers["etag"]
+
+        r = client.get(f"/api/engagements/{eid}/dashboard/", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.content == b""
+
+    def test_party_write_invalidates(self):
+        eid, _ = build_full_scenario()
+        self._run(eid)
+        before = client.get(f"/api/engagements/{eid}/dashboard/")
+        party_id = before.json()["party_exposures"][0]["party_id"]
+
+        r = client.put(f"/api/engagements/{eid}/parties/{party_id}", json={"name": "Renamed Party"})
+        assert r.status_code == 200
+
+        after = client.get(f"/api/engagements/{eid}/dashboard/", headers={"If-None-Match": before.headers["etag"]})
+        assert after.status_code == 200
+        assert after.headers["etag"] != before.headers["etag"]
+        names = {p["party_name"] for p in after.json()["party_exposures"]}
+        assert "Renamed Party" in names
+
+    def test_mitigation_write_invalidates(self):
+        eid, _ = build_full_scenario()
+        self._run(eid)
+        before = client.get(f"/api/engagements/{eid}/dashboard/").json()
+        cost_before = before["mitigation_summary"][0]["cost"]
+
+        mit_id = client.get(f"/api/engagements/{eid}/mitigations").json()[0]["id"]
+        client.put(f"/api/engagements/{eid}/mitigations/{mit_id}", json={"cost": 1_000})
+
+        after = client.get(f"/api/engagements/{eid}/dashboard/").json()
+        assert after["mitigation_summary"][0]["cost"] != cost_before
+
+    def _has_snapshot(self, eid: int) -> bool:
+        db = TestSession()
+        try:
+            return db.get(DashboardSnapshot, eid) is not None
+        finally:
+            db.close()
+
+    def test_link_writes_invalidate(self):
+        eid, _ = build_full_scenario()
+        mit_id = client.get(f"/api/engagements/{eid}/mitigations").json()[0]["id"]
+        fm_id = client.get(f"/api/engagements/{eid}/failure-modes").json()[0]["id"]
+        link = {"failure_mode_id": fm_id, "frequency_reduction": 0.2, "severity_reduction": 0.1}
+
+        writes = [
+            lambda: client.post(f"/api/engagements/{eid}/mitigations/{mit_id}/link", json=link),
+            lambda: client.post(f"/api/engagements/{eid}/mitigations/links", json=[{**link, "mitigation_id": mit_id}]),
+            lambda: client.delete(f"/api/engagements/{eid}/mitigations/{mit_id}/unlink/{fm_id}"),
+        ]
+        for write in writes:
+            self._run(eid)
+            client.get(f"/api/engagements/{eid}/mitigations")
+            assert self._has_snapshot(eid)
+            r = write()
+            assert r.status_code < 300, r.text
+            assert not self._has_snapshot(eid)
+            assert eid not in dashboard_service._cache
+
+    def test_failed_write_keeps_snapshot(self):
+        eid, _ = build_full_scenario()
+        self._run(eid)
+        r = client.delete(f"/api/engagements/{eid}/mitigations/9999/unlink/9999")
+        assert r.status_code == 404
+        assert self._has_snapshot(eid)
+
+    def test_concurrent_rebuilds_after_invalidation(self):
+        eid, _ = build_full_scenario()
+        self._run(eid)
+        party_id = client.get(f"/api/engagements/{eid}/parties").json()[0]["id"]
+        client.put(f"/api/engagements/{eid}/parties/{party_id}", json={"name": "Renamed Party"})
+        url = f"/api/engagements/{eid}/dashboard/"
+
+        async def fire():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                return await asyncio.gather(*(ac.get(url) for _ in range(8)))
+
+        responses = asyncio.run(fire())
+        assert [r.status_code for r in responses] == [200] * 8
+        assert len({r.headers["etag"] for r in responses}) == 1
+
+    def test_rolled_back_snapshot_is_not_cached(self):
+        eid, _ = build_full_scenario()
+        db = TestSession()
+        try:
+            engagement = db.get(Engagement, eid)
+            dashboard_service.refresh_dashboard_snapshot(db, engagement)
+            db.rollback()
+        finally:
+            db.close()
+        assert eid not in dashboard_service._cache
+
+        db = TestSession()
+        try:
+            etag, payload = dashboard_service.get_dashboard_snapshot(db, eid)
+        finally:
+            db.close()
+        assert dashboard_service._cache[eid][0] == etag
+        assert dashboard_service._cache[eid][1] is not payload
+
+    def test_missing_engagement(self):
+        r = client.get("/api/engagements/9999/dashboard/")
+        assert r.status_code == 404
+
+
+class TestConditionalGet:
+    """Read endpoints return 304 when the client's ETag is current."""
+
+    def _assert_revalidates(self, url: str):
+        r = client.get(url)
+        assert r.status_code == 200, r.text
+        etag = r.headers["etag"]
+        assert r.headers["cache-control"] == "private, no-cache"
+
+        r = client.get(url, headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.headers["etag"] == etag
+        return etag
+
+    def test_engagement(self):
+        eng = create_engagement()
+        url = f"/api/engagements/{eng['id']}"
+        etag = self._assert_revalidates(url)
+
+        client.put(url, json={"name": "Changed"})
+        r = client.get(url, headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.json()["name"] == "Changed"
+
+    def test_engagement_list(self):
+        create_engagement()
+        etag = self._assert_revalidates("/api/engagements/")
+
+        create_engagement()
+        r = client.get("/api/engagements/", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert len(r.json()) == 2
+
+    def test_runs(self):
+        eid, _ = build_full_scenario()
+        client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        runs_url = f"/api/engagements/{eid}/quantification/runs"
+        etag = self._assert_revalidates(runs_url)
+
+        run_id = client.get(runs_url).json()[0]["id"]
+        self._assert_revalidates(f"{runs_url}/{run_id}")
+
+        client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        r = client.get(runs_url, headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert len(r.json()) == 4
+
+    def test_wildcard_and_list_of_tags(self):
+        eng = create_engagement()
+        url = f"/api/engagements/{eng['id']}"
+        etag = client.get(url).headers["etag"]
+        assert client.get(url, headers={"If-None-Match": "*"}).status_code == 304
+        assert client.get(url, headers={"If-None-Match": f'W/"stale", {etag}'}).status_code == 304
+
+    def test_missing_run(self):
+        eng = create_engagement()
+        r = client.get(f"/api/engagements/{eng['id']}/quantification/runs/9999")
+        assert r.status_code == 404
+
+
+class TestRunSerialization:
+    """Runs bypass response-model validation but keep the documented shape."""
+
+    def _run(self):
+        eid, _ = build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        assert r.status_code == 200, r.text
+        return eid, r.json()
+
+    def test_matches_response_schema(self):
+        eid, runs = self._run()
+        for run in runs:
+            validated = QuantificationRunResponse.model_validate(run).model_dump(mode="json")
+            assert validated == run
+
+        listed = client.get(f"/api/engagements/{eid}/quantification/runs").json()
+        assert sorted(r["id"] for r in listed) == sorted(r["id"] for r in runs)
+
+    def test_compact_encoding(self):
+        eid, runs = self._run()
+        run_id = runs[0]["id"]
+        full = client.get(f"/api/engagements/{eid}/quantification/runs/{run_id}").json()
+        compact = client.get(f"/api/engagements/{eid}/quantification/runs/{run_id}?compact=true").json()
+
+        hist = compact["histogram"]
+        rebuilt = [hist["start"] + i * hist["width"] for i in range(len(hist["counts"]))]
+        assert rebuilt == pytest.approx(full["histogram_bins"], rel=1e-9)
+        assert hist["counts"] == full["histogram_counts"]
+
+        columns = compact["results"]
+        assert columns["id"] == [r["id"] for r in full["results"]]
+        assert columns["expected_loss"] == [r["expected_loss"] for r in full["results"]]
+        assert len(columns["histogram"]) == len(full["results"])
+
+    def test_gzip_large_response(self):
+        eid, _ = self._run()
+        r = client.get(f"/api/engagements/{eid}/quantification/runs", headers={"Accept-Encoding": "gzip"})
+        assert r.status_code == 200
+        assert r.headers["content-encoding"] == "gzip"
+        assert len(r.json()) == 2
+
+
+class TestBulkEndpoints:
+    """Batch creation and upsert in a single request."""
+
+    def test_bulk_failure_modes_with_scenarios(self):
+        eng = create_engagement()
+        eid = eng["id"]
+        buyer, supplier = add_parties(eid)
+
+        payload = [
+            {
+                "name": f"Generated FM {i}",
+                "category": "Delivery Failure",
+                "source": "ai",
+                "frequency_low": 0.1, "frequency_mid": 0.5, "frequency_high": 1.0,
+                "loss_scenarios": [
+                    {"affected_party_id": buyer["id"], "loss_category": "Business Interruption",
+                     "severity_low": 1_000, "severity_mid": 10_000, "severity_high": 100_000},
+                    {"affected_party_id": supplier["id"], "loss_category": "Reputational Damage"},
+                ][: (i % 2) + 1],
+            }
+            for i in range(6)
+        ]
+        r = client.post(f"/api/engagements/{eid}/failure-modes/bulk", json=payload)
+        assert r.status_code == 201, r.text
+        body = r.json()
+        assert len(body["ids"]) == 6
+        assert [len(ids) for ids in body["loss_scenario_ids"]] == [1, 2, 1, 2, 1, 2]
+
+        fms = client.get(f"/api/engagements/{eid}/failure-modes").json()
+        assert [fm["id"] for fm in fms] == body["ids"]
+        assert fms[3]["name"] == "Generated FM 3"
+        assert fms[3]["source"] == "ai"
+
+        scenarios = client.get(f"/api/engagements/{eid}/failure-modes/{body['ids'][1]}/loss-scenarios").json()
+        assert [s["id"] for s in scenarios] == body["loss_scenario_ids"][1]
+        assert scenarios[1]["affected_party_id"] == supplier["id"]
+
+        # Generated engagements are immediately quantifiable
+        r = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        assert r.status_code == 200, r.text
+
+    def test_bulk_rejects_foreign_party_atomically(self):
+        eng = create_engagement()
+        eid = eng["id"]
+        buyer, _ = add_parties(eid)
+        payload = [
+            {"name": "OK", "loss_scenarios": [{"affected_party_id": buyer["id"]}]},
+            {"name": "Bad", "loss_scenarios": [{"affected_party_id": 9999}]},
+        ]
+        r = client.post(f"/api/engagements/{eid}/failure-modes/bulk", json=payload)
+        assert r.status_code == 400
+        assert client.get(f"/api/engagements/{eid}/failure-modes").json() == []
+
+    def test_bulk_rejects_foreign_goods_service(self):
+        other_gs = add_goods_service(create_engagement()["id"])
+        eid = create_engagement()["id"]
+        own_gs = add_goods_service(eid)
+        payload = [
+            {"name": "OK", "goods_service_id": own_gs["id"]},
+            {"name": "Bad", "goods_service_id": other_gs["id"]},
+        ]
+        r = client.post(f"/api/engagements/{eid}/failure-modes/bulk", json=payload)
+        assert r.status_code == 400
+        assert str(other_gs["id"]) in r.json()["detail"]
+        assert client.get(f"/api/engagements/{eid}/failure-modes").json() == []
+
+    def test_bulk_loss_scenarios(self):
+        eng = create_engagement()
+        eid = eng["id"]
+        buyer, supplier = add_parties(eid)
+        gs = add_goods_service(eid)
+        fm1, _ = add_failure_modes(eid, gs["id"])
+
+        r = client.post(f"/api/engagements/{eid}/failure-modes/{fm1['id']}/loss-scenarios/bulk", json=[
+            {"affected_party_id": buyer["id"], "name": "A"},
+            {"affected_party_id": supplier["id"], "name": "B"},
+        ])
+        assert r.status_code == 201, r.text
+        ids = r.json()["ids"]
+        listed = client.get(f"/api/engagements/{eid}/failure-modes/{fm1['id']}/loss-scenarios").json()
+        assert [s["id"] for s in listed] == ids
+        assert [s["name"] for s in listed] == ["A", "B"]
+
+    def test_bulk_link_upsert(self):
+        eng = create_engagement()
+        eid = eng["id"]
+        gs = add_goods_service(eid)
+        fm1, fm2 = add_failure_modes(eid, gs["id"])
+        mit1, mit2 = add_mitigations(eid, fm1["id"], fm2["id"])
+
+        r = client.post(f"/api/engagements/{eid}/mitigations/links", json=[
+            # existing link (mit1 → fm1) is updated
+            {"mitigation_id": mit1["id"], "failure_mode_id": fm1["id"], "frequency_reduction": 0.9, "severity_reduction": 0.1},
+            # new links
+            {"mitigation_id": mit1["id"], "failure_mode_id": fm2["id"], "frequency_reduction": 0.2},
+            {"mitigation_id": mit2["id"], "failure_mode_id": fm1["id"], "severity_reduction": 0.3},
+        ])
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["created"] == 2
+        assert body["updated"] == 1
+        assert len(set(body["ids"])) == 3
+
+        db = TestSession()
+        try:
+            link = db.get(FailureModeMitigation, body["ids"][0])
+            assert link.frequency_reduction == 0.9
+            assert db.query(FailureModeMitigation).count() == 4
+        finally:
+            db.close()
+
+    def test_bulk_link_rejects_foreign_ids(self):
+        eng = create_engagement()
+        eid = eng["id"]
+        gs = add_goods_service(eid)
+        fm1, fm2 = add_failure_modes(eid, gs["id"])
+        mit1, _ = add_mitigations(eid, fm1["id"], fm2["id"])
+        r = client.post(f"/api/engagements/{eid}/mitigations/links", json=[
+            {"mitigation_id": mit1["id"], "failure_mode_id": 9999},
+        ])
+        assert r.status_code == 400
+
+
+def _strip_ids(document: dict) -> dict:
+    """Export document with ids removed, for comparing copies."""
+    return {
+        "engagement": {k: v for k, v in document["engagement"].items() if k != "name"},
+        "parties": [{k: v for k, v in p.items() if k != "id"} for p in document["parties"]],
+        "goods_services": [{k: v for k, v in g.items() if k != "id"} for g in document["goods_services"]],
+        "failure_modes": [
+            {
+                **{k: v for k, v in fm.items() if k not in ("id", "goods_service_id", "loss_scenarios")},
+                "loss_scenarios": [
+                    {k: v for k, v in ls.items() if k not in ("id", "affected_party_id")}
+                    for ls in fm["loss_scenarios"]
+                ],
+            }
+            for fm in document["failure_modes"]
+        ],
+        "mitigations": [
+            {
+                **{k: v for k, v in m.items() if k not in ("id", "links")},
+                "links": [{k: v for k, v in link.items() if k != "failure_mode_id"} for link in m["links"]],
+            }
+            for m in document["mitigations"]
+        ],
+    }
+
+
+class TestEngagementTransfer:
+    def test_export_document(self):
+        eid, eng = build_full_scenario()
+        r = client.get(f"/api/engagements/{eid}/export")
+        assert r.status_code == 200
+        doc = r.json()
+        assert doc["format_version"] == 1
+        assert doc["engagement"]["name"] == eng["name"]
+        assert len(doc["parties"]) == 2
+        assert [len(fm["loss_scenarios"]) for fm in doc["failure_modes"]] == [2, 2]
+        assert [len(m["links"]) for m in doc["mitigations"]] == [1, 1]
+        assert doc["parties"][0]["role"] == "buyer"
+
+    def test_import_roundtrip(self):
+        eid, _ = build_full_scenario()
+        doc = client.get(f"/api/engagements/{eid}/export").json()
+
+        r = client.post("/api/engagements/import", json=doc)
+        assert r.status_code == 201, r.text
+        new_id = r.json()["id"]
+        assert new_id != eid
+
+        copy = client.get(f"/api/engagements/{new_id}/export").json()
+        assert _strip_ids(copy) == _strip_ids(doc)
+
+        # References point at the new rows, not the originals
+        new_party_ids = {p["id"] for p in copy["parties"]}
+        new_fm_ids = {fm["id"] for fm in copy["failure_modes"]}
+        assert all(ls["affected_party_id"] in new_party_ids for fm in copy["failure_modes"] for ls in fm["loss_scenarios"])
+        assert all(link["failure_mode_id"] in new_fm_ids for m in copy["mitigations"] for link in m["links"])
+
+    @pytest.mark.parametrize("version", [0, 2])
+    def test_import_rejects_unknown_format_version(self, version):
+        eid, _ = build_full_scenario()
+        doc = client.get(f"/api/engagements/{eid}/export").json()
+        doc["format_version"] = version
+
+        before = len(client.get("/api/engagements").json())
+        r = client.post("/api/engagements/import", json=doc)
+        assert r.status_code == 400
+        assert "format_version" in r.json()["detail"]
+        assert len(client.get("/api/engagements").json()) == before
+
+    def test_import_rejects_dangling_reference(self):
+        eid, _ = build_full_scenario()
+        doc = client.get(f"/api/engagements/{eid}/export").json()
+        doc["failure_modes"][0]["loss_scenarios"][0]["affected_party_id"] = 9999
+
+        before = len(client.get("/api/engagements").json())
+        r = client.post("/api/engagements/import", json=doc)
+        assert r.status_code == 400
+        assert len(client.get("/api/engagements").json()) == before
+
+    def test_clone_is_independent_and_quantifiable(self):
+        eid, eng = build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/clone", json={})
+        assert r.status_code == 201, r.text
+        clone = r.json()
+        assert clone["name"] == f"{eng['name']} (copy)"
+
+        original = client.get(f"/api/engagements/{eid}/export").json()
+        copied = client.get(f"/api/engagements/{clone['id']}/export").json()
+        assert _strip_ids(copied) == _strip_ids(original)
+
+        # Editing the clone leaves the original untouched
+        fm_id = copied["failure_modes"][0]["id"]
+        client.put(f"/api/engagements/{clone['id']}/failure-modes/{fm_id}", json={"name": "Clone only"})
+        assert client.get(f"/api/engagements/{eid}/export").json() == original
+
+        r = client.post(f"/api/engagements/{clone['id']}/quantification/run", json={"num_simulations": 1000})
+        assert r.status_code == 200, r.text
+
+    def test_clone_named(self):
+        eid, _ = build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/clone", json={"name": "Template copy"})
+        assert r.json()["name"] == "Template copy"
+
+    def test_clone_missing(self):
+        assert client.post("/api/engagements/9999/clone", json={}).status_code == 404
+        assert client.get("/api/engagements/9999/export").status_code == 404
+
+
+class TestAsyncStack:
+    """Async routers: simulations leave the event loop, reads see committed writes."""
+
+    def test_simulation_runs_on_dedicated_executor(self, monkeypatch):
+        threads = []
+        original = quantification_router.simulate_and_attribute
+
+        def recording_simulate(*args):
+            threads.append(threading.current_thread().name)
+            return original(*args)
+
+        monkeypatch.setattr(quantification_router, "simulate_and_attribute", recording_simulate)
+        eid, _ = build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        assert r.status_code == 200, r.text
+        assert len(threads) == 1 and threads[0].startswith("simulation")
+
+    def test_missing_engagement_run_is_400(self):
+        r = client.post("/api/engagements/9999/quantification/run", json={"num_simulations": 1000})
+        assert r.status_code == 400
+
+    def test_delete_cascades_through_async_session(self):
+        eid, _ = build_full_scenario()
+        client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        assert client.delete(f"/api/engagements/{eid}").status_code == 204
+        db = TestSession()
+        try:
+            assert db.query(FailureModeMitigation).count() == 0
+            assert db.query(DashboardSnapshot).count() == 0
+        finally:
+            db.close()
+
+
+class TestSimulationAdmission:
+    """Caps, queue-depth backpressure and single-flight for quantification runs."""
+
+    def test_trial_cap(self, monkeypatch):
+        monkeypatch.setattr(settings, "SIMULATION_MAX_TRIALS", 5000)
+        eid, _ = build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 5001})
+        assert r.status_code == 400
+        assert "5,000" in r.json()["detail"]
+
+    def test_sample_cap(self, monkeypatch):
+        # The full scenario has 4 loss scenarios
+        monkeypatch.setattr(settings, "SIMULATION_MAX_SAMPLES", 4 * 1000)
+        eid, _ = build_full_scenario()
+        url = f"/api/engagements/{eid}/quantification/run"
+        assert client.post(url, json={"num_simulations": 1000}).status_code == 200
+        r = client.post(url, json={"num_simulations": 1001})
+        assert r.status_code == 400
+        assert "loss scenarios" in r.json()["detail"]
+
+    def test_non_positive_trials_rejected(self):
+        eid, _ = build_full_scenario()
+        r = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 0})
+        assert r.status_code == 422
+
+    def test_queue_full_returns_429(self, monkeypatch):
+        eid, _ = build_full_scenario()
+        full = settings.SIMULATION_WORKERS + settings.SIMULATION_MAX_QUEUE
+        monkeypatch.setattr(simulation_executor, "_in_flight", full)
+        r = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000})
+        assert r.status_code == 429
+        assert int(r.headers["Retry-After"]) >= 1
+        assert client.get(f"/api/engagements/{eid}/quantification/runs").json() == []
+
+    def test_concurrent_duplicates_share_one_run(self, monkeypatch):
+        calls = []
+        original = quantification_router.simulate_and_attribute
+
+        def slow_simulate(*args):
+            calls.append(args[1])
+            time.sleep(0.3)  # keep the first run in flight while the others arrive
+            return original(*args)
+
+        monkeypatch.setattr(quantification_router, "simulate_and_attribute", slow_simulate)
+        eid, _ = build_full_scenario()
+        url = f"/api/engagements/{eid}/quantification/run"
+
+        async def fire():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                return await asyncio.gather(
+                    ac.post(url, json={"num_simulations": 1000}),
+                    ac.post(url, json={"num_simulations": 1000}),
+                    ac.post(url, json={"num_simulations": 2000}),
+                )
+
+        same_a, same_b, other = asyncio.run(fire())
+        assert [r.status_code for r in (same_a, same_b, other)] == [200, 200, 200]
+        assert sorted(calls) == [1000, 2000]
+        assert [run["id"] for run in same_a.json()] == [run["id"] for run in same_b.json()]
+        assert len(client.get(f"/api/engagements/{eid}/quantification/runs").json()) == 4
+        # The coalesced caller reports the shared run's stages too
+        for r in (same_a, same_b):
+            names = [entry.split(";")[0].strip() for entry in r.headers["server-timing"].split(",")]
+            assert {"load_inputs", "simulate", "store"} <= set(names)
+
+    def test_cancelled_first_caller_does_not_fail_the_others(self, monkeypatch):
+        calls = []
+        original = quantification_router.simulate_and_attribute
+
+        def slow_simulate(*args):
+            calls.append(args[1])
+            time.sleep(0.3)
+            return original(*args)
+
+        monkeypatch.setattr(quantification_router, "simulate_and_attribute", slow_simulate)
+        eid, _ = build_full_scenario()
+        url = f"/api/engagements/{eid}/quantification/run"
+
+        async def fire():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                first = asyncio.ensure_future(ac.post(url, json={"num_simulations": 1000}))
+                await asyncio.sleep(0.1)  # the first request is simulating
+                second = asyncio.ensure_future(ac.post(url, json={"num_simulations": 1000}))
+                await asyncio.sleep(0.05)
+                first.cancel()  # e.g. its client disconnected
+                return await second
+
+        r = asyncio.run(fire())
+        assert r.status_code == 200, r.text
+        assert calls == [1000]
+        assert [run["is_mitigated"] for run in r.json()] == [False, True]
+        stored = client.get(f"/api/engagements/{eid}/quantification/runs").json()
+        assert sorted(run["id"] for run in stored) == sorted(run["id"] for run in r.json())
+
+
+class TestAIGeneration:
+    """AI endpoints against a stub client: shared client, bulk concurrency."""
+
+    @pytest.fixture
+    def stub(self, monkeypatch):
+        stub = StubAnthropic(delay=0.05)
+        cache = LLMCache()  # memory only, fresh per test
+        monkeypatch.setattr(claude_service, "get_async_client", lambda: stub)
+        monkeypatch.setattr(llm_cache, "_cache", cache)
+        ai_metrics.reset()
+        return stub
+
+    def _engagement_with_goods(self, names):
+        eid = create_engagement()["id"]
+        add_parties(eid)
+        ids = []
+        for name in names:
+            r = client.post(f"/api/engagements/{eid}/goods-services", json={"name": name, "supply_type": "services"})
+            assert r.status_code == 201, r.text
+            ids.append(r.json()["id"])
+        return eid, ids
+
+    def test_generate_failure_modes(self, stub):
+        eid, (gs_id,) = self._engagement_with_goods(["Hosting"])
+        r = client.post(f"/api/engagements/{eid}/ai/generate-failure-modes", json={"goods_service_id": gs_id})
+        assert r.status_code == 200, r.text
+        assert r.json()["data"] == stub.reply
+        assert "Hosting" in stub.prompts[0]
+        # The stable prefix is below the model's cacheable minimum
+        assert "cache_control" not in stub.contents[0][0]
+
+    def test_bulk_is_concurrent_and_bounded(self, stub, monkeypatch):
+        monkeypatch.setattr(settings, "AI_MAX_CONCURRENCY", 2)
+        eid, ids = self._engagement_with_goods(["Hosting", "Support", "Licences"])
+        r = client.post(f"/api/engagements/{eid}/ai/generate-failure-modes/bulk", json={})
+        assert r.status_code == 200, r.text
+        results = r.json()["results"]
+        assert [item["goods_service_id"] for item in results] == ids
+        assert all(item["data"] == stub.reply and item["error"] is None for item in results)
+        assert stub.peak == 2
+
+    def test_bulk_reports_partial_failures(self, stub):
+        stub.fail_on = "Support"
+        eid, ids = self._engagement_with_goods(["Hosting", "Support"])
+        r = client.post(f"/api/engagements/{eid}/ai/generate-failure-modes/bulk", json={"goods_service_ids": ids[::-1]})
+        assert r.status_code == 200, r.text
+        failed, ok = r.json()["results"]
+        assert failed["goods_service_id"] == ids[1] and "overloaded" in failed["error"]
+        assert ok["goods_service_id"] == ids[0] and ok["data"] == stub.reply
+
+    def test_bulk_unknown_goods_service(self, stub):
+        eid, _ = self._engagement_with_goods(["Hosting"])
+        r = client.post(f"/api/engagements/{eid}/ai/generate-failure-modes/bulk", json={"goods_service_ids": [9999]})
+        assert r.status_code == 404
+
+    def test_client_is_shared_per_event_loop(self):
+        async def two():
+            return claude_service.get_async_client(), claude_service.get_async_client()
+
+        first, second = asyncio.run(two())
+        assert first is second
+
+    def test_repeat_is_served_from_cache(self, stub):
+        eid, (gs_id,) = self._engagement_with_goods(["Hosting"])
+        url = f"/api/engagements/{eid}/ai/generate-failure-modes"
+        first = client.post(url, json={"goods_service_id": gs_id}).json()
+        assert client.post(url, json={"goods_service_id": gs_id}).json() == first
+        assert len(stub.prompts) == 1
+        client.post(f"{url}?bypass_cache=true", json={"goods_service_id": gs_id})
+        assert len(stub.prompts) == 2
+
+    def test_cache_stats_endpoint(self, stub):
+        r = client.get("/api/ai/cache")
+        assert r.status_code == 200
+        assert r.json()["enabled"] is True
+        assert {"memory_hits", "disk_hits", "misses", "hit_rate"} <= set(r.json())
+
+    def test_stream_failure_modes_sse(self, stub):
+        stub.reply = {"failure_modes": [{"name": "One"}, {"name": "Two"}]}
+        eid, (gs_id,) = self._engagement_with_goods(["Hosting"])
+        r = client.post(f"/api/engagements/{eid}/ai/generate-failure-modes/stream", json={"goods_service_id": gs_id})
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/event-stream")
+        assert r.headers["content-encoding"] == "identity"  # never buffered by gzip
+        events = [
+            (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+            for block in r.text.strip().split("\n\n")
+        ]
+        assert events[:2] == [("item", {"name": "One"}), ("item", {"name": "Two"})]
+        assert events[2][0] == "done" and events[2][1]["count"] == 2
+
+    def test_stream_reports_errors_as_events(self, stub):
+        stub.fail_on = "Hosting"
+        eid, (gs_id,) = self._engagement_with_goods(["Hosting"])
+        r = client.post(f"/api/engagements/{eid}/ai/generate-failure-modes/stream", json={"goods_service_id": gs_id})
+        assert r.text.startswith("event: error")
+        assert "overloaded" in r.text
+
+    def test_stream_mitigations_requires_failure_modes(self, stub):
+        eid, _ = self._engagement_with_goods(["Hosting"])
+        assert client.post(f"/api/engagements/{eid}/ai/suggest-mitigations/stream", json={}).status_code == 400
+
+    def _scenarios(self):
+        eid = create_engagement()["id"]
+        buyer, supplier = add_parties(eid)
+        fm1, fm2 = add_failure_modes(eid, add_goods_service(eid)["id"])
+        return eid, fm1["id"], add_loss_scenarios(eid, fm1["id"], fm2["id"], buyer["id"], supplier["id"])
+
+    def test_batch_estimate_losses(self, stub, monkeypatch):
+        monkeypatch.setattr(settings, "AI_ESTIMATE_BATCH_SIZE", 2)
+        eid, fm1_id, scenarios = self._scenarios()
+        ids = [ls["id"] for ls in scenarios]
+        estimate = {"severity_low": 1, "severity_mid": 2, "severity_high": 3, "distribution_type": "uniform"}
+        stub.reply = {"estimates": [{"scenario_id": i, **estimate} for i in ids[:3]] + [
+            {"scenario_id": ids[3], "severity_low": 9, "severity_mid": 2, "severity_high": 3},
+        ]}
+
+        r = client.post(f"/api/engagements/{eid}/ai/estimate-losses/batch", json={})
+        assert r.status_code == 200, r.text
+        body = r.json()
+        # Two calls, one per failure mode, each stating the engagement context once
+        assert len(stub.prompts) == 2
+        assert all(p.count("**Industry:**") == 1 for p in stub.prompts)
+        assert "Cloud Service Outage" in stub.prompts[0] and "Data Breach" not in stub.prompts[0]
+        assert [e["loss_scenario_id"] for e in body["estimates"]] == ids[:3]
+        assert body["updated"] == 3
+        assert len(body["errors"]) == 1 and str(ids[3]) in body["errors"][0]
+
+        listed = client.get(f"/api/engagements/{eid}/failure-modes/{fm1_id}/loss-scenarios").json()
+        assert [(ls["severity_mid"], ls["distribution_type"]) for ls in listed] == [(2, "uniform")] * 2
+
+    def test_batch_estimate_without_apply(self, stub):
+        eid, fm1_id, scenarios = self._scenarios()
+        stub.reply = {"estimates": [{"scenario_id": scenarios[0]["id"], "severity_low": 1, "severity_mid": 2, "severity_high": 3}]}
+        r = client.post(
+            f"/api/engagements/{eid}/ai/estimate-losses/batch",
+            json={"loss_scenario_ids": [scenarios[0]["id"]], "apply": False},
+        )
+        assert r.status_code == 200, r.text
+        assert r.json()["updated"] == 0 and len(r.json()["estimates"]) == 1
+        listed = client.get(f"/api/engagements/{eid}/failure-modes/{fm1_id}/loss-scenarios").json()
+        assert listed[0]["severity_mid"] == scenarios[0]["severity_mid"]
+
+    def test_batch_estimate_reports_failed_calls(self, stub):
+        stub.fail_on = "Cloud Service Outage"
+        eid, _, scenarios = self._scenarios()
+        r = client.post(f"/api/engagements/{eid}/ai/estimate-losses/batch", json={})
+        assert r.status_code == 200, r.text
+        assert r.json()["updated"] == 0
+        assert "overloaded" in r.json()["errors"][0]
+
+    def test_batch_estimate_unknown_scenario(self, stub):
+        eid, _, _ = self._scenarios()
+        r = client.post(f"/api/engagements/{eid}/ai/estimate-losses/batch", json={"loss_scenario_ids": [9999]})
+        assert r.status_code == 404
+
+    def test_suggest_mitigations_modes(self, stub, monkeypatch):
+        monkeypatch.setattr(settings, "AI_MITIGATION_CHUNK_SIZE", 1)
+        eid = create_engagement()["id"]
+        add_failure_modes(eid, add_goods_service(eid)["id"])
+        stub.reply = {"mitigations": [{
+            "name": "Multi-region failover",
+            "applicable_failure_modes": [{"failure_mode_name": "Cloud Service Outage", "frequency_reduction": 0.5}],
+        }]}
+        url = f"/api/engagements/{eid}/ai/suggest-mitigations"
+
+        r = client.post(url, json={"mode": "single"})
+        assert r.status_code == 200 and len(stub.prompts) == 1
+        assert r.json()["data"] == stub.reply
+
+        r = client.post(url, json={})  # auto: two failure modes exceed the chunk size
+        assert r.status_code == 200, r.text
+        assert len(stub.prompts) == 3
+        data = r.json()["data"]
+        assert data["chunks"] == 2 and data["errors"] == []
+        assert [m["name"] for m in data["mitigations"]] == ["Multi-region failover"]
+
+    def test_mitigation_prompt_ranks_by_latest_expected_loss(self, stub):
+        eid, _ = build_full_scenario()
+        url = f"/api/engagements/{eid}/ai/suggest-mitigations"
+        assert client.post(url, json={"mode": "single"}).status_code == 200
+        assert "EL est: USD N/A" in stub.prompts[-1]
+
+        runs = client.post(f"/api/engagements/{eid}/quantification/run", json={"num_simulations": 1000}).json()
+        unmitigated = next(run for run in runs if not run["is_mitigated"])
+        expected = {
+            rs["label"]: round(rs["expected_loss"]) for rs in unmitigated["results"] if rs["failure_mode_id"]
+        }
+        assert client.post(f"{url}?bypass_cache=true", json={"mode": "single"}).status_code == 200
+        for name, loss in expected.items():
+            assert f"**{name}** (category:" in stub.prompts[-1]
+            assert f"EL est: USD {loss})" in stub.prompts[-1]
+
+    def test_metrics_endpoint(self, stub):
+        eid, (gs_id,) = self._engagement_with_goods(["Hosting"])
+        url = f"/api/engagements/{eid}/ai/generate-failure-modes"
+        client.post(url, json={"goods_service_id": gs_id})
+        client.post(url, json={"goods_service_id": gs_id})  # cache hit
+        r = client.get("/api/ai/metrics")
+        assert r.status_code == 200
+        body = r.json()
+        endpoint = body["by_endpoint"]["generate-failure-modes"]
+        assert endpoint["calls"] == 2 and endpoint["cache_hits"] == 1
+        assert endpoint["input_tokens"] == 100 and endpoint["cost_usd"] > 0
+        assert set(body["by_engagement"]) == {str(eid)}
+        assert client.get("/api/ai/metrics", params={"engagement_id": eid + 1}).json()["totals"]["calls"] == 0
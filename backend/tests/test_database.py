@@ -0,0 +1,65 @@
+"""Tests for engine construction and SQLite connection tuning."""
+
+import asyncio
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import async_database_url, create_async_db_engine, create_db_engine
+
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_file_engine_applies_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+    try:
+        assert _pragma(engine, "journal_mode") == "wal"
+        assert _pragma(engine, "synchronous") == 1  # NORMAL
+        assert _pragma(engine, "busy_timeout") == 5000
+        assert _pragma(engine, "cache_size") == -64 * 1024
+    finally:
+        engine.dispose()
+
+
+def test_pragma_overrides(tmp_path):
+    engine = create_db_engine(
+        f"sqlite:///{tmp_path / 'plain.db'}",
+        pragmas={"journal_mode": "DELETE", "synchronous": "FULL"},
+    )
+    try:
+        assert _pragma(engine, "journal_mode") == "delete"
+        assert _pragma(engine, "synchronous") == 2  # FULL
+    finally:
+        engine.dispose()
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./contract_risk.db") == "sqlite+aiosqlite:///./contract_risk.db"
+    assert async_database_url("postgresql://u:p@db/risk") == "postgresql+asyncpg://u:p@db/risk"
+    assert async_database_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+def test_postgres_engines_can_be_created():
+    # Both drivers are installed from requirements.txt; no server is contacted
+    url = "postgresql://u:p@db/risk"
+    engines = [create_db_engine(url), create_async_db_engine(async_database_url(url))]
+    assert [e.dialect.driver for e in engines] == ["psycopg2", "asyncpg"]
+    assert engines[0].pool.size() == settings.DB_POOL_SIZE
+
+
+def test_async_sqlite_engine_applies_pragmas(tmp_path):
+    async def check():
+        engine = create_async_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        try:
+            async with engine.connect() as conn:
+                return (
+                    (await conn.execute(text("PRAGMA journal_mode"))).scalar(),
+                    (await conn.execute(text("PRAGMA busy_timeout"))).scalar(),
+                )
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(check()) == ("wal", 5000)
@@ -51,6 +51,7 @@ class TestRunSimulation:
         assert result.n_simulations == 10000
         assert len(result.total_losses) == 10000
         assert len(result.failure_mode_results) == 1
+        assert result.failure_mode_results[0].seconds > 0
 
     def test_expected_loss_reasonable(self):
         fm = make_simple_fm(freq_mid=1.0, sev_mid=10000.0)
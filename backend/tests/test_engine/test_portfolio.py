@@ -0,0 +1,231 @@
+"""Tests for mitigation portfolio optimization over common random numbers."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from app.engine.monte_carlo import (
+    FailureModeInput,
+    LossScenarioInput,
+    MitigationEffect,
+    SimulationConfig,
+    run_simulation,
+)
+from app.engine.portfolio import (
+    CommonDraws,
+    MitigationOption,
+    optimize_portfolio,
+    simulate_on_common_draws,
+    tail_value_at_risk,
+)
+from app.engine.risk_metrics import compute_metrics
+
+
+def make_fm(fm_id, mitigations, freq_mid=1.0, sev_mid=10_000.0, distribution_type="lognormal"):
+    return FailureModeInput(
+        failure_mode_id=fm_id,
+        name=f"FM {fm_id}",
+        frequency_low=freq_mid * 0.5,
+        frequency_mid=freq_mid,
+        frequency_high=freq_mid * 1.5,
+        loss_scenarios=[
+            LossScenarioInput(
+                scenario_id=fm_id,
+                name="Scenario",
+                party_id=1,
+                loss_category="direct",
+                distribution_type=distribution_type,
+                severity_low=sev_mid * 0.1,
+                severity_mid=sev_mid,
+                severity_high=sev_mid * 10,
+            )
+        ],
+        mitigations=mitigations,
+    )
+
+
+def make_portfolio(n_mitigations=8, n_failure_modes=12, seed=7):
+    rng = np.random.default_rng(seed)
+    options = [
+        MitigationOption(mitigation_id=m, name=f"M{m}", cost=float(rng.uniform(10_000, 50_000)))
+        for m in range(1, n_mitigations + 1)
+    ]
+    fms = []
+    for fm_id in range(1, n_failure_modes + 1):
+        mitigation_ids = rng.choice(n_mitigations, size=2, replace=False) + 1
+        fms.append(make_fm(fm_id, [
+            MitigationEffect(int(m), f"M{m}", float(rng.uniform(0, 0.6)), float(rng.uniform(0, 0.6)))
+            for m in mitigation_ids
+        ], sev_mid=float(rng.uniform(5_000, 50_000))))
+    return fms, options
+
+
+class TestCommonDraws:
+    def test_baseline_matches_unmitigated_simulation(self):
+        fms, _ = make_portfolio()
+        draws = CommonDraws.sample(fms, 100_000, seed=1)
+        simulated = run_simulation(fms, SimulationConfig(n_simulations=100_000, seed=2))
+        assert np.mean(draws.baseline) == pytest.approx(np.mean(simulated.total_losses), rel=0.03)
+
+    def test_all_mitigations_match_mitigated_simulation(self):
+        fms, options = make_portfolio()
+        draws = CommonDraws.sample(fms, 100_000, seed=1)
+        losses = draws.losses([o.mitigation_id for o in options])
+        simulated = run_simulation(fms, SimulationConfig(n_simulations=100_000, seed=2, apply_mitigations=True))
+        assert np.mean(losses) == pytest.approx(np.mean(simulated.total_losses), rel=0.03)
+
+    def test_empty_subset_is_baseline(self):
+        fms, _ = make_portfolio()
+        draws = CommonDraws.sample(fms, 1000, seed=1)
+        np.testing.assert_array_equal(draws.losses([]), draws.baseline)
+
+    def test_adding_mitigations_never_increases_trial_losses(self):
+        fms, options = make_portfolio()
+        draws = CommonDraws.sample(fms, 5000, seed=1)
+        previous = draws.baseline
+        for k in range(1, len(options) + 1):
+            losses = draws.losses([o.mitigation_id for o in options[:k]])
+            assert np.all(losses <= previous + 1e-6)
+            previous = losses
+
+    def test_full_reduction_removes_failure_mode(self):
+        fm = make_fm(1, [MitigationEffect(1, "Stop", frequency_reduction=1.0)])
+        draws = CommonDraws.sample([fm], 1000, seed=1)
+        assert draws.baseline.sum() > 0
+        assert draws.losses([1]).sum() == 0
+
+    def test_severity_reduction_scales_losses(self):
+        fm = make_fm(1, [MitigationEffect(1, "Halve", severity_reduction=0.5)])
+        draws = CommonDraws.sample([fm], 1000, seed=1)
+        np.testing.assert_allclose(draws.losses([1]), draws.baseline * 0.5)
+
+    @pytest.mark.parametrize("frequency_reduction, severity_reduction", [(-0.5, 0.0), (0.0, -0.5), (-1.0, -1.0)])
+    def test_negative_reductions_are_none(self, frequency_reduction, severity_reduction):
+        fm = make_fm(1, [MitigationEffect(1, "Worse", frequency_reduction, severity_reduction)])
+        draws = CommonDraws.sample([fm], 1000, seed=1)
+        np.testing.assert_allclose(draws.losses([1]), draws.baseline)
+        assert draws.contributions()[0].el_reduction == pytest.approx(0, abs=1e-6)
+
+    def test_reductions_above_one_are_full(self):
+        fm = make_fm(1, [
+            MitigationEffect(1, "A", severity_reduction=1.5),
+            MitigationEffect(2, "B", severity_reduction=1.5),
+        ])
+        draws = CommonDraws.sample([fm], 1000, seed=1)
+        assert draws.losses([1, 2]).sum() == 0
+
+    def test_tail_value_at_risk_matches_compute_metrics(self):
+        losses = np.random.default_rng(0).lognormal(10, 1, 5000)
+        assert tail_value_at_risk(losses) == pytest.approx(compute_metrics(losses).tvar_95)
+
+
+class TestSimulateOnCommonDraws:
+    def test_draws_are_those_of_sample(self):
+        fms, _ = make_portfolio()
+        _, _, draws = simulate_on_common_draws(fms, 2000, seed=5)
+        sampled = CommonDraws.sample(fms, 2000, seed=5)
+        np.testing.assert_allclose(draws.baseline, sampled.baseline)
+        assert draws.contributions() == pytest.approx(sampled.contributions())
+
+    def test_runs_are_the_draws_without_and_with_all_mitigations(self):
+        fms, options = make_portfolio()
+        unmitigated, mitigated, draws = simulate_on_common_draws(fms, 2000, seed=5)
+        np.testing.assert_allclose(unmitigated.total_losses, draws.baseline)
+        np.testing.assert_allclose(mitigated.total_losses, draws.losses([o.mitigation_id for o in options]), atol=1e-6)
+        for result in (unmitigated, mitigated):
+            assert [fr.failure_mode_id for fr in result.failure_mode_results] == [fm.failure_mode_id for fm in fms]
+            for fr in result.failure_mode_results:
+                np.testing.assert_allclose(fr.total_losses, sum(sr.losses for sr in fr.scenario_results))
+
+    def test_mitigated_run_matches_mitigated_simulation(self):
+        fms, _ = make_portfolio()
+        _, mitigated, _ = simulate_on_common_draws(fms, 100_000, seed=1)
+        simulated = run_simulation(fms, SimulationConfig(n_simulations=100_000, seed=2, apply_mitigations=True))
+        assert np.mean(mitigated.total_losses) == pytest.approx(np.mean(simulated.total_losses), rel=0.03)
+
+
+class TestOptimizePortfolio:
+    @pytest.mark.parametrize("objective", ["expected_loss", "tvar_95"])
+    def test_best_within_budget_matches_brute_force(self, objective):
+        fms, options = make_portfolio()
+        draws = CommonDraws.sample(fms, 5000, seed=3)
+        budget = 80_000
+        result = optimize_portfolio(draws, options, budget=budget, objective=objective)
+
+        ids = [o.mitigation_id for o in options]
+        cost = {o.mitigation_id: o.cost for o in options}
+        baseline = draws.baseline.mean() if objective == "expected_loss" else tail_value_at_risk(draws.baseline)
+        brute = 0.0
+        for k in range(len(ids) + 1):
+            for subset in itertools.combinations(ids, k):
+                if sum(cost[m] for m in subset) <= budget:
+                    losses = draws.losses(subset)
+                    value = losses.mean() if objective == "expected_loss" else tail_value_at_risk(losses)
+                    brute = max(brute, baseline - value)
+
+        assert result.best.cost <= budget
+        assert result.best.reduction(objective) == pytest.approx(brute)
+        assert result.exhaustive
+        assert result.evaluations < 2 ** len(ids)
+
+    def test_frontier_is_efficient(self):
+        fms, options = make_portfolio()
+        result = optimize_portfolio(CommonDraws.sample(fms, 2000, seed=3), options, budget=100_000)
+        costs = [p.cost for p in result.frontier]
+        reductions = [p.expected_loss_reduction for p in result.frontier]
+        assert costs == sorted(costs)
+        assert all(b > a for a, b in zip(reductions, reductions[1:]))
+        assert result.frontier[0].mitigation_ids == ()
+
+    def test_no_budget_buys_every_effective_mitigation(self):
+        fms, options = make_portfolio()
+        unused = MitigationOption(mitigation_id=99, name="Unlinked", cost=1.0)
+        draws = CommonDraws.sample(fms, 2000, seed=3)
+        result = optimize_portfolio(draws, options + [unused])
+        assert 99 not in draws.mitigation_ids()
+        assert result.best.mitigation_ids == tuple(sorted(draws.mitigation_ids()))
+
+    def test_evaluation_limit(self):
+        fms, options = make_portfolio()
+        result = optimize_portfolio(
+            CommonDraws.sample(fms, 2000, seed=3), options, budget=80_000, max_evaluations=len(options) + 1,
+        )
+        assert not result.exhaustive
+        assert result.best.cost <= 80_000
+
+    def test_unknown_objective(self):
+        fms, options = make_portfolio()
+        with pytest.raises(ValueError):
+            optimize_portfolio(CommonDraws.sample(fms, 100, seed=3), options, objective="var_99")
+
+
+class TestContributions:
+    def test_matches_direct_evaluation(self):
+        fms, _ = make_portfolio()
+        draws = CommonDraws.sample(fms, 5000, seed=4)
+        ids = draws.mitigation_ids()
+        everything = draws.losses(ids)
+        for c in draws.contributions():
+            alone = draws.losses([c.mitigation_id])
+            others = draws.losses([m for m in ids if m != c.mitigation_id])
+            assert c.el_reduction == pytest.approx(draws.baseline.mean() - alone.mean())
+            assert c.var_95_reduction == pytest.approx(np.percentile(draws.baseline, 95) - np.percentile(alone, 95))
+            assert c.tvar_95_reduction == pytest.approx(tail_value_at_risk(draws.baseline) - tail_value_at_risk(alone))
+            assert c.loo_el_reduction == pytest.approx(others.mean() - everything.mean())
+            assert c.loo_tvar_95_reduction == pytest.approx(tail_value_at_risk(others) - tail_value_at_risk(everything))
+
+    def test_blocks_do_not_change_results(self):
+        fms, _ = make_portfolio()
+        draws = CommonDraws.sample(fms, 2000, seed=4)
+        assert draws.contributions(max_block_bytes=1) == draws.contributions()
+
+    def test_overlapping_mitigations_are_worth_less_on_top(self):
+        fm = make_fm(1, [
+            MitigationEffect(1, "A", frequency_reduction=0.5),
+            MitigationEffect(2, "B", frequency_reduction=0.5),
+        ], distribution_type="uniform")
+        by_id = {c.mitigation_id: c for c in CommonDraws.sample([fm], 20_000, seed=4).contributions()}
+        for c in by_id.values():
+            # Alone: half the baseline; on top of the other: half of the remaining half
+            assert c.loo_el_reduction == pytest.approx(c.el_reduction / 2, rel=0.05)
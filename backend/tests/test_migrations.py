@@ -0,0 +1,127 @@
+"""Tests for the versioned schema migrations."""
+
+import pytest
+from sqlalchemy import inspect, text
+
+import app.models  # noqa: F401 — register every table on Base.metadata
+from app import migrations
+from app.database import Base, create_db_engine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _columns(engine, table):
+    return {c["name"] for c in inspect(engine).get_columns(table)}
+
+
+def test_upgrade_empty_database_creates_schema(engine):
+    versions = [m.VERSION for m in migrations.migrations()]
+    assert [m.VERSION for m in migrations.pending(engine)] == versions
+
+    assert migrations.upgrade(engine) == versions
+
+    tables = set(inspect(engine).get_table_names())
+    assert set(Base.metadata.tables) <= tables
+    assert "schema_migrations" in tables
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.head()
+    assert migrations.pending(engine) == []
+
+
+def test_upgrade_is_idempotent(engine):
+    migrations.upgrade(engine)
+    assert migrations.upgrade(engine) == []
+
+
+def test_upgrade_to_target(engine):
+    assert migrations.upgrade(engine, target=1) == [1]
+    assert [m.VERSION for m in migrations.pending(engine)] == list(range(2, migrations.head() + 1))
+
+
+def test_upgrade_adopts_database_created_before_migrations(engine):
+    # A database from the former create_all at startup: no version table,
+    # quantification_runs without the profiling columns, no artifacts table
+    Base.metadata.create_all(engine, tables=[
+        t for name, t in Base.metadata.tables.items() if name != "quantification_run_artifacts"
+    ])
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE quantification_runs DROP COLUMN timings"))
+        conn.execute(text("ALTER TABLE quantification_runs DROP COLUMN peak_memory_bytes"))
+        conn.execute(text("INSERT INTO engagements (name, contract_value) VALUES ('Existing', 100)"))
+
+    assert migrations.upgrade(engine, target=2) == [1, 2]
+
+    assert {"timings", "peak_memory_bytes"} <= _columns(engine, "quantification_runs")
+    assert "quantification_run_artifacts" in inspect(engine).get_table_names()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM engagements")).scalars().all() == ["Existing"]
+
+
+def test_migrations_build_the_model_schema(engine):
+    # The baseline is frozen: later model columns come from later migrations
+    migrations.upgrade(engine, target=1)
+    assert "mitigation_contributions" not in _columns(engine, "quantification_runs")
+
+    migrations.upgrade(engine)
+    for name, table in Base.metadata.tables.items():
+        assert {c.name for c in table.columns} == _columns(engine, name), name
+
+
+@pytest.mark.parametrize("auto_migrate", [None, True])
+def test_startup_migrates_sqlite_by_default(engine, monkeypatch, auto_migrate):
+    from fastapi.testclient import TestClient
+    from app import main
+
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main.settings, "AUTO_MIGRATE", auto_migrate)
+    with TestClient(main.app):
+        assert migrations.pending(engine) == []
+
+
+def test_startup_fails_on_pending_migrations(engine, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import main
+
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main.settings, "AUTO_MIGRATE", False)
+    with pytest.raises(RuntimeError, match="python -m app.migrations upgrade"):
+        with TestClient(main.app):
+            pass
+
+
+def test_run_profiling_columns_added_to_existing_runs(engine):
+    # quantification_runs as it stood before per-run profiling
+    migrations.upgrade(engine, target=1)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE quantification_runs DROP COLUMN timings"))
+        conn.execute(text("ALTER TABLE quantification_runs DROP COLUMN peak_memory_bytes"))
+        conn.execute(text("INSERT INTO engagements (id, name) VALUES (1, 'Existing')"))
+        conn.execute(text("INSERT INTO quantification_runs (engagement_id, total_expected_loss) VALUES (1, 5.0)"))
+
+    assert migrations.upgrade(engine, target=2) == [2]
+
+    assert {"timings", "peak_memory_bytes"} <= _columns(engine, "quantification_runs")
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT total_expected_loss, timings, peak_memory_bytes FROM quantification_runs"
+        )).one()
+    assert tuple(row) == (5.0, None, None)
+
+
+def test_mitigation_contributions_column_added(engine):
+    migrations.upgrade(engine, target=2)
+    assert "mitigation_contributions" not in _columns(engine, "quantification_runs")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO engagements (id, name) VALUES (1, 'Existing')"))
+        conn.execute(text("INSERT INTO quantification_runs (engagement_id, is_mitigated) VALUES (1, 1)"))
+
+    assert migrations.upgrade(engine, target=3) == [3]
+
+    assert "mitigation_contributions" in _columns(engine, "quantification_runs")
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT mitigation_contributions FROM quantification_runs")).scalar_one() is None
@@ -0,0 +1,45 @@
+"""Tests for the metrics registry and its text exposition."""
+
+from app.observability.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter_and_gauge_render_with_labels():
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests.", ("route",)))
+    in_flight = registry.register(Gauge("in_flight", "In flight."))
+    requests.inc(route="/a")
+    requests.inc(2, route='/b"c')
+    in_flight.inc()
+    in_flight.dec()
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a"} 1.0',
+        'requests_total{route="/b\\"c"} 2.0',
+        "# HELP in_flight In flight.",
+        "# TYPE in_flight gauge",
+        "in_flight 0.0",
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.register(Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 6.25" in lines
+    assert "latency_seconds_count 4" in lines
+
+
+def test_callback_metrics_are_read_at_render_and_survive_reset():
+    registry = Registry()
+    depth = [3]
+    registry.register(Gauge("queue_depth", "Depth.", collect=lambda: {(): depth[0]}))
+    assert "queue_depth 3.0" in registry.render()
+    depth[0] = 5
+    registry.reset()
+    assert "queue_depth 5.0" in registry.render()
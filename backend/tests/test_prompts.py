@@ -0,0 +1,86 @@
+"""Tests for prompt construction: cacheable prefixes and token budgets."""
+
+import pytest
+
+from app.config import settings
+from app.prompts import failure_mode_generation, loss_estimation, mitigation_suggestion
+from app.prompts.base import Prompt, clip, estimate_tokens
+from app.prompts.failure_mode_generation import build_failure_mode_prompt
+from app.prompts.mitigation_suggestion import build_mitigation_prompt
+
+
+def _failure_modes(n):
+    return [
+        {
+            "name": f"Failure {i}",
+            "description": "Supplier misses the agreed delivery window " * 3,
+            "category": "Availability" if i % 2 else "Quality",
+            "frequency_mid": 1.0,
+            "expected_loss_est": i * 1000,
+        }
+        for i in range(n)
+    ]
+
+
+def _failure_mode_prompt(name, parties):
+    return build_failure_mode_prompt(
+        goods_service_name=name,
+        goods_service_description="",
+        use_context="",
+        supply_type="services",
+        replaceability="moderate",
+        industry="Technology",
+        contract_value=100_000,
+        currency="USD",
+        parties=parties,
+    )
+
+
+def test_prefix_is_shared():
+    first = _failure_mode_prompt("Hosting", [{"name": "Acme", "role": "buyer"}])
+    second = _failure_mode_prompt("Support", [{"name": "Beta", "role": "supplier"}])
+    assert first.prefix == second.prefix
+    assert "Hosting" in first.suffix and "Hosting" not in first.prefix
+    assert first.text.startswith(first.prefix) and first.text.endswith(first.suffix)
+
+
+@pytest.mark.parametrize("prefix", [
+    failure_mode_generation.PREFIX,
+    mitigation_suggestion.PREFIX,
+    loss_estimation.PREFIX,
+    loss_estimation.BATCH_PREFIX,
+])
+def test_prefixes_below_the_cacheable_minimum_have_no_breakpoint(prefix):
+    # None of today's prefixes reaches the minimum, so none claims caching
+    assert estimate_tokens(prefix) < settings.AI_PROMPT_CACHE_MIN_TOKENS
+    prefix_block, suffix_block = Prompt(prefix, "data").content()
+    assert "cache_control" not in prefix_block and "cache_control" not in suffix_block
+
+
+def test_long_prefix_is_marked_for_caching():
+    prefix = "x" * settings.AI_PROMPT_CACHE_MIN_TOKENS * 4
+    prefix_block, suffix_block = Prompt(prefix, "data").content()
+    assert prefix_block["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in suffix_block
+
+
+def test_small_mitigation_prompt_lists_everything():
+    prompt = build_mitigation_prompt(_failure_modes(5), "Technology", 100_000, "USD")
+    assert all(f"**Failure {i}**" in prompt.suffix for i in range(5))
+    assert "not listed" not in prompt.suffix
+
+
+def test_mitigation_prompt_stays_within_budget():
+    budget = 1000
+    prompt = build_mitigation_prompt(_failure_modes(300), "Technology", 100_000, "USD", budget=budget)
+    assert estimate_tokens(prompt.suffix) <= budget * 1.1
+    # The largest expected losses are kept, the remainder summarized by category
+    assert "**Failure 299**" in prompt.suffix
+    assert "**Failure 0**" not in prompt.suffix
+    assert "less significant failure modes not listed: Availability" in prompt.suffix
+
+
+def test_clip_cuts_at_a_word_boundary():
+    assert clip("short") == "short"
+    clipped = clip("word " * 50, max_chars=22)
+    assert clipped == "word word word word …"
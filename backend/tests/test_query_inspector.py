@@ -0,0 +1,68 @@
+"""Tests for statement shapes, query budgets and N+1 detection."""
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.observability import instrument_engine
+from app.observability.queries import QueryBudgetExceeded, inspect_request, query_budget, statement_shape
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)"))
+        conn.execute(text("INSERT INTO t (v) VALUES (1), (2), (3)"))
+    yield engine
+    engine.dispose()
+
+
+def _lookups(engine, n):
+    with engine.connect() as conn:
+        for i in range(n):
+            conn.execute(text("SELECT v FROM t WHERE id = :id"), {"id": i})
+
+
+def test_statement_shape_collapses_in_lists_and_whitespace():
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+    assert statement_shape("SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s)") == "SELECT * FROM t WHERE id IN (?)"
+
+
+def test_budget_passes_and_counts(engine):
+    with query_budget(3) as inspection:
+        _lookups(engine, 3)
+    assert inspection.count == 3
+    assert inspection.shapes == {"SELECT v FROM t WHERE id = ?": 3}
+
+
+def test_budget_exceeded_reports_statements(engine):
+    with pytest.raises(QueryBudgetExceeded, match="Query budget of 2 exceeded") as excinfo:
+        with query_budget(2):
+            _lookups(engine, 3)
+    assert "3 x SELECT v FROM t WHERE id = ?" in str(excinfo.value)
+
+
+def test_repeat_limit_catches_n_plus_one(engine):
+    with pytest.raises(QueryBudgetExceeded, match="ran 4 times"):
+        with query_budget(10, max_repeats=1):
+            _lookups(engine, 4)
+
+
+def test_request_inspection_logs_repeated_shapes(engine, caplog, monkeypatch):
+    monkeypatch.setattr("app.config.settings.QUERY_REPEAT_THRESHOLD", 3)
+    with caplog.at_level(logging.WARNING, logger="app.observability.queries"):
+        with inspect_request("GET /things"):
+            _lookups(engine, 3)
+    assert "GET /things ran the same statement 3 times (N+1?)" in caplog.text
+
+
+def test_slow_statements_are_logged(engine, caplog, monkeypatch):
+    monkeypatch.setattr("app.config.settings.QUERY_SLOW_THRESHOLD_MS", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.observability.queries"):
+        with query_budget(5) as inspection:
+            _lookups(engine, 1)
+    assert "Slow query" in caplog.text
+    assert len(inspection.slow) == 1
@@ -0,0 +1,89 @@
+"""Tests for Claude call instrumentation and retry with backoff."""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.prompts.base import Prompt
+from app.services.ai_metrics import AIMetrics, CallRecord
+from app.services.claude_service import ClaudeService
+from app.services.llm_cache import LLMCache
+from tests.stubs import StubAnthropic, StubAPIError
+
+PROMPT = Prompt("instructions", "engagement data")
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "AI_RETRY_BASE_DELAY", 0.001)
+
+
+def _service(stub, metrics, **kwargs):
+    return ClaudeService(client=stub, cache=LLMCache(), metrics=metrics, endpoint="test", engagement_id=7, **kwargs)
+
+
+def test_call_records_latency_tokens_and_cost():
+    metrics = AIMetrics()
+    stub = StubAnthropic(reply={"v": 1}, usage={"input_tokens": 1_000_000, "output_tokens": 100_000})
+    assert asyncio.run(_service(stub, metrics)._call_claude(PROMPT)) == {"v": 1}
+    totals = metrics.summary()["totals"]
+    assert totals["calls"] == 1 and totals["errors"] == 0 and totals["retries"] == 0
+    assert totals["input_tokens"] == 1_000_000 and totals["output_tokens"] == 100_000
+    assert totals["cost_usd"] == pytest.approx(3.0 + 1.5)
+    assert totals["stop_reasons"] == {"end_turn": 1}
+    assert totals["parse_paths"] == {"clean": 1}
+    assert totals["latency_p50"] is not None
+
+
+def test_rate_limits_are_retried_with_backoff():
+    metrics = AIMetrics()
+    stub = StubAnthropic(reply={"v": 1}, fail_times=2, fail_status=429)
+    assert asyncio.run(_service(stub, metrics)._call_claude(PROMPT)) == {"v": 1}
+    assert len(stub.prompts) == 3
+    assert metrics.summary()["totals"]["retries"] == 2
+
+
+def test_retries_are_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "AI_MAX_RETRIES", 1)
+    metrics = AIMetrics()
+    stub = StubAnthropic(fail_times=5, fail_status=529)
+    with pytest.raises(StubAPIError):
+        asyncio.run(_service(stub, metrics)._call_claude(PROMPT))
+    totals = metrics.summary()["totals"]
+    assert len(stub.prompts) == 2
+    assert totals["errors"] == 1 and totals["retries"] == 1
+
+
+def test_client_errors_are_not_retried():
+    metrics = AIMetrics()
+    stub = StubAnthropic(fail_times=1, fail_status=400)
+    with pytest.raises(StubAPIError):
+        asyncio.run(_service(stub, metrics)._call_claude(PROMPT))
+    assert len(stub.prompts) == 1
+
+
+def test_stream_records_one_call():
+    metrics = AIMetrics()
+    stub = StubAnthropic(reply={"items": [{"a": 1}]}, fail_times=1)
+
+    async def drain():
+        return [event async for event, _ in _service(stub, metrics)._stream_claude(PROMPT, "items")]
+
+    assert asyncio.run(drain()) == ["item", "done"]
+    totals = metrics.summary()["totals"]
+    assert totals["calls"] == 1 and totals["retries"] == 1
+    assert totals["parse_paths"] == {"stream": 1}
+    assert totals["input_tokens"] == 100
+
+
+def test_summary_breaks_down_by_endpoint_and_engagement():
+    metrics = AIMetrics()
+    for endpoint, eid in [("a", 1), ("a", 2), ("b", 1)]:
+        metrics.record(CallRecord(endpoint=endpoint, engagement_id=eid, model="m", latency=0.5))
+    metrics.record(CallRecord(endpoint="a", engagement_id=1, model="m", latency=0.0, cached=True))
+    summary = metrics.summary()
+    assert summary["totals"]["calls"] == 4 and summary["totals"]["cache_hits"] == 1
+    assert {k: v["calls"] for k, v in summary["by_endpoint"].items()} == {"a": 3, "b": 1}
+    assert {k: v["calls"] for k, v in summary["by_engagement"].items()} == {"1": 3, "2": 1}
+    assert metrics.summary(engagement_id=2)["totals"]["calls"] == 1
@@ -0,0 +1,59 @@
+"""Tests for streamed Claude responses with a stub client."""
+
+import asyncio
+
+from app.prompts.base import Prompt
+from app.services.claude_service import ClaudeService
+from app.services.llm_cache import LLMCache
+from tests.stubs import StubAnthropic
+
+REPLY = {"failure_modes": [{"name": f"Failure {i}", "description": "x" * 40} for i in range(5)]}
+
+
+def _collect(service, prompt=Prompt("instructions", "prompt"), key="failure_modes", stub=None):
+    async def run():
+        events = []
+        async for event, payload in service._stream_claude(prompt, key):
+            events.append((event, payload, stub.chunks_sent if stub else None))
+        return events
+
+    return asyncio.run(run())
+
+
+def test_items_arrive_before_the_response_completes():
+    stub = StubAnthropic(reply=REPLY, chunk_size=8)
+    events = _collect(ClaudeService(client=stub, cache=LLMCache()), stub=stub)
+    items = [payload for event, payload, _ in events if event == "item"]
+    assert items == REPLY["failure_modes"]
+    first_item_at = next(sent for event, _, sent in events if event == "item")
+    assert first_item_at < stub.chunks_sent / 3
+    assert events[-1][:2] == ("done", {"count": 5, "truncated": False, "stop_reason": "end_turn", "cached": False})
+
+
+def test_truncated_stream_degrades_gracefully():
+    stub = StubAnthropic(reply=REPLY, stop_reason="max_tokens")
+    cache = LLMCache()
+    events = _collect(ClaudeService(client=stub, cache=cache))
+    items = [payload for event, payload, _ in events if event == "item"]
+    assert 0 < len(items) < 5
+    assert items == REPLY["failure_modes"][:len(items)]
+    done = events[-1][1]
+    assert done["truncated"] and done["stop_reason"] == "max_tokens"
+    assert cache.stats()["writes"] == 0
+
+
+def test_complete_stream_is_cached_and_replayed():
+    stub = StubAnthropic(reply=REPLY)
+    cache = LLMCache()
+    _collect(ClaudeService(client=stub, cache=cache))
+    replay = _collect(ClaudeService(client=stub, cache=cache))
+    assert len(stub.prompts) == 1
+    assert [p for e, p, _ in replay if e == "item"] == REPLY["failure_modes"]
+    assert replay[-1][1]["cached"] is True
+
+
+def test_unexpected_shape_falls_back_to_repair():
+    stub = StubAnthropic(reply={"failureModes": [{"name": "a"}]})
+    events = _collect(ClaudeService(client=stub, cache=LLMCache()))
+    assert [e for e, _, _ in events] == ["done"]
+    assert events[-1][1]["truncated"] is True
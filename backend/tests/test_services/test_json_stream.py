@@ -0,0 +1,82 @@
+"""Tests for incremental JSON array element parsing."""
+
+import json
+
+import pytest
+
+from app.services.json_stream import JSONArrayStreamParser
+
+DOC = {
+    "summary": 'contains { braces } and [brackets] and a \\"quoted\\" word',
+    "failure_modes": [
+        {"name": "Outage", "loss_scenarios": [{"severity_mid": 1000}, {"severity_mid": 2000}]},
+        {"name": 'Brace } in "string" {', "tags": ["a", "]"]},
+        {"name": "Third"},
+    ],
+    "trailing": {"failure_modes": [{"name": "nested, not top level"}]},
+}
+
+
+def _feed_in_chunks(parser, text, size):
+    found = []
+    for i in range(0, len(text), size):
+        found.extend(parser.feed(text[i:i + size]))
+    return found
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 10_000])
+def test_chunking_does_not_change_result(size):
+    parser = JSONArrayStreamParser("failure_modes")
+    assert _feed_in_chunks(parser, json.dumps(DOC), size) == DOC["failure_modes"]
+    assert parser.complete
+
+
+def test_elements_are_returned_as_soon_as_they_close():
+    text = json.dumps({"failure_modes": [{"name": "a"}, {"name": "b"}]})
+    parser = JSONArrayStreamParser("failure_modes")
+    first_close = text.index("}") + 1
+    assert parser.feed(text[:first_close]) == [{"name": "a"}]
+    assert parser.feed(text[first_close:]) == [{"name": "b"}]
+
+
+def test_code_fences_and_prose_are_ignored():
+    text = "Here you go:\n```json\n" + json.dumps({"mitigations": [{"name": "Escrow"}]}) + "\n```"
+    parser = JSONArrayStreamParser("mitigations")
+    assert parser.feed(text) == [{"name": "Escrow"}]
+
+
+def test_truncated_stream_keeps_completed_elements():
+    text = json.dumps(DOC)
+    cut = text.index('"Third"')
+    parser = JSONArrayStreamParser("failure_modes")
+    assert _feed_in_chunks(parser, text[:cut], 5) == DOC["failure_modes"][:2]
+    assert not parser.complete
+
+
+def test_other_keys_are_ignored():
+    parser = JSONArrayStreamParser("mitigations")
+    assert parser.feed(json.dumps(DOC)) == []
+    assert not parser.complete
+
+
+@pytest.mark.parametrize("preamble", ['Sure, here is the "JSON" [as requested]:\n', "It's {roughly} this: ", '"'])
+def test_prose_before_the_object_is_ignored(preamble):
+    parser = JSONArrayStreamParser("failure_modes")
+    text = preamble + json.dumps(DOC)
+    assert _feed_in_chunks(parser, text, 3) == DOC["failure_modes"]
+    assert parser.complete
+    assert parser.text == text
+
+
+def test_only_the_unfinished_element_is_buffered():
+    items = [{"name": f"FM {i}", "notes": "x" * 50} for i in range(200)]
+    text = json.dumps({"failure_modes": items})
+    parser = JSONArrayStreamParser("failure_modes")
+    longest = 0
+    found = []
+    for i in range(0, len(text), 16):
+        found.extend(parser.feed(text[i:i + 16]))
+        longest = max(longest, len(parser._buf))
+    assert found == items
+    assert longest < 2 * len(json.dumps(items[0]))
+    assert parser.text == text
@@ -0,0 +1,125 @@
+"""Tests for the LLM response cache and its use by ClaudeService."""
+
+import asyncio
+
+import pytest
+
+from app.prompts.base import Prompt
+from app.services import llm_cache
+from app.services.claude_service import ClaudeService
+from app.services.llm_cache import LLMCache
+from tests.stubs import StubAnthropic
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_key_depends_on_model_prompt_and_params():
+    base = LLMCache.make_key("model-a", "prompt", max_tokens=100)
+    assert base == LLMCache.make_key("model-a", "prompt", max_tokens=100)
+    assert base != LLMCache.make_key("model-b", "prompt", max_tokens=100)
+    assert base != LLMCache.make_key("model-a", "prompt!", max_tokens=100)
+    assert base != LLMCache.make_key("model-a", "prompt", max_tokens=200)
+
+
+def test_memory_hit_and_miss():
+    cache = LLMCache()
+    assert cache.get("k") is None
+    cache.set("k", "value")
+    assert cache.get("k") == "value"
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["writes"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_memory_lru_eviction():
+    cache = LLMCache(max_memory_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")  # b is now least recently used
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    LLMCache(path=path).set("k", "persisted")
+    reopened = LLMCache(path=path)
+    assert reopened.get("k") == "persisted"
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.get("k") == "persisted"
+    assert reopened.stats()["memory_hits"] == 1  # promoted to memory
+
+
+def test_process_cache_is_memory_only_unless_a_path_is_set(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache.settings, "LLM_CACHE_PATH", llm_cache.settings.model_fields["LLM_CACHE_PATH"].default)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    cache = llm_cache.get_llm_cache()
+    cache.set("key", "value")
+    assert "disk_entries" not in cache.stats()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_ttl_expiry(tmp_path, clock):
+    cache = LLMCache(path=str(tmp_path / "cache.db"), ttl=60)
+    cache.set("k", "v")
+    clock[0] += 59
+    assert cache.get("k") == "v"
+    clock[0] += 2
+    assert cache.get("k") is None
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_disk_size_eviction_is_least_recently_used(tmp_path, clock):
+    cache = LLMCache(path=str(tmp_path / "cache.db"), max_disk_bytes=25, max_memory_entries=0)
+    for key in ("a", "b"):
+        clock[0] += 1
+        cache.set(key, "x" * 10)
+    clock[0] += 1
+    cache.get("a")  # refreshes a's access time on disk
+    clock[0] += 1
+    cache.set("c", "x" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["disk_bytes"] <= 25
+
+
+def _service(stub, cache, **kwargs):
+    return ClaudeService(client=stub, cache=cache, **kwargs)
+
+
+def test_service_serves_repeat_prompts_from_cache():
+    stub = StubAnthropic(reply={"answer": 42})
+    cache = LLMCache()
+
+    async def run():
+        first = await _service(stub, cache)._call_claude(Prompt("instructions", "same prompt"))
+        second = await _service(stub, cache)._call_claude(Prompt("instructions", "same prompt"))
+        return first, second
+
+    assert asyncio.run(run()) == ({"answer": 42}, {"answer": 42})
+    assert len(stub.prompts) == 1
+
+
+def test_bypass_refreshes_entry():
+    stub = StubAnthropic(reply={"v": 1})
+    cache = LLMCache()
+    asyncio.run(_service(stub, cache)._call_claude(Prompt("instructions", "p")))
+    stub.reply = {"v": 2}
+    assert asyncio.run(_service(stub, cache, bypass_cache=True)._call_claude(Prompt("instructions", "p"))) == {"v": 2}
+    assert asyncio.run(_service(stub, cache)._call_claude(Prompt("instructions", "p"))) == {"v": 2}
+    assert len(stub.prompts) == 2
+
+
+def test_truncated_responses_are_not_cached():
+    stub = StubAnthropic(stop_reason="max_tokens")
+    cache = LLMCache()
+    asyncio.run(_service(stub, cache)._call_claude(Prompt("instructions", "p")))
+    asyncio.run(_service(stub, cache)._call_claude(Prompt("instructions", "p")))
+    assert len(stub.prompts) == 2
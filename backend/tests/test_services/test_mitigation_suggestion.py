@@ -0,0 +1,90 @@
+"""Tests for map-reduce mitigation suggestions."""
+
+import asyncio
+
+from app.services.claude_service import ClaudeService
+from app.services.llm_cache import LLMCache
+from app.services.mitigation_suggestion_service import (
+    chunk_failure_modes,
+    merge_mitigations,
+    suggest_mitigations_map_reduce,
+)
+from tests.stubs import StubAnthropic
+
+
+def _fm(name, category):
+    return {"name": name, "description": "", "category": category, "frequency_mid": 1.0}
+
+
+def _mitigation(name, *links, cost=1000):
+    return {
+        "name": name,
+        "estimated_cost": cost,
+        "applicable_failure_modes": [
+            {"failure_mode_name": fm, "frequency_reduction": f, "severity_reduction": s} for fm, f, s in links
+        ],
+    }
+
+
+def test_chunks_keep_categories_together():
+    fms = [_fm(f"A{i}", "A") for i in range(4)] + [_fm(f"B{i}", "B") for i in range(3)] + [_fm("C0", "C")]
+    chunks = chunk_failure_modes(fms, 5)
+    assert all(len(chunk) <= 5 for chunk in chunks)
+    assert sorted(fm["name"] for chunk in chunks for fm in chunk) == sorted(fm["name"] for fm in fms)
+    for category in "AB":
+        assert len({i for i, chunk in enumerate(chunks) for fm in chunk if fm["category"] == category}) == 1
+
+
+def test_oversized_category_is_split():
+    chunks = chunk_failure_modes([_fm(f"A{i}", "A") for i in range(12)], 5)
+    assert [len(chunk) for chunk in chunks] == [5, 5, 2]
+
+
+def test_uncategorized_failure_modes_are_grouped():
+    fms = [_fm("A0", "A"), _fm("N0", None), _fm("N1", None), _fm("B0", "B"), _fm("B1", "B")]
+    del fms[2]["category"]
+    chunks = chunk_failure_modes(fms, 2)
+    assert sorted(fm["name"] for chunk in chunks for fm in chunk) == sorted(fm["name"] for fm in fms)
+    assert [{"N0", "N1"}] == [{fm["name"] for fm in chunk} for chunk in chunks if chunk[0]["name"].startswith("N")]
+
+
+def test_merge_deduplicates_and_links():
+    results = [
+        {"mitigations": [_mitigation("Dual sourcing", ("Outage", 0.3, 0.1), cost=5000)]},
+        {"mitigations": [
+            _mitigation("dual-sourcing", ("outage", 0.2, 0.4), ("Breach", 0.1, 0.0), cost=8000),
+            _mitigation("Pray", ("Not a failure mode", 0.9, 0.9)),
+        ]},
+    ]
+    merged = merge_mitigations(results, ["Outage", "Breach"])
+    assert len(merged) == 1
+    (mitigation,) = merged
+    assert mitigation["estimated_cost"] == 8000
+    links = {link["failure_mode_name"]: link for link in mitigation["applicable_failure_modes"]}
+    assert set(links) == {"Outage", "Breach"}
+    assert (links["Outage"]["frequency_reduction"], links["Outage"]["severity_reduction"]) == (0.3, 0.4)
+
+
+def test_map_reduce_queries_chunks_concurrently():
+    fms = [_fm(f"Failure {i}", f"Cat {i % 3}") for i in range(9)]
+    stub = StubAnthropic(
+        reply={"mitigations": [_mitigation("Monitoring", ("Failure 0", 0.2, 0.2), ("Failure 5", 0.1, 0.1))]},
+        delay=0.05,
+    )
+    service = ClaudeService(client=stub, cache=LLMCache())
+    args = {"failure_modes": fms, "industry": "Technology", "contract_value": 100_000, "currency": "USD"}
+    result = asyncio.run(suggest_mitigations_map_reduce(service, args, chunk_size=3, concurrency=4))
+    assert result["chunks"] == 3 and result["errors"] == []
+    assert stub.peak == 3
+    assert len(result["mitigations"]) == 1
+    assert len(result["mitigations"][0]["applicable_failure_modes"]) == 2
+
+
+def test_map_reduce_reports_failed_chunks():
+    fms = [_fm("Outage", "A"), _fm("Breach", "B")]
+    stub = StubAnthropic(reply={"mitigations": [_mitigation("Backups", ("Outage", 0.2, 0.2))]}, fail_on="Breach")
+    service = ClaudeService(client=stub, cache=LLMCache())
+    args = {"failure_modes": fms, "industry": "Technology", "contract_value": 100_000, "currency": "USD"}
+    result = asyncio.run(suggest_mitigations_map_reduce(service, args, chunk_size=1, concurrency=2))
+    assert [m["name"] for m in result["mitigations"]] == ["Backups"]
+    assert len(result["errors"]) == 1 and "overloaded" in result["errors"][0]
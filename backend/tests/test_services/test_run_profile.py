@@ -0,0 +1,57 @@
+"""Tests for per-stage run timing and peak memory."""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.engine.monte_carlo import FailureModeResult, SimulationResult
+from app.services.run_profile import SLOWEST_FAILURE_MODES, RunProfile
+
+
+def test_nested_stages_are_not_double_counted():
+    profile = RunProfile()
+    with profile.stage("store"):
+        time.sleep(0.01)
+        with profile.stage("aggregate"):
+            time.sleep(0.02)
+    assert profile.stages["aggregate"] >= 0.02
+    assert 0.01 <= profile.stages["store"] < 0.02
+
+
+def test_repeated_stages_accumulate():
+    profile = RunProfile()
+    for _ in range(3):
+        with profile.stage("histograms"):
+            time.sleep(0.005)
+    assert profile.stages["histograms"] >= 0.015
+
+
+def test_peak_memory_is_process_peak_rss_without_tracing():
+    profile = RunProfile()
+    block = np.ones(50_000_000 // 8)
+    block[:] = 2.0  # touch the pages so they are resident
+    profile.record_peak_memory()
+    del block
+    assert profile.peak_memory_bytes >= 50_000_000
+    assert not tracemalloc.is_tracing()
+
+    profile.peak_memory_bytes = 10**15
+    profile.record_peak_memory()
+    assert profile.peak_memory_bytes == 10**15
+
+
+def test_timings_keep_slowest_failure_modes():
+    profile = RunProfile(stages={"simulate": 0.5, "load_inputs": 0.25})
+    result = SimulationResult(
+        total_losses=np.zeros(1),
+        failure_mode_results=[
+            FailureModeResult(failure_mode_id=i, name=f"FM {i}", total_losses=np.zeros(1), seconds=i / 100)
+            for i in range(SLOWEST_FAILURE_MODES + 5)
+        ],
+    )
+    timings = profile.timings(result)
+    assert timings["stages"] == {"load_inputs": 0.25, "simulate": 0.5}
+    assert timings["total"] == 0.75
+    ids = [fm["failure_mode_id"] for fm in timings["failure_modes"]]
+    assert ids == list(range(SLOWEST_FAILURE_MODES + 4, 4, -1))
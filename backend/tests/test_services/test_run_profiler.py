@@ -0,0 +1,86 @@
+"""Tests for the simulation profiler hooks."""
+
+import json
+import marshal
+import tracemalloc
+
+import pytest
+
+from app.engine.monte_carlo import SimulationConfig, SimulationHook, run_simulation
+from app.services.run_profiler import make_profiler
+from benchmarks.engine import build_inputs
+
+INPUTS = build_inputs(failure_modes=3, scenarios=2, frequency="mid", distribution="lognormal")
+CONFIG = SimulationConfig(n_simulations=20_000, seed=1)
+
+
+def _summary(hook):
+    assert hook.artifacts[0].name == "profile.json"
+    return json.loads(hook.artifacts[0].content)
+
+
+def test_hook_sees_every_failure_mode_and_result():
+    calls = []
+
+    class Recorder(SimulationHook):
+        def start(self, failure_modes, config):
+            calls.append("start")
+
+        def failure_mode_finished(self, fm, result):
+            calls.append(result.failure_mode_id)
+
+        def finish(self, result):
+            calls.append(result.n_simulations)
+
+    run_simulation(INPUTS, CONFIG, Recorder())
+    assert calls == ["start", 1, 2, 3, 20_000]
+
+
+def test_hook_does_not_change_results():
+    plain = run_simulation(INPUTS, CONFIG)
+    hooked = run_simulation(INPUTS, CONFIG, make_profiler("cprofile"))
+    assert (plain.total_losses == hooked.total_losses).all()
+
+
+def test_cprofile_summary_and_pstats():
+    hook = make_profiler("cprofile")
+    run_simulation(INPUTS, CONFIG, hook)
+    summary = _summary(hook)
+    assert summary["completed"] and len(summary["failure_modes"]) == 3
+    assert any("run_simulation" in f["function"] for f in summary["functions"])
+    stats = marshal.loads(hook.artifacts[1].content)
+    assert any(func[2] == "_run_simulation" for func in stats)
+
+
+def test_tracemalloc_reports_growth_and_numpy_allocations():
+    hook = make_profiler("tracemalloc")
+    result = run_simulation(INPUTS, CONFIG, hook)
+    summary = _summary(hook)
+    # The result's arrays are alive when the simulation ends
+    assert summary["numpy"]["live_bytes"] >= result.total_losses.nbytes
+    assert summary["allocations"]
+    assert all(fm["traced_bytes_delta"] is not None for fm in summary["failure_modes"])
+
+
+def test_failed_simulation_still_produces_a_profile():
+    hook = make_profiler("sampling")
+    with pytest.raises(AttributeError):
+        run_simulation([None], CONFIG, hook)
+    assert _summary(hook)["completed"] is False
+
+
+def test_overlapping_hooks_share_tracing():
+    first, second = make_profiler("cprofile"), make_profiler("tracemalloc")
+    first.start(INPUTS, CONFIG)
+    second.start(INPUTS, CONFIG)
+    # The hook that started tracing finishes first; the other still traces
+    first.finish(None)
+    assert tracemalloc.is_tracing()
+    second.finish(None)
+    assert _summary(second)["allocations"] is not None
+    assert not tracemalloc.is_tracing()
+
+
+def test_unknown_profiler():
+    with pytest.raises(ValueError, match="Unknown profiler"):
+        make_profiler("perf")
@@ -0,0 +1,57 @@
+"""Tests for the synthetic engagement generator used by benchmarks and load tests."""
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_db_engine
+from app.engine.monte_carlo import SimulationConfig, run_simulation
+from app.models.loss_scenario import LossScenario
+from app.models.mitigation import FailureModeMitigation
+from app.models.quantification import QuantificationRun
+from app.schemas.engagement_transfer import EngagementExport
+from benchmarks.synthetic import SyntheticSpec, engine_inputs, export_document, generate, populate
+
+SMALL = SyntheticSpec(failure_modes=12, scenarios_per_mode=3, parties=5, goods_services=3, mitigations=4,
+                      links_per_mitigation=2, seed=3)
+
+
+def test_generation_is_seeded():
+    assert generate(SMALL) == generate(SMALL)
+    assert generate(SMALL) != generate(SyntheticSpec(**{**SMALL.__dict__, "seed": 4}))
+
+
+def test_generated_values_are_plausible():
+    model = generate(SMALL)
+    for fm in model["failure_modes"]:
+        assert 0 < fm["frequency_low"] <= fm["frequency_mid"] <= fm["frequency_high"]
+        for ls in fm["loss_scenarios"]:
+            assert 0 < ls["severity_low"] <= ls["severity_mid"] <= ls["severity_high"]
+    assert [p["role"] for p in model["parties"][:2]] == ["buyer", "supplier"]
+
+
+def test_engine_inputs_simulate():
+    inputs = engine_inputs(generate(SMALL))
+    assert sum(len(fm.loss_scenarios) for fm in inputs) == 36
+    result = run_simulation(inputs, SimulationConfig(n_simulations=200, seed=1, apply_mitigations=True))
+    assert result.total_losses.shape == (200,)
+
+
+def test_populate_with_run_history(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'synthetic.db'}")
+    Base.metadata.create_all(bind=engine)
+    try:
+        with sessionmaker(bind=engine)() as db:
+            populate(db, generate(SMALL), runs=2, run_trials=100)
+            assert db.scalar(select(func.count()).select_from(LossScenario)) == 36
+            assert db.scalar(select(func.count()).select_from(FailureModeMitigation)) == 8
+            created = db.scalars(select(QuantificationRun.created_at).order_by(QuantificationRun.id)).all()
+            assert len(created) == 4 and created[0] < created[-1]
+    finally:
+        engine.dispose()
+
+
+def test_export_document_is_importable():
+    document = EngagementExport.model_validate(export_document(generate(SMALL)))
+    assert len(document.failure_modes) == 12
+    ids = [ls.id for fm in document.failure_modes for ls in fm.loss_scenarios]
+    assert len(ids) == len(set(ids)) == 36
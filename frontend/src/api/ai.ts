@@ -1,11 +1,60 @@
 import client from './client';
-import type { AIGenerationResponse } from '../types';
+import type { AIGenerationResponse, BatchEstimateLossesResponse, BulkGenerationResponse, StreamDone } from '../types';
 
 export const generateFailureModes = (engagementId: number, goodsServiceId: number) =>
   client.post<AIGenerationResponse>(`/engagements/${engagementId}/ai/generate-failure-modes`, { goods_service_id: goodsServiceId }).then(r => r.data);
 
+export const bulkGenerateFailureModes = (engagementId: number, goodsServiceIds?: number[]) =>
+  client.post<BulkGenerationResponse>(`/engagements/${engagementId}/ai/generate-failure-modes/bulk`, { goods_service_ids: goodsServiceIds ?? null }).then(r => r.data);
+
 export const estimateLosses = (engagementId: number, failureModeId: number, lossScenarioId: number) =>
   client.post<AIGenerationResponse>(`/engagements/${engagementId}/ai/estimate-losses`, { failure_mode_id: failureModeId, loss_scenario_id: lossScenarioId }).then(r => r.data);
 
-export const suggestMitigations = (engagementId: number) =>
-  client.post<AIGenerationResponse>(`/engagements/${engagementId}/ai/suggest-mitigations`, {}).then(r => r.data);
+export const batchEstimateLosses = (engagementId: number, lossScenarioIds?: number[], apply = true) =>
+  client.post<BatchEstimateLossesResponse>(`/engagements/${engagementId}/ai/estimate-losses/batch`, { loss_scenario_ids: lossScenarioIds ?? null, apply }).then(r => r.data);
+
+export const suggestMitigations = (engagementId: number, mode: 'auto' | 'single' | 'map_reduce' = 'auto') =>
+  client.post<AIGenerationResponse>(`/engagements/${engagementId}/ai/suggest-mitigations`, { mode }).then(r => r.data);
+
+// Server-sent events: onItem fires for each failure mode / mitigation as soon
+// as it is complete; resolves with the final summary.
+const streamItems = async (
+  path: string,
+  body: unknown,
+  onItem: (item: Record<string, unknown>) => void,
+): Promise<StreamDone> => {
+  const response = await fetch(`${client.defaults.baseURL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok || !response.body) throw new Error(`Request failed: ${response.status}`);
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+      const [eventLine, dataLine] = buffer.slice(0, boundary).split('\n');
+      buffer = buffer.slice(boundary + 2);
+      const event = eventLine.replace('event: ', '');
+      const data = JSON.parse(dataLine.replace('data: ', ''));
+      if (event === 'item') onItem(data);
+      else if (event === 'done') return data as StreamDone;
+      else if (event === 'error') throw new Error(data.detail);
+    }
+  }
+  throw new Error('Stream ended unexpectedly');
+};
+
+export const streamFailureModes = (
+  engagementId: number,
+  goodsServiceId: number,
+  onItem: (item: Record<string, unknown>) => void,
+) => streamItems(`/engagements/${engagementId}/ai/generate-failure-modes/stream`, { goods_service_id: goodsServiceId }, onItem);
+
+export const streamMitigations = (engagementId: number, onItem: (item: Record<string, unknown>) => void) =>
+  streamItems(`/engagements/${engagementId}/ai/suggest-mitigations/stream`, {}, onItem);
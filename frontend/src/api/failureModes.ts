@@ -1,5 +1,5 @@
 import client from './client';
-import type { FailureMode } from '../types';
+import type { FailureMode, LossScenario } from '../types';
 
 export const listFailureModes = (engagementId: number) =>
   client.get<FailureMode[]>(`/engagements/${engagementId}/failure-modes/`).then(r => r.data);
@@ -15,3 +15,8 @@ export const toggleFailureMode = (engagementId: number, fmId: number) =>
 
 export const deleteFailureMode = (engagementId: number, fmId: number) =>
   client.delete(`/engagements/${engagementId}/failure-modes/${fmId}`);
+
+export type FailureModeBulkItem = Partial<FailureMode> & { loss_scenarios?: Partial<LossScenario>[] };
+
+export const bulkCreateFailureModes = (engagementId: number, items: FailureModeBulkItem[]) =>
+  client.post<{ ids: number[]; loss_scenario_ids: number[][] }>(`/engagements/${engagementId}/failure-modes/bulk`, items).then(r => r.data);
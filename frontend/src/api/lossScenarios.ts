@@ -12,3 +12,6 @@ export const updateLossScenario = (engagementId: number, fmId: number, lsId: num
 
 export const deleteLossScenario = (engagementId: number, fmId: number, lsId: number) =>
   client.delete(`/engagements/${engagementId}/failure-modes/${fmId}/loss-scenarios/${lsId}`);
+
+export const bulkCreateLossScenarios = (engagementId: number, fmId: number, items: Partial<LossScenario>[]) =>
+  client.post<{ ids: number[] }>(`/engagements/${engagementId}/failure-modes/${fmId}/loss-scenarios/bulk`, items).then(r => r.data);
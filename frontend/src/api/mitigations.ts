@@ -1,5 +1,5 @@
 import client from './client';
-import type { Mitigation } from '../types';
+import type { Mitigation, MitigationPortfolioResult } from '../types';
 
 export const listMitigations = (engagementId: number) =>
   client.get<Mitigation[]>(`/engagements/${engagementId}/mitigations/`).then(r => r.data);
@@ -18,3 +18,9 @@ export const linkMitigation = (engagementId: number, mitId: number, data: { fail
 
 export const unlinkMitigation = (engagementId: number, mitId: number, fmId: number) =>
   client.delete(`/engagements/${engagementId}/mitigations/${mitId}/unlink/${fmId}`);
+
+export const bulkLinkMitigations = (engagementId: number, links: { mitigation_id: number; failure_mode_id: number; frequency_reduction: number; severity_reduction: number }[]) =>
+  client.post<{ ids: number[]; created: number; updated: number }>(`/engagements/${engagementId}/mitigations/links`, links).then(r => r.data);
+
+export const optimizeMitigationPortfolio = (engagementId: number, data: { budget?: number | null; objective?: 'expected_loss' | 'tvar_95'; num_simulations?: number; seed?: number }) =>
+  client.post<MitigationPortfolioResult>(`/engagements/${engagementId}/mitigations/portfolio`, data).then(r => r.data);
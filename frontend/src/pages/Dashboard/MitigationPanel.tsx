@@ -6,6 +6,9 @@ interface Props {
 
 export default function MitigationPanel({ dashboard }: Props) {
   const { mitigation_summary, party_exposures, currency } = dashboard;
+  const combined = mitigation_summary.filter((m) => m.mitigation_id == null);
+  const perMitigation = mitigation_summary.filter((m) => m.mitigation_id != null);
+  const fmt = (v: number) => `${currency} ${v.toLocaleString(undefined, { maximumFractionDigits: 0 })}`;
 
   return (
     <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
@@ -14,7 +17,7 @@ export default function MitigationPanel({ dashboard }: Props) {
           <h3 className="text-sm font-medium text-gray-500 uppercase tracking-wide mb-4">
             Mitigation Value
           </h3>
-          {mitigation_summary.map((m, i) => (
+          {combined.map((m, i) => (
             <div key={i} className="space-y-2">
               <div className="font-medium">{m.name}</div>
               <div className="flex justify-between text-sm">
@@ -37,6 +40,32 @@ export default function MitigationPanel({ dashboard }: Props) {
               )}
             </div>
           ))}
+          {perMitigation.length > 0 && (
+            <table className="w-full text-sm mt-4">
+              <thead>
+                <tr className="text-left text-xs text-gray-500">
+                  <th className="font-medium py-1">Mitigation</th>
+                  <th className="font-medium py-1 text-right">Cost</th>
+                  <th className="font-medium py-1 text-right" title="EL reduction of this mitigation alone">Alone</th>
+                  <th className="font-medium py-1 text-right" title="EL reduction on top of all other mitigations">On top</th>
+                  <th className="font-medium py-1 text-right" title="ROI of the reduction on top of all other mitigations">ROI</th>
+                </tr>
+              </thead>
+              <tbody>
+                {perMitigation.map((m) => (
+                  <tr key={m.mitigation_id} className="border-t border-gray-100">
+                    <td className="py-1">{m.name}</td>
+                    <td className="py-1 text-right">{fmt(m.cost)}</td>
+                    <td className="py-1 text-right">{fmt(m.el_reduction)}</td>
+                    <td className="py-1 text-right text-green-600">{fmt(m.loo_el_reduction ?? 0)}</td>
+                    <td className={`py-1 text-right ${(m.loo_roi ?? 0) >= 0 ? 'text-green-600' : 'text-red-600'}`}>
+                      {m.loo_roi !== null ? `${(m.loo_roi * 100).toFixed(0)}%` : 'N/A'}
+                    </td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          )}
         </div>
       )}
 
@@ -80,6 +80,28 @@ export interface Mitigation {
   cost: number;
 }
 
+export interface MitigationPortfolio {
+  mitigation_ids: number[];
+  names: string[];
+  cost: number;
+  expected_loss: number;
+  tvar_95: number;
+  expected_loss_reduction: number;
+  tvar_95_reduction: number;
+  roi: number | null;
+}
+
+export interface MitigationPortfolioResult {
+  objective: 'expected_loss' | 'tvar_95';
+  budget: number | null;
+  num_simulations: number;
+  baseline: MitigationPortfolio;
+  best: MitigationPortfolio;
+  frontier: MitigationPortfolio[];
+  evaluations: number;
+  exhaustive: boolean;
+}
+
 export interface QuantificationResult {
   id: number;
   failure_mode_id: number | null;
@@ -112,10 +134,29 @@ export interface QuantificationRun {
   risk_asymmetry_ratio: number;
   histogram_bins: number[];
   histogram_counts: number[];
+  timings: RunTimings | null;
+  peak_memory_bytes: number | null;
+  mitigation_contributions: MitigationContribution[] | null;
   created_at: string;
   results: QuantificationResult[];
 }
 
+export interface MitigationContribution {
+  mitigation_id: number;
+  el_reduction: number;
+  var_95_reduction: number;
+  tvar_95_reduction: number;
+  loo_el_reduction: number;
+  loo_var_95_reduction: number;
+  loo_tvar_95_reduction: number;
+}
+
+export interface RunTimings {
+  stages: Record<string, number>;
+  total: number;
+  failure_modes?: { failure_mode_id: number; name: string; seconds: number }[];
+}
+
 export interface ScenarioSummary {
   failure_mode_id: number;
   name: string;
@@ -136,6 +177,13 @@ export interface MitigationSummary {
   cost: number;
   el_reduction: number;
   roi: number | null;
+  var_95_reduction: number | null;
+  tvar_95_reduction: number | null;
+  mitigation_id: number | null;
+  loo_el_reduction: number | null;
+  loo_var_95_reduction: number | null;
+  loo_tvar_95_reduction: number | null;
+  loo_roi: number | null;
 }
 
 export interface Dashboard {
@@ -166,3 +214,36 @@ export interface Dashboard {
 export interface AIGenerationResponse {
   data: Record<string, unknown>;
 }
+
+export interface BulkGenerationItem {
+  goods_service_id: number;
+  data: Record<string, unknown> | null;
+  error: string | null;
+}
+
+export interface BulkGenerationResponse {
+  results: BulkGenerationItem[];
+}
+
+export interface LossEstimate {
+  loss_scenario_id: number;
+  severity_low: number;
+  severity_mid: number;
+  severity_high: number;
+  distribution_type: string;
+  confidence: number | null;
+  reasoning: string;
+}
+
+export interface BatchEstimateLossesResponse {
+  estimates: LossEstimate[];
+  updated: number;
+  errors: string[];
+}
+
+export interface StreamDone {
+  count: number;
+  truncated: boolean;
+  stop_reason: string | null;
+  cached: boolean;
+}